@@ -0,0 +1,212 @@
+"""
+Benchmarks export, join and query strategies on synthetic feature repos.
+
+Usage:
+
+```console
+python -m benchmarks.run --sizes 1000,10000 --output benchmark.json
+python -m benchmarks.run --sizes 1000,10000 --baseline benchmark.json
+```
+
+Every case is timed `repeat` times (the fastest run is reported) and run once more under tracemalloc
+for its peak memory. With a baseline, the command fails if any case is slower or uses more memory
+than the baseline by more than the tolerance.
+"""
+
+import json
+import os
+import platform
+import tempfile
+import time
+import tracemalloc
+from datetime import timedelta
+from typing import Callable, Dict, List, Optional
+
+import pandas as pd
+import sqlalchemy
+import typer
+from tabulate import tabulate
+
+from benchmarks.generate import ENTITY_COLUMN, EVENT_TIMESTAMP_COLUMN, START_DATE, generate_labels, generate_repo
+from spellbook.feature_store import FeatureStore
+
+app = typer.Typer()
+
+
+def count_csv_rows(output_file: str) -> int:
+    with open(output_file) as f:
+        return sum(1 for _ in f) - 1
+
+
+def build_cases(repo_config, labels: pd.DataFrame, snapshot_date, output_dir: str) -> Dict[str, Callable[[], int]]:
+    """
+    Benchmark cases by name, each runs once and returns the number of rows produced
+    """
+    feature_list = [f"{g.name}.{f.name}" for g in repo_config.groups for f in g.features]
+    # the result cache would turn repeated runs into cache hits
+    fs = FeatureStore(repo_config, result_cache=False)
+    fs_safe = FeatureStore(repo_config, use_safe=True, result_cache=False)
+
+    def export():
+        output_file = os.path.join(output_dir, "export.csv")
+        fs.export(feature_list, snapshot_date, output_file=output_file)
+        return count_csv_rows(output_file)
+
+    def join(strategy):
+        def run():
+            return fs.join(labels, ENTITY_COLUMN, EVENT_TIMESTAMP_COLUMN, feature_list, strategy=strategy).shape[0]
+
+        return run
+
+    def read_query(feature_store):
+        def run():
+            feature_group = feature_store.get_feature_group(feature_list)
+            query = feature_group.build_query(feature_store.engine, snapshot_date)
+            return pd.read_sql_query(query.statement, feature_store.engine).shape[0]
+
+        return run
+
+    def to_df():
+        return fs.get_feature_group(feature_list).to_df(fs.engine, snapshot_date).shape[0]
+
+    return {
+        "export": export,
+        "join_query": join("query"),
+        "join_temp_table": join("temp_table"),
+        "join_asof": join("asof"),
+        "build_query": read_query(fs),
+        "build_subquery_safe": read_query(fs_safe),
+        "to_df": to_df,
+    }
+
+
+def run_case(fn: Callable[[], int], repeat=3) -> dict:
+    wall_times = []
+    rows = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows = fn()
+        wall_times.append(time.perf_counter() - start)
+
+    # measured separately as tracing allocations slows the case down
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    wall_time = min(wall_times)
+    return {
+        "rows": rows,
+        "wall_time": wall_time,
+        "rows_per_sec": rows / wall_time if wall_time > 0 else None,
+        "peak_memory_mb": peak / 2**20,
+    }
+
+
+def run_benchmarks(
+    url: str,
+    sizes: List[int],
+    history_depth=10,
+    num_groups=2,
+    feature_width=5,
+    num_labels=10000,
+    repeat=3,
+    cases: Optional[List[str]] = None,
+) -> dict:
+    results = []
+    with tempfile.TemporaryDirectory() as output_dir:
+        for num_entities in sizes:
+            repo_config = generate_repo(url, num_entities, history_depth, num_groups, feature_width)
+            labels = generate_labels(num_labels, num_entities, history_depth)
+            snapshot_date = START_DATE + timedelta(days=history_depth)
+            for name, fn in build_cases(repo_config, labels, snapshot_date, output_dir).items():
+                if cases is not None and name not in cases:
+                    continue
+                results.append({"case": name, "num_entities": num_entities, **run_case(fn, repeat)})
+    return {
+        "metadata": {
+            "dialect": sqlalchemy.engine.make_url(url).get_backend_name(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "pandas": pd.__version__,
+            "sqlalchemy": sqlalchemy.__version__,
+            "history_depth": history_depth,
+            "num_groups": num_groups,
+            "feature_width": feature_width,
+            "num_labels": num_labels,
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance=0.25) -> List[str]:
+    """
+    Regressions of results relative to baseline, cases missing from the baseline are ignored
+    """
+    baseline_results = {(r["case"], r["num_entities"]): r for r in baseline["results"]}
+    regressions = []
+    for result in results["results"]:
+        previous = baseline_results.get((result["case"], result["num_entities"]))
+        if previous is None:
+            continue
+        for metric in ["wall_time", "peak_memory_mb"]:
+            if result[metric] > previous[metric] * (1 + tolerance):
+                regressions.append(
+                    f"{result['case']} ({result['num_entities']} entities): {metric} "
+                    f"{result[metric]:.3f} > {previous[metric]:.3f} (+{tolerance:.0%} tolerance)"
+                )
+    return regressions
+
+
+def print_results(results: dict) -> str:
+    headers = ["case", "entities", "rows", "wall time (s)", "rows/sec", "peak memory (MB)"]
+    table = [
+        [r["case"], r["num_entities"], r["rows"], r["wall_time"], r["rows_per_sec"], r["peak_memory_mb"]]
+        for r in results["results"]
+    ]
+    return tabulate(table, headers, tablefmt="pipe", floatfmt=".3f")
+
+
+@app.command()
+def main(
+    url: str = "sqlite:///benchmark.db",
+    sizes: str = "1000,10000",
+    history_depth: int = 10,
+    num_groups: int = 2,
+    feature_width: int = 5,
+    num_labels: int = 10000,
+    repeat: int = 3,
+    cases: str = "",
+    output: str = "benchmark.json",
+    baseline: str = "",
+    tolerance: float = 0.25,
+):
+    results = run_benchmarks(
+        url,
+        [int(size) for size in sizes.split(",")],
+        history_depth,
+        num_groups,
+        feature_width,
+        num_labels,
+        repeat,
+        None if cases == "" else cases.split(","),
+    )
+    typer.echo(print_results(results))
+    if output != "":
+        with open(output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if baseline != "":
+        with open(baseline) as f:
+            regressions = compare(results, json.load(f), tolerance)
+        for regression in regressions:
+            typer.echo(f"REGRESSION {regression}", err=True)
+        if len(regressions) > 0:
+            raise typer.Exit(code=1)
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,117 @@
+"""
+Arrow fetch backend: DBAPI cursor batches are turned straight into typed Arrow record batches.
+
+`pd.read_sql_query` lets pandas infer a dtype for every column from the Python objects of the fetched
+rows. Here the rows of each batch (`Result.partitions`) are transposed into columns and converted by
+pyarrow to the arrow type of the column's declared value type (see
+`writer.arrow_type_from_value_type`), falling back to inference for columns without one. Batches
+are handed as-is to the columnar writers, and converted to pandas without copying numeric columns.
+"""
+
+from typing import Dict, Iterator, List, Literal, Optional
+
+import pandas as pd
+from sqlalchemy.engine import Engine
+
+from spellbook.writer import _cast_table, _import_pyarrow, arrow_type_from_value_type
+
+FetchBackend = Literal["pandas", "arrow"]
+
+
+def arrow_schema(columns: List[str], value_types: Optional[Dict[str, type]] = None):
+    """
+    Schema of a result with the declared value types, columns without one are typed as null and
+    inferred from the fetched values instead
+    """
+    pa = _import_pyarrow()
+    value_types = {} if value_types is None else value_types
+    fields = []
+    for col in columns:
+        arrow_type = arrow_type_from_value_type(value_types.get(col))
+        fields.append(pa.field(col, pa.null() if arrow_type is None else arrow_type))
+    return pa.schema(fields)
+
+
+def _to_array(values, arrow_type):
+    pa = _import_pyarrow()
+    if pa.types.is_null(arrow_type):
+        return pa.array(values)
+    try:
+        return pa.array(values, type=arrow_type)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError, OverflowError):
+        # e.g. SQLite returns datetimes as strings and PostgreSQL numerics as decimals, these are
+        # inferred and cast to the declared type afterwards
+        return pa.array(values)
+
+
+def rows_to_record_batch(rows, schema):
+    """
+    Converts a list of rows (tuples or `Row`s) into a record batch of the schema
+    """
+    pa = _import_pyarrow()
+    columns = list(zip(*rows)) if len(rows) > 0 else [[] for _ in schema]
+    arrays = [_to_array(values, field.type) for values, field in zip(columns, schema)]
+    table = pa.Table.from_arrays(arrays, names=schema.names)
+    target = pa.schema(
+        [field if not pa.types.is_null(field.type) else table.schema.field(field.name) for field in schema]
+    )
+    table = _cast_table(table, target)
+    return pa.RecordBatch.from_arrays([col.combine_chunks() for col in table.columns], schema=table.schema)
+
+
+def fetch_record_batch(statement, conn, value_types: Optional[Dict[str, type]] = None):
+    """
+    Executes statement on conn and fetches the full result as a single record batch
+    """
+    result = conn.execute(statement)
+    try:
+        schema = arrow_schema(list(result.keys()), value_types)
+        return rows_to_record_batch(result.fetchall(), schema)
+    finally:
+        result.close()
+
+
+def iter_record_batches(statement, conn, value_types: Optional[Dict[str, type]] = None, batch_size=10000) -> Iterator:
+    """
+    Executes statement on a server-side cursor of conn and yields record batches of at most batch_size
+    rows, always at least one so the columns of an empty result are known.
+    """
+    result = conn.execution_options(stream_results=True).execute(statement)
+    try:
+        schema = arrow_schema(list(result.keys()), value_types)
+        num_batches = 0
+        for rows in result.partitions(batch_size):
+            yield rows_to_record_batch(rows, schema)
+            num_batches += 1
+        if num_batches == 0:
+            yield rows_to_record_batch([], schema)
+    finally:
+        result.close()
+
+
+def to_pandas(batch) -> pd.DataFrame:
+    # split_blocks keeps one block per column, so numeric columns without nulls are not copied
+    return batch.to_pandas(split_blocks=True)
+
+
+def read_sql(
+    statement,
+    conn,
+    backend: FetchBackend = "pandas",
+    value_types: Optional[Dict[str, type]] = None,
+    chunksize=None,
+):
+    """
+    `pd.read_sql_query` with a choice of fetch backend: a DataFrame, or an iterator of DataFrames of
+    at most chunksize rows if chunksize is provided
+    """
+    if backend not in ["pandas", "arrow"]:
+        raise ValueError(f"fetch_backend must be one of (pandas, arrow) - got: {backend}.")
+    if backend == "pandas":
+        return pd.read_sql_query(statement, conn, chunksize=chunksize)
+    if chunksize is not None:
+        return (to_pandas(batch) for batch in iter_record_batches(statement, conn, value_types, chunksize))
+    if isinstance(conn, Engine):
+        with conn.connect() as engine_conn:
+            return to_pandas(fetch_record_batch(statement, engine_conn, value_types))
+    return to_pandas(fetch_record_batch(statement, conn, value_types))
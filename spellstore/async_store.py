@@ -0,0 +1,270 @@
+"""
+Asyncio version of the feature store API on a SQLAlchemy `AsyncEngine` (e.g. `sqlite+aiosqlite` or
+`postgresql+asyncpg`).
+
+Queries are built by the same `FeatureGroup` / `FeatureView` builders as `FeatureStore` (on the
+engine's `sync_engine`, building does not touch the database) and executed on async connections,
+so exports and joins never block the event loop on database I/O. The per-slice queries of a join run
+concurrently, at most max_concurrency at a time, each on its own pooled connection.
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import List, Literal, Optional
+
+import numpy as np
+import pandas as pd
+
+from spellbook.base import RepoConfig
+from spellbook.entity_filter import ENTITY_FILTER_COLUMN, ENTITY_FILTER_TABLE, EntityFilterStrategy, entity_values
+from spellbook.feature_store import SPINE_ROW_COLUMN, FeatureStore, _to_python_scalar, asof_merge, merge_entity_df
+from spellbook.strategy import QueryStrategyName
+from spellbook.util import create_temp_table, infer_ttl_field
+from spellbook.writer import OutputFormat, get_writer
+
+
+async def ordered_gather(fn, iterable, max_concurrency: Optional[int] = None):
+    """
+    Async generator version of `util.ordered_map`: awaits fn(item) for every item with at most
+    max_concurrency calls in flight, yielding results in input order.
+    """
+    max_concurrency = 1 if max_concurrency is None or max_concurrency < 1 else max_concurrency
+    pending: List[asyncio.Task] = []
+    try:
+        for item in iterable:
+            pending.append(asyncio.ensure_future(fn(item)))
+            if len(pending) >= max_concurrency:
+                yield await pending.pop(0)
+        while len(pending) > 0:
+            yield await pending.pop(0)
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+def to_df(result, rows=None) -> pd.DataFrame:
+    # mirrors pd.read_sql_query's conversion of result rows
+    rows = result.fetchall() if rows is None else rows
+    return pd.DataFrame.from_records(rows, columns=list(result.keys()), coerce_float=True)
+
+
+class AsyncFeatureStore(object):
+    def __init__(
+        self,
+        repo_config: RepoConfig,
+        engine=None,
+        full_join=False,
+        use_safe=False,
+        entity_filter: EntityFilterStrategy = "auto",
+        query_strategy: QueryStrategyName = "auto",
+        max_concurrency=8,
+    ):
+        """
+        engine must be an `AsyncEngine`, max_concurrency bounds the number of queries a join runs at once.
+        """
+        self.repo_config = repo_config
+        self.engine = repo_config.engine if engine is None else engine
+        if not hasattr(self.engine, "sync_engine"):
+            # e.g. the engine of the repo config, created from a url with a blocking driver
+            raise ValueError(
+                "AsyncFeatureStore requires an AsyncEngine, create one with an async driver url "
+                "(e.g. `create_async_engine('sqlite+aiosqlite:///...')` or `postgresql+asyncpg://...`)."
+            )
+        self.max_concurrency = max_concurrency
+        # metadata lookups and query building are delegated to a FeatureStore on the sync facade
+        self.feature_store = FeatureStore(
+            repo_config,
+            self.engine.sync_engine,
+            full_join=full_join,
+            use_safe=use_safe,
+            entity_filter=entity_filter,
+            query_strategy=query_strategy,
+        )
+
+    @property
+    def sync_engine(self):
+        return self.engine.sync_engine
+
+    def get_feature_group(self, feature_list: List[str]):
+        return self.feature_store.get_feature_group(feature_list)
+
+    def get_entity_filter(self, entity_list=None) -> str:
+        return self.feature_store.get_entity_filter(entity_list)
+
+    @asynccontextmanager
+    async def _entity_filter(self, conn, entity_list, strategy: str):
+        """
+        The entity list as used in a query on conn: a list, a VALUES list or a temporary table
+        uploaded for the duration of the block (see `spellstore.entity_filter`).
+        """
+        if strategy == "values":
+            yield entity_values(entity_list)
+        elif strategy == "temp_table":
+            entity_df = pd.DataFrame({ENTITY_FILTER_COLUMN: pd.Series(list(entity_list)).drop_duplicates()})
+            entity_table = await conn.run_sync(create_temp_table, ENTITY_FILTER_TABLE, entity_df)
+            try:
+                yield entity_table
+            finally:
+                await conn.run_sync(entity_table.drop)
+        else:
+            yield entity_list
+
+    async def export(
+        self,
+        feature_list: List[str],
+        snapshot_date: Optional[datetime] = None,
+        output_file: Optional[str] = None,
+        entity_list=None,
+        chunksize=10000,
+        output_format: Optional[OutputFormat] = None,
+        force_append=False,
+        partition_cols: Optional[List[str]] = None,
+    ):
+        """
+        Exports the feature group as of snapshot_date. Chunks are written to output_file if provided (in
+        a worker thread, so file I/O doesn't block the event loop) and the number of rows is returned,
+        otherwise the full snapshot is returned as a DataFrame.
+        """
+        chunks = self.iter_export(feature_list, snapshot_date, entity_list=entity_list, batch_size=chunksize)
+        if output_file is None or output_file == "":
+            output = [chunk_df async for chunk_df in chunks]
+            return pd.concat(output) if len(output) > 0 else pd.DataFrame()
+
+        value_types = self.feature_store.get_value_types(feature_list)
+        writer = get_writer(output_file, output_format, value_types, force_append, partition_cols)
+        try:
+            async for chunk_df in chunks:
+                await asyncio.to_thread(writer.write, chunk_df)
+        finally:
+            await asyncio.to_thread(writer.close)
+        return writer.num_rows
+
+    async def iter_export(
+        self, feature_list: List[str], snapshot_date: Optional[datetime] = None, entity_list=None, batch_size=10000
+    ):
+        """
+        Async iterator over the exported feature group, yielding DataFrames of at most batch_size rows
+        streamed from a server-side cursor.
+        """
+        if snapshot_date is None:
+            snapshot_date = datetime.now()
+        if entity_list is not None:
+            entity_list = list(entity_list)
+        strategy = self.get_entity_filter(entity_list)
+        feature_group = self.get_feature_group(feature_list)
+
+        async with self.engine.connect() as conn, self._entity_filter(conn, entity_list, strategy) as entities:
+            query = feature_group.build_query(self.sync_engine, snapshot_date=snapshot_date, entity_list=entities)
+            result = await conn.stream(query.statement)
+            async for rows in result.partitions(batch_size):
+                yield to_df(result, rows)
+
+    async def join(
+        self,
+        entity_df,
+        entity_column="",
+        event_timestamp_column="",
+        feature_list: List[str] = [],
+        snapshot_date: Optional[datetime] = None,
+        strategy: Literal["query", "asof"] = "query",
+        max_concurrency: Optional[int] = None,
+    ):
+        """
+        Point-in-time join of the features onto entity_df, see `FeatureStore.join`. The per-slice
+        queries run concurrently on separate connections, at most max_concurrency (defaults to the
+        store's) at once.
+        """
+        output = [
+            chunk_df
+            async for chunk_df in self.iter_join(
+                entity_df,
+                entity_column,
+                event_timestamp_column,
+                feature_list,
+                snapshot_date=snapshot_date,
+                strategy=strategy,
+                max_concurrency=max_concurrency,
+            )
+        ]
+        if len(output) == 0:
+            return pd.DataFrame()
+        output_df = pd.concat(output)
+        if strategy == "asof" and snapshot_date is None and event_timestamp_column is not None:
+            # as with the sync asof strategy, the entity_df row order is kept
+            output_df = output_df.sort_index()
+        return output_df
+
+    async def iter_join(
+        self,
+        entity_df,
+        entity_column="",
+        event_timestamp_column="",
+        feature_list: List[str] = [],
+        snapshot_date: Optional[datetime] = None,
+        strategy: Literal["query", "asof"] = "query",
+        max_concurrency: Optional[int] = None,
+    ):
+        """
+        Async iterator version of `join`, yielding the joined slices in order as they complete.
+
+        strategy="query" issues one latest-row query per (timestamp, entity) slice, strategy="asof"
+        fetches the feature history per entity slice and resolves it in memory with `asof_merge`.
+        """
+        if strategy not in ["query", "asof"]:
+            raise ValueError(f"strategy must be one of (query, asof) - got: {strategy}.")
+        max_concurrency = self.max_concurrency if max_concurrency is None else max_concurrency
+        feature_group = self.get_feature_group(feature_list)
+
+        if strategy == "asof" and snapshot_date is None and event_timestamp_column is not None:
+            entity_df = entity_df.reset_index(drop=True)
+            entity_df.index.name = SPINE_ROW_COLUMN
+            entity_list = entity_df[entity_column].unique()
+            entity_list_splits = np.array_split(entity_list, (len(entity_list) // 999) + 1)
+            slices = [entity_df[entity_df[entity_column].isin(elist)] for elist in entity_list_splits if len(elist) > 0]
+
+            async def fetch_asof_slice(sub_entity_df):
+                return await self._join_asof_slice(feature_group, sub_entity_df, entity_column, event_timestamp_column)
+
+            async for chunk_df in ordered_gather(fetch_asof_slice, slices, max_concurrency):
+                yield chunk_df
+            return
+
+        async def fetch_slice(task):
+            sub_entity_df, temp_snapshot_date, elist = task
+            temp_df = await self._fetch_feature_group(feature_group, temp_snapshot_date, elist.tolist())
+            feature_entity_column = feature_group.feature_views[0].entity_column
+            return merge_entity_df(sub_entity_df, temp_df, entity_column, feature_entity_column)
+
+        slices = self.feature_store._join_query_slices(entity_df, entity_column, event_timestamp_column, snapshot_date)
+        async for chunk_df in ordered_gather(fetch_slice, slices, max_concurrency):
+            yield chunk_df
+
+    async def _fetch_feature_group(self, feature_group, snapshot_date, entity_list) -> pd.DataFrame:
+        strategy = self.get_entity_filter(entity_list)
+        async with self.engine.connect() as conn, self._entity_filter(conn, entity_list, strategy) as entities:
+            query = feature_group.build_query(self.sync_engine, snapshot_date=snapshot_date, entity_list=entities)
+            return to_df(await conn.execute(query.statement))
+
+    async def _join_asof_slice(self, feature_group, sub_entity_df, entity_column, event_timestamp_column):
+        start_date = _to_python_scalar(sub_entity_df[event_timestamp_column].min())
+        end_date = _to_python_scalar(sub_entity_df[event_timestamp_column].max())
+        elist = sub_entity_df[entity_column].unique().tolist()
+
+        temp_df = sub_entity_df
+        async with self.engine.connect() as conn:
+            for fv in feature_group.feature_views:
+                query = fv.build_history_subquery(
+                    self.sync_engine,
+                    entity_list=elist,
+                    start_date=infer_ttl_field(start_date, fv.ttl),
+                    end_date=end_date,
+                    is_subquery=False,
+                )
+                history_df = to_df(await conn.execute(query.statement))
+                features_df = asof_merge(sub_entity_df, history_df, fv, entity_column, event_timestamp_column)
+                keep_cols = [x for x in features_df.columns if x not in temp_df.columns]
+                temp_df = temp_df.join(features_df[keep_cols])
+        temp_df = temp_df.sort_index()
+        temp_df.index.name = None
+        return temp_df
@@ -2,17 +2,21 @@
 Handles and parses the metadata files
 """
 
+import hashlib
 import os
+import pickle
 from datetime import datetime
-from typing import List, Literal, Optional, Union
+from typing import Any, Dict, List, Literal, Optional, Union
 
 import yaml
 from dotenv import load_dotenv
-from pydantic import BaseModel, validator
-from sqlalchemy import create_engine
-from sqlalchemy.engine.base import Engine
+from pydantic import BaseModel, PrivateAttr, validator
 from tabulate import tabulate
 
+# directory of the parsed metadata cache, caching is disabled unless set
+CACHE_DIR_ENVVAR = "SPELLSTORE_CACHE_DIR"
+CACHE_VERSION = 1
+
 
 class EngineConfig(object):
     def __init__(self, url: str, config: dict):
@@ -41,6 +45,8 @@ class EngineConfig(object):
         return cls(url, config)
 
     def get_engine(self):
+        from sqlalchemy import create_engine
+
         return create_engine(self.url, **self.config)
 
 
@@ -87,14 +93,17 @@ class Group(BaseModel):
 class RepoConfig(BaseModel):
     entities: List[Entity]
     groups: List[Group]
-    # fix this typing later...
-    engine: Optional[Union[Engine, EngineConfig]]  # type: ignore
+    # a sqlalchemy Engine, typed loosely so that sqlalchemy is only imported once an engine is created
+    engine: Optional[Any]
+    _group_index: Dict[str, Group] = PrivateAttr(default_factory=dict)
+    _feature_index: Dict[str, List[str]] = PrivateAttr(default_factory=dict)
+    _indexed_groups: Optional[tuple] = PrivateAttr(default=None)
 
     class Config:
         arbitrary_types_allowed = True
 
     @classmethod
-    def parse_list(cls, list_obj):
+    def parse_list(cls, list_obj, validate=True):
         entities = []
         groups = []
         engine = None
@@ -103,39 +112,89 @@ class RepoConfig(BaseModel):
                 entities.append(obj)
             elif type(obj) is Group:
                 groups.append(obj)
-            elif type(obj) in [Engine]:
-                engine = obj
             elif type(obj) is EngineConfig:
                 engine = obj.get_engine()
             else:
-                raise ValueError(f"Expected Entity or Group object, got: {type(obj)}")
+                from sqlalchemy.engine.base import Engine
+
+                if type(obj) is not Engine:
+                    raise ValueError(f"Expected Entity or Group object, got: {type(obj)}")
+                engine = obj
+        if not validate:
+            # the objects were validated when they were first parsed, e.g. loaded from the metadata cache
+            return cls.construct(entities=entities, groups=groups, engine=engine)
         return cls(entities=entities, groups=groups, engine=engine)
 
     @classmethod
-    def parse_yaml(cls, config):
-        meta_list_dict = yaml.safe_load_all(config)
-        meta_list = []
-        for meta_obj in meta_list_dict:
-            if meta_obj["kind"] == "entity":
-                meta_list.append(Entity.parse_obj(meta_obj))
-            elif meta_obj["kind"] == "group":
-                meta_list.append(Group.parse_obj(meta_obj))
-            elif meta_obj["kind"] == "engine":
-                meta_list.append(EngineConfig.parse_obj(meta_obj))
-            else:
-                raise Exception("Unable to parse Configuration...")
-        return cls.parse_list(meta_list)
+    def parse_yaml(cls, config, load_engine=True):
+        return cls.parse_list(resolve_engine_config(load_meta_list(config), load_engine))
 
     @classmethod
-    def parse_yaml_file(cls, config_file):
-        config = open(config_file, "r").read()
-        return cls.parse_yaml(config)
+    def parse_yaml_file(cls, config_file, cache_dir: Optional[str] = None, load_engine=True):
+        """
+        Parses a metadata file. If cache_dir (or the SPELLSTORE_CACHE_DIR environment variable) is set, the
+        parsed entities and groups are cached on disk, keyed by the file path, modification time and hash.
+        With load_engine=False the engine is skipped, e.g. for commands which only print metadata.
+        """
+        cache_dir = os.environ.get(CACHE_DIR_ENVVAR) if cache_dir is None else cache_dir
+        if not cache_dir:
+            config = open(config_file, "r").read()
+            return cls.parse_yaml(config, load_engine)
 
-    def get_attr_from_group_name(self, group_name, attr_name):
+        meta_list = load_cached_meta_list(config_file, cache_dir)
+        return cls.parse_list(resolve_engine_config(meta_list, load_engine), validate=False)
+
+    def _build_index(self):
+        """
+        (Re)builds the group and feature lookups, whenever the groups have changed since the last build
+        """
+        if self._indexed_groups is not None and self._indexed_groups == (id(self.groups), len(self.groups)):
+            return
+        self._group_index = {g.name: g for g in self.groups}
+        self._feature_index = {}
         for g in self.groups:
-            if g.name == group_name:
-                return getattr(g, attr_name)
-        raise ValueError(f"Group name: {group_name}, not found in Repo Configuration!")
+            for f in g.features:
+                self._feature_index.setdefault(f.name, []).append(g.name)
+        self._indexed_groups = (id(self.groups), len(self.groups))
+
+    def get_group(self, group_name) -> Group:
+        self._build_index()
+        group = self._group_index.get(group_name)
+        if group is None:
+            raise ValueError(f"Group name: {group_name}, not found in Repo Configuration!")
+        return group
+
+    def get_attr_from_group_name(self, group_name, attr_name):
+        return getattr(self.get_group(group_name), attr_name)
+
+    def get_groups_from_feature_name(self, feature_name) -> List[str]:
+        """
+        Names of the groups which declare a feature named feature_name
+        """
+        self._build_index()
+        return self._feature_index.get(feature_name, [])
+
+    def validate_feature_list(self, feature_list: List[str]):
+        """
+        Checks every item of the feature list is of the form `group.column`, where column is a feature,
+        the entity or a timestamp column of the group, raising a single error listing all invalid items.
+        """
+        errors = []
+        for tbl_col in feature_list:
+            if "." not in tbl_col:
+                errors.append(f"{tbl_col} (expected group.feature)")
+                continue
+            tbl, col = tbl_col.rsplit(".", 1)
+            try:
+                group = self.get_group(tbl)
+            except ValueError:
+                errors.append(f"{tbl_col} (unknown group {tbl})")
+                continue
+            columns = [group.entity, group.event_timestamp_column, group.create_timestamp_column]
+            if col not in columns and col not in [f.name for f in group.features]:
+                errors.append(f"{tbl_col} (unknown feature {col})")
+        if len(errors) > 0:
+            raise ValueError(f"Invalid feature list: {', '.join(errors)}")
 
     def print_entity(self):
         headers = ["name", "value-type", "description"]
@@ -176,3 +235,69 @@ Feature
             return f"\n{self.print_entity()}"
         else:
             raise ValueError(f"Subset does not appear one of (group, feature, entity) - got: {subset}.")
+
+
+def load_meta_list(config) -> list:
+    """
+    Parses the yaml documents of a metadata file into Entity and Group objects, engines are kept as the
+    raw dict so environment variables are resolved (and secrets kept out of the cache) when loading.
+    """
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    meta_list: List[Union[Entity, Group, dict]] = []
+    for meta_obj in yaml.load_all(config, Loader=loader):
+        if meta_obj["kind"] == "entity":
+            meta_list.append(Entity.parse_obj(meta_obj))
+        elif meta_obj["kind"] == "group":
+            meta_list.append(Group.parse_obj(meta_obj))
+        elif meta_obj["kind"] == "engine":
+            meta_list.append(meta_obj)
+        else:
+            raise Exception("Unable to parse Configuration...")
+    return meta_list
+
+
+def resolve_engine_config(meta_list: list, load_engine=True) -> list:
+    """
+    Replaces the raw engine dicts from `load_meta_list` with EngineConfig objects, or drops them
+    """
+    if not load_engine:
+        return [obj for obj in meta_list if type(obj) is not dict]
+    return [EngineConfig.parse_obj(obj) if type(obj) is dict else obj for obj in meta_list]
+
+
+def load_cached_meta_list(config_file, cache_dir) -> list:
+    """
+    `load_meta_list` of config_file through the on-disk cache. The cache entry is used as is if the file
+    modification time is unchanged, otherwise only if the file content still has the same hash.
+    """
+    config_file = os.path.abspath(config_file)
+    cache_file = os.path.join(cache_dir, hashlib.sha256(config_file.encode()).hexdigest() + ".pkl")
+    stat = os.stat(config_file)
+
+    cached = None
+    if os.path.exists(cache_file):
+        try:
+            with open(cache_file, "rb") as f:
+                cached = pickle.load(f)
+        except Exception:
+            cached = None
+        if cached is not None and cached.get("version") != CACHE_VERSION:
+            cached = None
+    if cached is not None and cached["mtime"] == stat.st_mtime_ns and cached["size"] == stat.st_size:
+        return cached["meta_list"]
+
+    with open(config_file, "rb") as f:
+        content = f.read()
+    sha = hashlib.sha256(content).hexdigest()
+    if cached is not None and cached["sha"] == sha:
+        meta_list = cached["meta_list"]
+    else:
+        meta_list = load_meta_list(content.decode())
+
+    os.makedirs(cache_dir, exist_ok=True)
+    temp_file = f"{cache_file}.{os.getpid()}.tmp"
+    with open(temp_file, "wb") as f:
+        cache_entry = {"version": CACHE_VERSION, "mtime": stat.st_mtime_ns, "size": stat.st_size, "sha": sha}
+        pickle.dump({**cache_entry, "meta_list": meta_list}, f)
+    os.replace(temp_file, cache_file)
+    return meta_list
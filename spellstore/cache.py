@@ -0,0 +1,326 @@
+"""
+On-disk result cache of exports and joins.
+
+Results are stored as parquet files named by a hash of the compiled query, its parameters (snapshot
+date, entity set, entity_df of a join) and the store options. Every entry records freshness probes of
+the groups it read - the max of the event timestamp column and the row count of each table - taken
+before the query runs and checked again once the result is read (a result the groups were written to
+meanwhile isn't cached). Entries are only used while the probes are unchanged. Entries are evicted least recently used first once the
+cache grows past max_bytes.
+
+The cache is enabled by passing `result_cache` to `FeatureStore`, or by setting the
+SPELLSTORE_RESULT_CACHE_DIR environment variable (and optionally SPELLSTORE_RESULT_CACHE_MAX_BYTES).
+pandas, pyarrow and SQLAlchemy are imported when needed, so `spellstore cache` commands start quickly.
+"""
+
+import hashlib
+import json
+import os
+import time
+from datetime import date, datetime
+from typing import Dict, Iterator, List, Optional
+
+RESULT_CACHE_DIR_ENVVAR = "SPELLSTORE_RESULT_CACHE_DIR"
+RESULT_CACHE_MAX_BYTES_ENVVAR = "SPELLSTORE_RESULT_CACHE_MAX_BYTES"
+RESULT_CACHE_VERSION = 1
+DEFAULT_MAX_BYTES = 10 * 1024**3
+
+
+def _to_json_value(value):
+    if hasattr(value, "item") and not isinstance(value, (str, bytes)):
+        value = value.item()
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value if value is None or isinstance(value, (int, float, str, bool)) else str(value)
+
+
+def hash_entities(entity_list) -> Optional[str]:
+    """
+    Order independent hash of an entity set
+    """
+    if entity_list is None:
+        return None
+    values = sorted(set(str(_to_json_value(x)) for x in entity_list))
+    return hashlib.sha256("\n".join(values).encode()).hexdigest()
+
+
+def hash_frame(df) -> str:
+    """
+    Hash of the values, index and columns of a DataFrame, e.g. the entity_df of a join
+    """
+    import pandas as pd
+
+    digest = hashlib.sha256(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    digest.update(json.dumps([str(x) for x in df.columns]).encode())
+    return digest.hexdigest()
+
+
+def get_result_cache(result_cache=None) -> Optional["ResultCache"]:
+    """
+    Resolves the result_cache argument of `FeatureStore`: a ResultCache, a cache directory, None for the
+    cache configured by the environment (if any), or False for no cache
+    """
+    if isinstance(result_cache, ResultCache):
+        return result_cache
+    if result_cache is False:
+        return None
+    if result_cache is None:
+        result_cache = os.environ.get(RESULT_CACHE_DIR_ENVVAR)
+    if not result_cache:
+        return None
+    max_bytes = int(os.environ.get(RESULT_CACHE_MAX_BYTES_ENVVAR, DEFAULT_MAX_BYTES))
+    return ResultCache(result_cache, max_bytes=max_bytes)
+
+
+class ResultCache(object):
+    def __init__(self, cache_dir: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+    def _path(self, key: str, extension: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.{extension}")
+
+    def key(self, engine, **parts) -> str:
+        """
+        Content address of a result: a hash of the database, the compiled query and every parameter
+        """
+        database = engine.url.render_as_string(hide_password=True)
+        payload = {"version": RESULT_CACHE_VERSION, "database": database, **parts}
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, default=_to_json_value).encode()).hexdigest()
+
+    def probe(self, engine, feature_group) -> Dict[str, list]:
+        """
+        Freshness probes of the groups of a feature group: max(event timestamp) and count(*) per table
+        """
+        from sqlalchemy import column, func, select, table
+
+        probes = {}
+        with engine.connect() as conn:
+            for fv in feature_group.feature_views:
+                if fv.event_timestamp_column is None:
+                    query = select(func.count()).select_from(table(fv.name))
+                else:
+                    event_timestamp = column(fv.event_timestamp_column)
+                    query = select(func.max(event_timestamp), func.count()).select_from(table(fv.name, event_timestamp))
+                probes[fv.name] = [_to_json_value(x) for x in conn.execute(query).one()]
+        return probes
+
+    def get_entry(self, key: str) -> Optional[dict]:
+        try:
+            with open(self._path(key, "json")) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return entry if entry.get("version") == RESULT_CACHE_VERSION else None
+
+    def get(self, key: str, probes: Dict[str, list], batch_size: Optional[int] = None) -> Optional[Iterator]:
+        """
+        Iterator over the record batches of a cached result, None if there is no fresh entry. Stale
+        entries are removed.
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        entry = self.get_entry(key)
+        if entry is None:
+            return None
+        if entry["probes"] != probes:
+            self.remove(key)
+            return None
+        try:
+            parquet_file = pq.ParquetFile(self._path(key, "parquet"))
+        except OSError:
+            self.remove(key)
+            return None
+        self._write_entry(key, {**entry, "last_access": time.time()})
+        if parquet_file.metadata.num_rows == 0:
+            # an empty result is still a single (empty) chunk, which carries the columns
+            return iter([pa.RecordBatch.from_pylist([], schema=parquet_file.schema_arrow)])
+        return parquet_file.iter_batches(batch_size=batch_size or 65536)
+
+    def writer(
+        self,
+        key: str,
+        probes: Dict[str, list],
+        preserve_index=False,
+        value_types: Optional[Dict[str, type]] = None,
+        **info,
+    ) -> "ResultWriter":
+        """
+        Writer of a new entry, preserve_index=True keeps the index of the chunks (e.g. of a join)
+        """
+        return ResultWriter(self, key, probes, info, preserve_index, value_types)
+
+    def _write_entry(self, key: str, entry: dict):
+        temp_file = f"{self._path(key, 'json')}.{os.getpid()}.tmp"
+        with open(temp_file, "w") as f:
+            json.dump(entry, f)
+        os.replace(temp_file, self._path(key, "json"))
+
+    def entries(self) -> List[dict]:
+        """
+        Entries of the cache, least recently used first
+        """
+        if not os.path.isdir(self.cache_dir):
+            return []
+        entries = []
+        for file_name in os.listdir(self.cache_dir):
+            if file_name.endswith(".json"):
+                entry = self.get_entry(file_name[: -len(".json")])
+                if entry is not None:
+                    entries.append(entry)
+        return sorted(entries, key=lambda entry: entry["last_access"])
+
+    def size(self) -> int:
+        return sum(entry["num_bytes"] for entry in self.entries())
+
+    def remove(self, key: str):
+        for extension in ["json", "parquet"]:
+            try:
+                os.remove(self._path(key, extension))
+            except FileNotFoundError:
+                pass
+
+    def evict(self, max_bytes: Optional[int] = None) -> List[str]:
+        """
+        Removes least recently used entries until the cache is at most max_bytes (defaults to the
+        cache's), returns the removed keys
+        """
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        entries = self.entries()
+        total = sum(entry["num_bytes"] for entry in entries)
+        removed = []
+        for entry in entries:
+            if total <= max_bytes:
+                break
+            self.remove(entry["key"])
+            total -= entry["num_bytes"]
+            removed.append(entry["key"])
+        return removed
+
+    def clear(self) -> int:
+        """
+        Removes every entry (and leftover temporary files) of the cache, returns the number of entries
+        """
+        if not os.path.isdir(self.cache_dir):
+            return 0
+        entries = self.entries()
+        for entry in entries:
+            self.remove(entry["key"])
+        for file_name in os.listdir(self.cache_dir):
+            if file_name.endswith(".tmp"):
+                os.remove(os.path.join(self.cache_dir, file_name))
+        return len(entries)
+
+    def print_entries(self) -> str:
+        from tabulate import tabulate
+
+        headers = ["key", "kind", "features", "rows", "size (MB)", "created", "last access"]
+        rows = [
+            [
+                entry["key"][:12],
+                entry["kind"],
+                ",".join(entry["feature_list"]),
+                entry["num_rows"],
+                round(entry["num_bytes"] / 1024**2, 2),
+                datetime.fromtimestamp(entry["created_at"]).isoformat(timespec="seconds"),
+                datetime.fromtimestamp(entry["last_access"]).isoformat(timespec="seconds"),
+            ]
+            for entry in reversed(self.entries())
+        ]
+        return tabulate(rows, headers=headers)
+
+
+class ResultWriter(object):
+    """
+    Writes the chunks of a result to a temporary parquet file, which only becomes a cache entry once
+    `commit` is called - a partially consumed result is discarded. Chunks are cast to the schema of
+    the first chunk, whose columns holding only missing values get their type from value_types rather
+    than null (the values of a categorical). If a chunk can't be cast the result is not cached.
+    """
+
+    def __init__(
+        self,
+        cache: ResultCache,
+        key: str,
+        probes: Dict[str, list],
+        info: dict,
+        preserve_index=False,
+        value_types: Optional[Dict[str, type]] = None,
+    ):
+        self.cache = cache
+        self.key = key
+        self.probes = probes
+        self.info = info
+        self.preserve_index = preserve_index
+        self.value_types = {} if value_types is None else value_types
+        self.temp_path = f"{cache._path(key, 'parquet')}.{os.getpid()}.tmp"
+        self.writer = None
+        self.failed = False
+        self.num_rows = 0
+
+    def write(self, chunk):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        from spellbook.writer import arrow_type_from_value_type
+
+        if self.failed:
+            return
+        if isinstance(chunk, pa.RecordBatch):
+            table = pa.Table.from_batches([chunk])
+        else:
+            table = pa.Table.from_pandas(chunk, preserve_index=self.preserve_index)
+        try:
+            if self.writer is None:
+                fields = []
+                for field in table.schema:
+                    arrow_type = arrow_type_from_value_type(self.value_types.get(field.name))
+                    if arrow_type is not None and pa.types.is_null(field.type):
+                        field = pa.field(field.name, arrow_type)
+                    elif (
+                        arrow_type is not None
+                        and pa.types.is_dictionary(field.type)
+                        and pa.types.is_null(field.type.value_type)
+                    ):
+                        # a categorical column (see compact_dtypes) without any categories
+                        field = pa.field(field.name, pa.dictionary(field.type.index_type, arrow_type))
+                    fields.append(field)
+                table = table.cast(pa.schema(fields, metadata=table.schema.metadata))
+                os.makedirs(self.cache.cache_dir, exist_ok=True)
+                self.writer = pq.ParquetWriter(self.temp_path, table.schema)
+            elif table.schema != self.writer.schema:
+                table = table.cast(self.writer.schema)
+            self.writer.write_table(table)
+        except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError, ValueError):
+            self.discard()
+            self.failed = True
+            return
+        self.num_rows += table.num_rows
+
+    def commit(self):
+        if self.failed or self.writer is None:
+            return
+        self.writer.close()
+        self.writer = None
+        os.replace(self.temp_path, self.cache._path(self.key, "parquet"))
+        now = time.time()
+        entry = {
+            "version": RESULT_CACHE_VERSION,
+            "key": self.key,
+            "probes": self.probes,
+            "num_rows": self.num_rows,
+            "num_bytes": os.path.getsize(self.cache._path(self.key, "parquet")),
+            "created_at": now,
+            "last_access": now,
+            **self.info,
+        }
+        self.cache._write_entry(self.key, entry)
+        self.cache.evict()
+
+    def discard(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+        if os.path.exists(self.temp_path):
+            os.remove(self.temp_path)
@@ -1,15 +1,25 @@
+"""
+Command line interface. pandas, numpy and the feature store are imported inside the commands which
+need them, so metadata commands (`spellstore get meta ...`) start up without loading them.
+"""
+
+from contextlib import nullcontext
 from datetime import datetime
 from typing import Optional
 
-import pandas as pd
 import typer
 
-from spellbook import cli_get
+from spellbook import cli_cache, cli_get
 from spellbook.base import RepoConfig
-from spellbook.feature_store import FeatureStore
 
 app = typer.Typer()
 app.add_typer(cli_get.app, name="get")
+app.add_typer(cli_cache.app, name="cache")
+
+
+def profile_trace(fs, profile: str, verbose: bool):
+    # --profile traces the command and dumps the timings as JSON, see spellstore.metrics
+    return fs.trace(progress=verbose) if profile != "" else nullcontext()
 
 
 @app.command()
@@ -18,22 +28,112 @@ def export(
     snapshot_date: Optional[datetime] = None,
     output_file: str = "",
     metadata: str = "",
+    max_workers: int = 1,
+    format: str = "",
+    verbose: bool = False,
+    profile: str = "",
+    snapshot_dates: str = "",
+    partitions: int = 0,
+    page_size: int = 0,
+    checkpoint_file: str = "",
+    limit: int = 0,
+    sample_fraction: float = 0.0,
+    partition_cols: str = "",
 ):
+    from spellbook.feature_store import FeatureStore
+
     typer.echo(f"Loading metadata...{metadata}")
     repo = RepoConfig.parse_yaml_file(metadata)
     fs = FeatureStore(repo)
-    output = fs.export(features.split(","), snapshot_date, output_file)
+    # a comma separated list of columns partitioning a parquet dataset, written as column=value directories
+    partition_col_list = partition_cols.split(",") if partition_cols != "" else None
+    if partitions > 0:
+        if partition_col_list is not None:
+            raise ValueError("Partitioned datasets can't be written as shards of a parallel export")
+        # output_file is the directory of the shards, exported by max_workers processes (one per CPU by default)
+        manifest = fs.parallel_export(
+            features.split(","),
+            output_file,
+            snapshot_date,
+            num_partitions=partitions,
+            max_workers=max_workers if max_workers > 1 else None,
+            output_format=format if format != "" else "parquet",
+        )
+        typer.echo(f"Exported {manifest['num_rows']} rows into {manifest['num_partitions']} shards in {output_file}")
+        return
+    if page_size > 0:
+        # resumable: re-running the same command after a failure continues from the checkpoint
+        summary = fs.resumable_export(
+            features.split(","),
+            output_file,
+            snapshot_date,
+            page_size=page_size,
+            checkpoint_file=checkpoint_file if checkpoint_file != "" else None,
+            output_format=format,
+            partition_cols=partition_col_list,
+        )
+        typer.echo(f"Exported {summary['num_rows']} rows in {summary['pages']} pages to {output_file}")
+        return
+    with profile_trace(fs, profile, verbose) as tracer:
+        output = fs.export(
+            features.split(","),
+            snapshot_date,
+            output_file,
+            verbose=verbose,
+            max_workers=max_workers,
+            output_format=format,
+            snapshot_dates=snapshot_dates if snapshot_dates != "" else None,
+            limit=limit if limit > 0 else None,
+            sample_fraction=sample_fraction if sample_fraction > 0 else None,
+            partition_cols=partition_col_list,
+        )
+    if tracer is not None:
+        tracer.dump(profile)
     typer.echo(output)
 
 
 @app.command()
-def load(input_file: str, group: str = "", metadata: str = "", if_exists: str = "replace"):
+def materialize(
+    group: str = "",
+    snapshot_date: Optional[datetime] = None,
+    output_file: str = "",
+    output_table: str = "",
+    metadata: str = "",
+    format: str = "",
+    full_refresh: bool = False,
+):
+    from spellbook.feature_store import FeatureStore
+
+    repo = RepoConfig.parse_yaml_file(metadata)
+    fs = FeatureStore(repo)
+    output = fs.materialize(
+        group,
+        output_file=output_file if output_file != "" else None,
+        output_table=output_table if output_table != "" else None,
+        snapshot_date=snapshot_date,
+        output_format=format,
+        full_refresh=full_refresh,
+    )
+    typer.echo(f"Materialized {output.shape[0]} rows of {group}")
+
+
+@app.command()
+def load(
+    input_file: str,
+    group: str = "",
+    metadata: str = "",
+    if_exists: str = "replace",
+    chunksize: int = 100000,
+    dedupe: bool = False,
+):
+    from spellbook.loader import load as load_file
+
     if_exists_list = ["replace", "append", "fail"]
     if if_exists not in if_exists_list:
         raise ValueError(f"if_exists must be one of {if_exists_list}")
     repo = RepoConfig.parse_yaml_file(metadata)
-    pd.read_csv(input_file).to_sql(group, con=repo.engine, if_exists=if_exists)
-    return None
+    num_rows = load_file(repo, repo.engine, input_file, group, if_exists, chunksize, dedupe)  # type: ignore
+    typer.echo(f"Loaded {num_rows} rows into {group}")
 
 
 @app.command()
@@ -43,7 +143,17 @@ def join(
     event_timestamp_column: Optional[str] = "",
     features: str = "",
     metadata: str = "",
+    output_file: str = "",
+    max_workers: int = 1,
+    format: str = "",
+    verbose: bool = False,
+    profile: str = "",
+    partition_cols: str = "",
 ):
+    import pandas as pd
+
+    from spellbook.feature_store import FeatureStore
+
     if entity_column == "":
         raise ValueError("Entity column must be provided")
     if event_timestamp_column == "":
@@ -52,8 +162,51 @@ def join(
     entity_df = pd.read_csv(input_file)
     feature_list = features.split(",")
     fs = FeatureStore(repo_config=repo)
-    output = fs.join(entity_df, entity_column, event_timestamp_column, feature_list)
-    typer.echo(output.to_markdown(index=False))
+    with profile_trace(fs, profile, verbose) as tracer:
+        output = fs.join(
+            entity_df,
+            entity_column,
+            event_timestamp_column,
+            feature_list,
+            output_file=output_file if output_file != "" else None,
+            verbose=verbose,
+            max_workers=max_workers,
+            output_format=format,
+            partition_cols=partition_cols.split(",") if partition_cols != "" else None,
+        )
+    if tracer is not None:
+        tracer.dump(profile)
+    if output_file == "":
+        typer.echo(output.to_markdown(index=False))
+
+
+@app.command()
+def index(
+    metadata: str = "",
+    groups: str = "",
+    create: bool = False,
+    explain: bool = False,
+    snapshot_date: Optional[datetime] = None,
+):
+    from spellbook import index as index_advisor
+    from spellbook.feature_store import FeatureStore
+
+    repo = RepoConfig.parse_yaml_file(metadata)
+    group_names = None if groups == "" else groups.split(",")
+    report = index_advisor.check_indexes(repo, repo.engine, group_names)
+    if create:
+        for item in report:
+            if item["table_exists"] and item["index"] is None:
+                item["index"] = index_advisor.create_index(repo.engine, repo.get_group(item["group"]))
+                typer.echo(f"Created index {item['index']} on {item['group']}")
+    typer.echo(index_advisor.print_index_report(report))
+
+    if explain:
+        fs = FeatureStore(repo)
+        for item in report:
+            if item["table_exists"]:
+                typer.echo(f"\n{item['group']}")
+                typer.echo(index_advisor.explain(fs, item["group"], snapshot_date))
 
 
 if __name__ == "__main__":
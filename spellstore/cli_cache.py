@@ -0,0 +1,46 @@
+"""
+Usage:
+
+```console
+python -m spellstore.cli cache ls --cache-dir .spellstore_cache
+python -m spellstore.cli cache clear
+
+```
+
+The cache directory defaults to the SPELLSTORE_RESULT_CACHE_DIR environment variable.
+"""
+
+import os
+
+import typer
+
+from spellbook.cache import RESULT_CACHE_DIR_ENVVAR, ResultCache
+
+app = typer.Typer()
+
+
+def get_cache(cache_dir: str) -> ResultCache:
+    cache_dir = cache_dir if cache_dir != "" else os.environ.get(RESULT_CACHE_DIR_ENVVAR, "")
+    if cache_dir == "":
+        raise typer.BadParameter(f"Provide --cache-dir or set {RESULT_CACHE_DIR_ENVVAR}")
+    return ResultCache(cache_dir)
+
+
+@app.command()
+def ls(cache_dir: str = ""):
+    cache = get_cache(cache_dir)
+    typer.echo(cache.print_entries())
+    typer.echo(f"{len(cache.entries())} entries, {round(cache.size() / 1024**2, 2)} MB in {cache.cache_dir}")
+
+
+@app.command()
+def clear(cache_dir: str = "", max_bytes: int = -1):
+    """
+    Removes every entry, or with --max-bytes only the least recently used entries above that size
+    """
+    cache = get_cache(cache_dir)
+    if max_bytes >= 0:
+        num_removed = len(cache.evict(max_bytes))
+    else:
+        num_removed = cache.clear()
+    typer.echo(f"Removed {num_removed} entries from {cache.cache_dir}")
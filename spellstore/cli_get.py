@@ -10,7 +10,7 @@ python -m spellstore.cli get meta entity --config config.yml
 
 import typer
 
-from spellstore.base import RepoConfig
+from spellbook.base import RepoConfig
 
 app = typer.Typer()
 meta_app = typer.Typer()
@@ -19,23 +19,23 @@ app.add_typer(meta_app, name="meta")
 
 @meta_app.command()
 def all(metadata: str = ""):
-    repo = RepoConfig.parse_yaml_file(metadata)
+    repo = RepoConfig.parse_yaml_file(metadata, load_engine=False)
     typer.echo(repo.print_meta())
 
 
 @meta_app.command()
 def entity(metadata: str = ""):
-    repo = RepoConfig.parse_yaml_file(metadata)
+    repo = RepoConfig.parse_yaml_file(metadata, load_engine=False)
     typer.echo(repo.print_entity())
 
 
 @meta_app.command()
 def feature(metadata: str = ""):
-    repo = RepoConfig.parse_yaml_file(metadata)
+    repo = RepoConfig.parse_yaml_file(metadata, load_engine=False)
     typer.echo(repo.print_feature())
 
 
 @meta_app.command()
 def group(metadata: str = ""):
-    repo = RepoConfig.parse_yaml_file(metadata)
+    repo = RepoConfig.parse_yaml_file(metadata, load_engine=False)
     typer.echo(repo.print_group())
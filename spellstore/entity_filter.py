@@ -0,0 +1,213 @@
+"""
+Strategies for restricting feature view queries to a set of entities.
+
+Small entity sets are bound as an `IN (...)` list. Larger sets are either uploaded to a
+session scoped temporary table, or inlined as a `VALUES` list where the dialect supports it,
+and the queries semi-join against them, so the entity set does not have to be split into
+batches that fit the driver's bind parameter limit.
+
+An `EntityPredicate` instead restricts queries to a slice of the entity space by a predicate on the
+entity column: an `EntityPartition`, so a large export can be split into independent queries (see
+`spellstore.parallel`), or an `EntityPage` of keyset pagination (see `spellstore.resumable`).
+
+`entity_sample_condition` keeps a deterministic sample of the entities, selected by a hash of the entity.
+"""
+
+import zlib
+from contextlib import contextmanager
+from typing import Literal, Optional
+
+import pandas as pd
+from pandas.api.types import is_integer
+from sqlalchemy import Integer, String, and_, column, event, func, values
+
+from spellbook.util import create_temp_table
+
+EntityFilterStrategy = Literal["auto", "in", "values", "temp_table"]
+
+ENTITY_FILTER_TABLE = "spellstore_entity_filter"
+ENTITY_FILTER_COLUMN = "entity"
+
+# most drivers accept at least this many bind parameters (the historic SQLite limit)
+IN_LIST_MAX_SIZE = 999
+
+VALUES_DIALECTS = ["postgresql"]
+TEMP_TABLE_DIALECTS = ["sqlite", "postgresql", "mysql", "mariadb", "duckdb"]
+
+SQLITE_HASH_FUNCTION = "spellstore_hash"
+HASH_FUNCTIONS = {
+    "postgresql": "hashtext",
+    "duckdb": "hash",
+    "mysql": "crc32",
+    "mariadb": "crc32",
+    "sqlite": SQLITE_HASH_FUNCTION,
+}
+
+# samples are drawn in steps of 1 / SAMPLE_BUCKETS of the entities
+SAMPLE_BUCKETS = 10000
+# integer entities are scrambled by a multiplier coprime to SAMPLE_BUCKETS, so a sample of sequential
+# ids is spread over the whole id range (small enough not to overflow 64 bit ids below ~10^15)
+SAMPLE_MULTIPLIER = 7919
+
+
+def choose_entity_filter(engine, num_entities: int, strategy: EntityFilterStrategy = "auto") -> str:
+    """
+    Resolves the "auto" strategy by entity count and dialect, "in" is returned for dialects
+    without a supported alternative, in which case the caller has to batch the entity list.
+    """
+    if strategy not in ["auto", "in", "values", "temp_table"]:
+        raise ValueError(f"entity_filter must be one of (auto, in, values, temp_table) - got: {strategy}.")
+    if strategy != "auto":
+        return strategy
+    if num_entities <= IN_LIST_MAX_SIZE:
+        return "in"
+    if engine.dialect.name in VALUES_DIALECTS:
+        return "values"
+    if engine.dialect.name in TEMP_TABLE_DIALECTS:
+        return "temp_table"
+    return "in"
+
+
+def entity_values(entity_list):
+    """
+    VALUES list of the entities with literal values, so the statement carries no bind parameters
+    """
+    entity_list = list(entity_list)
+    value_type = Integer if len(entity_list) > 0 and is_integer(entity_list[0]) else String
+    return values(column(ENTITY_FILTER_COLUMN, value_type), name=ENTITY_FILTER_TABLE, literal_binds=True).data(
+        [(e,) for e in entity_list]
+    )
+
+
+@contextmanager
+def entity_filter_table(conn, entity_list):
+    """
+    Uploads the entities to a temporary table on conn for the duration of the block. Queries
+    filtering on it must be executed on the same connection.
+    """
+    entity_df = pd.DataFrame({ENTITY_FILTER_COLUMN: pd.Series(list(entity_list)).drop_duplicates()})
+    entity_table = create_temp_table(conn, ENTITY_FILTER_TABLE, entity_df)
+    try:
+        yield entity_table
+    finally:
+        entity_table.drop(conn)
+
+
+def _crc32(value):
+    return None if value is None else zlib.crc32(str(value).encode("utf-8"))
+
+
+def _create_sqlite_hash_function(dbapi_connection, connection_record, *args):
+    dbapi_connection.create_function(SQLITE_HASH_FUNCTION, 1, _crc32, deterministic=True)
+
+
+def register_hash_function(engine):
+    """
+    SQLite has no hash function, so one is registered on every connection checked out from the engine
+    """
+    if engine.dialect.name == "sqlite" and not event.contains(engine, "checkout", _create_sqlite_hash_function):
+        event.listen(engine, "checkout", _create_sqlite_hash_function)
+
+
+def get_hash_function(engine) -> str:
+    dialect = engine.dialect.name
+    if dialect not in HASH_FUNCTIONS:
+        raise ValueError(f"No hash function known for {dialect}.")
+    register_hash_function(engine)
+    return HASH_FUNCTIONS[dialect]
+
+
+def hash_bucket(entity, num_buckets: int, hash_function: Optional[str] = None):
+    """
+    `mod(hash_function(entity), num_buckets)`, of the entity itself if hash_function is None
+    """
+    value = entity if hash_function is None else getattr(func, hash_function)(entity)
+    # the sign of mod() follows the dividend in most databases, so negative hashes are shifted
+    return ((value % num_buckets) + num_buckets) % num_buckets
+
+
+def entity_sample_condition(entity, sample_fraction: float, hash_function: Optional[str] = None):
+    """
+    Keeps about sample_fraction of the entities, the same ones in every view and query. Integer
+    entities (hash_function None) are sampled by a multiplicative scramble of the id.
+    """
+    if hash_function is None:
+        entity = entity * SAMPLE_MULTIPLIER
+    return hash_bucket(entity, SAMPLE_BUCKETS, hash_function) < round(sample_fraction * SAMPLE_BUCKETS)
+
+
+class EntityPredicate(object):
+    """
+    Restricts feature view queries to the entities matching `condition(entity_column)`
+    """
+
+    def condition(self, entity):
+        raise NotImplementedError
+
+    def to_dict(self) -> dict:
+        raise NotImplementedError
+
+
+class EntityPartition(EntityPredicate):
+    """
+    Partition index of num_partitions over the entity space. Hash partitions hold the entities with
+    `mod(hash_function(entity), num_partitions) = index` (the entity itself is used when hash_function
+    is None, i.e. for integer entities), range partitions the entities with `lower <= entity < upper`,
+    or `<= upper` for the last partition.
+    """
+
+    def __init__(
+        self,
+        index: int,
+        num_partitions: int,
+        kind: Literal["hash", "range"] = "hash",
+        hash_function: Optional[str] = None,
+        lower=None,
+        upper=None,
+    ):
+        if kind not in ["hash", "range"]:
+            raise ValueError(f"Partition kind must be one of (hash, range) - got: {kind}.")
+        self.index = index
+        self.num_partitions = num_partitions
+        self.kind = kind
+        self.hash_function = hash_function
+        self.lower = lower
+        self.upper = upper
+
+    @property
+    def is_last(self):
+        return self.index == self.num_partitions - 1
+
+    def condition(self, entity):
+        if self.kind == "range":
+            upper = entity <= self.upper if self.is_last else entity < self.upper
+            return and_(entity >= self.lower, upper)
+        return hash_bucket(entity, self.num_partitions, self.hash_function) == self.index
+
+    def to_dict(self):
+        return {
+            "index": self.index,
+            "kind": self.kind,
+            "hash_function": self.hash_function,
+            "lower": self.lower,
+            "upper": self.upper,
+        }
+
+
+class EntityPage(EntityPredicate):
+    """
+    Page of a keyset pagination over the ordered entity keys: `lower < entity <= upper`, without a
+    lower bound for the first page.
+    """
+
+    def __init__(self, lower=None, upper=None):
+        self.lower = lower
+        self.upper = upper
+
+    def condition(self, entity):
+        if self.lower is None:
+            return entity <= self.upper
+        return and_(entity > self.lower, entity <= self.upper)
+
+    def to_dict(self):
+        return {"lower": self.lower, "upper": self.upper}
@@ -3,29 +3,106 @@ Exports Historical Feature Group to file.
 """
 
 
-import os.path
+import re
+import threading
+import uuid
+from collections import OrderedDict
+from contextlib import ExitStack, nullcontext
 from datetime import datetime, timedelta
-from typing import List, Optional, Union
+from typing import TYPE_CHECKING, Dict, List, Literal, Optional, Union
 
 import numpy as np
 import pandas as pd
+from pandas.api.types import is_datetime64_any_dtype
 from pydantic import BaseModel
-from sqlalchemy import and_, column, func, or_, table
+from sqlalchemy import and_, bindparam, column, func, select, table
 from sqlalchemy.engine.base import Engine
-from sqlalchemy.orm import scoped_session, sessionmaker
+from sqlalchemy.orm import Session, scoped_session, sessionmaker
+from sqlalchemy.sql.expression import FromClause, Values
 
+from spellbook.arrow import FetchBackend, fetch_record_batch, iter_record_batches, read_sql, to_pandas
 from spellbook.base import RepoConfig
-from spellbook.util import infer_ttl_field
+from spellbook.cache import ResultCache, get_result_cache, hash_entities, hash_frame
+from spellbook.entity_filter import (
+    EntityFilterStrategy,
+    EntityPredicate,
+    choose_entity_filter,
+    entity_filter_table,
+    entity_sample_condition,
+    entity_values,
+    get_hash_function,
+)
+from spellbook.metrics import NULL_TRACER
+from spellbook.strategy import QueryStrategy, QueryStrategyName, choose_query_strategy
+from spellbook.util import (
+    apply_dtypes,
+    concat_frames,
+    create_temp_table,
+    infer_ttl_field,
+    infer_ttl_series,
+    limit_chunks,
+    missing_as_nan,
+    ordered_map,
+    pandas_dtype_from_value_type,
+    parse_snapshot_dates,
+    to_record_batch,
+)
+from spellbook.writer import ArrowWriter, OutputFormat, get_writer
+
+if TYPE_CHECKING:
+    from spellbook.online import OnlineStore
 
 
 class FeatureStore(object):
-    def __init__(self, repo_config: RepoConfig, engine: Optional[Engine] = None, full_join=False, use_safe=False):
+    def __init__(
+        self,
+        repo_config: RepoConfig,
+        engine: Optional[Engine] = None,
+        full_join=False,
+        use_safe=False,
+        entity_filter: EntityFilterStrategy = "auto",
+        query_strategy: QueryStrategyName = "auto",
+        compact_dtypes=False,
+        fetch_backend: FetchBackend = "pandas",
+        result_cache: Optional[Union[ResultCache, str, bool]] = None,
+    ):
+        """
+        query_strategy picks the SQL construct for the latest row per entity and point-in-time joins,
+        by default the cheapest one the engine's dialect supports, see `spellstore.strategy`.
+        use_safe=True is the same as query_strategy="group_by" for databases without window functions.
+
+        compact_dtypes=True converts fetched chunks to compact dtypes derived from the declared value
+        types (see `get_dtypes`), rather than the object/int64/float64 columns pandas reads.
+
+        fetch_backend="arrow" converts cursor batches straight into typed Arrow record batches rather
+        than going through `pd.read_sql_query`, exports to columnar formats write them as-is, see
+        `spellstore.arrow`.
+
+        result_cache (a `ResultCache` or a directory) caches the results of exports and joins on disk,
+        by default the cache configured by the SPELLSTORE_RESULT_CACHE_DIR environment variable if set.
+        result_cache=False disables it regardless of the environment.
+        """
         self.repo_config = repo_config
         self.engine = repo_config.engine if engine is None else engine
         self.full_join = full_join
         self.use_safe = use_safe
+        self.entity_filter = entity_filter
+        self.query_strategy = query_strategy
+        self.compact_dtypes = compact_dtypes
+        self.fetch_backend = fetch_backend
+        self.result_cache = get_result_cache(result_cache)
+        self.online_store: Optional["OnlineStore"] = None
+        self.tracer = NULL_TRACER
 
-    def get_feature_group(self, feature_list: List[str]):
+    def get_feature_group(self, feature_list: List[str], sample_fraction: Optional[float] = None):
+        """
+        sample_fraction restricts every feature view to the same deterministic sample of the entities,
+        selected by a hash of the entity (see `entity_filter.entity_sample_condition`).
+        """
+        self.repo_config.validate_feature_list(feature_list)
+        if sample_fraction is not None and not 0 < sample_fraction <= 1:
+            raise ValueError(f"sample_fraction must be in (0, 1] - got: {sample_fraction}.")
+        entity_types = {e.name: e.value_type for e in self.repo_config.entities}
         table_col_dict = {}  # type: ignore
         table_ordered = []
         feature_views = []
@@ -36,15 +113,171 @@ class FeatureStore(object):
                 table_ordered.append(tbl)
 
         for tbl in table_ordered:
-            event_col = self.repo_config.get_attr_from_group_name(tbl, "event_timestamp_column")
-            entity_col = self.repo_config.get_attr_from_group_name(tbl, "entity")
+            group = self.repo_config.get_group(tbl)
+            sample_hash_function = None
+            if sample_fraction is not None and entity_types.get(group.entity) is not int:
+                sample_hash_function = get_hash_function(self.engine)
             feature_views.append(
                 FeatureView(
-                    name=tbl, columns=table_col_dict[tbl], entity_column=entity_col, event_timestamp_column=event_col
+                    name=tbl,
+                    columns=table_col_dict[tbl],
+                    entity_column=group.entity,
+                    event_timestamp_column=group.event_timestamp_column,
+                    create_timestamp_column=group.create_timestamp_column,
+                    sample_fraction=sample_fraction,
+                    sample_hash_function=sample_hash_function,
                 )
             )
 
-        return FeatureGroup(feature_views=feature_views, full_join=self.full_join, use_safe=self.use_safe)
+        return FeatureGroup(
+            feature_views=feature_views,
+            full_join=self.full_join,
+            use_safe=self.use_safe,
+            query_strategy=self.query_strategy,
+        )
+
+    def get_value_types(self, feature_list: List[str]):
+        """
+        Declared value types of the entity and feature columns of the feature list, used to derive
+        output schemas.
+        """
+        entity_types = {e.name: e.value_type for e in self.repo_config.entities}
+        value_types = {}
+        for tbl_col in feature_list:
+            tbl, col = tbl_col.rsplit(".", 1)
+            group = self.repo_config.get_group(tbl)
+            if entity_types.get(group.entity) is not None:
+                value_types[group.entity] = entity_types[group.entity]
+            for f in group.features:
+                if f.name == col:
+                    value_types[col] = f.value_type
+        return value_types
+
+    def get_feature_group_value_types(self, feature_group):
+        feature_list = [f"{fv.name}.{col}" for fv in feature_group.feature_views for col in fv.columns]
+        return self.get_value_types(feature_list)
+
+    def get_dtypes(self, feature_group) -> Dict[str, str]:
+        """
+        dtype plan of the entity and feature columns of a feature group, empty unless compact_dtypes is set
+        """
+        if not self.compact_dtypes:
+            return {}
+        entity_columns = [fv.entity_column for fv in feature_group.feature_views]
+        dtypes = {}
+        for col, value_type in self.get_feature_group_value_types(feature_group).items():
+            dtype = pandas_dtype_from_value_type(value_type, is_entity=col in entity_columns)
+            if dtype is not None:
+                dtypes[col] = dtype
+        return dtypes
+
+    def get_online_features(self, feature_list: List[str], entity_ids: list):
+        """
+        Latest feature values for a handful of entities, served through the in-process cache of
+        `self.online_store` (an `OnlineStore` with default settings unless one was assigned).
+        """
+        if self.online_store is None:
+            from spellbook.online import OnlineStore
+
+            self.online_store = OnlineStore(self)
+        return self.online_store.get_online_features(feature_list, entity_ids)
+
+    def materialize(
+        self,
+        group_name: str,
+        output_file: Optional[str] = None,
+        output_table: Optional[str] = None,
+        snapshot_date: Optional[datetime] = None,
+        output_format: Optional[OutputFormat] = None,
+        full_refresh=False,
+    ):
+        """
+        Writes the latest row per entity of a group as of snapshot_date to output_file or output_table.
+        Subsequent runs only scan rows newer than the snapshot's watermark, see `spellstore.materialize`.
+        """
+        from spellbook.materialize import materialize
+
+        return materialize(self, group_name, output_file, output_table, snapshot_date, output_format, full_refresh)
+
+    def parallel_export(
+        self,
+        feature_list: List[str],
+        output_dir: str,
+        snapshot_date: Optional[datetime] = None,
+        num_partitions: Optional[int] = None,
+        partition_by: Literal["auto", "hash", "range"] = "auto",
+        max_workers: Optional[int] = None,
+        output_format="parquet",
+        chunksize=10000,
+    ):
+        """
+        Exports the feature group as shards of entity partitions in output_dir, each exported by a separate
+        process, and returns the manifest of the shards, see `spellstore.parallel`.
+        """
+        from spellbook.parallel import parallel_export
+
+        return parallel_export(
+            self,
+            feature_list,
+            output_dir,
+            snapshot_date,
+            num_partitions,
+            partition_by,
+            max_workers,
+            output_format,
+            chunksize,
+        )
+
+    def resumable_export(
+        self,
+        feature_list: List[str],
+        output_file: str,
+        snapshot_date: Optional[datetime] = None,
+        page_size=100000,
+        checkpoint_file: Optional[str] = None,
+        output_format: Optional[OutputFormat] = None,
+        max_retries=3,
+        partition_cols: Optional[List[str]] = None,
+    ):
+        """
+        Exports the feature group in pages of page_size entities (keyset pagination on the entity column),
+        recording every completed page in a checkpoint so an interrupted export resumes after the last
+        one, see `spellstore.resumable`.
+        """
+        from spellbook.resumable import resumable_export
+
+        return resumable_export(
+            self,
+            feature_list,
+            output_file,
+            snapshot_date,
+            page_size=page_size,
+            checkpoint_file=checkpoint_file,
+            output_format=output_format,
+            max_retries=max_retries,
+            partition_cols=partition_cols,
+        )
+
+    def trace(self, callback=None, progress=False):
+        """
+        Context manager recording per-stage timings, row/byte counts and queries of every export
+        and join within the block, see `spellstore.metrics`. Yields the `Tracer`.
+        """
+        from spellbook.metrics import trace
+
+        return trace(self, callback, progress)
+
+    def _verbose_trace(self, verbose=False):
+        # verbose shows a progress bar, unless the caller is already tracing
+        return self.trace(progress=True) if verbose and not self.tracer.enabled else nullcontext()
+
+    def load(self, input_file: str, group_name: str, if_exists="replace", chunksize=100000, dedupe=False):
+        """
+        Bulk loads a csv or parquet file into the table of a group in chunks, see `spellstore.loader`.
+        """
+        from spellbook.loader import load
+
+        return load(self.repo_config, self.engine, input_file, group_name, if_exists, chunksize, dedupe)
 
     def export(
         self,
@@ -57,35 +290,313 @@ class FeatureStore(object):
         force_fetch_all=False,
         force_append=False,
         verbose=False,
+        max_workers: Optional[int] = None,
+        output_format: Optional[OutputFormat] = None,
+        snapshot_dates: Optional[Union[str, List[datetime]]] = None,
+        sample_fraction: Optional[float] = None,
+        partition_cols: Optional[List[str]] = None,
     ):
+        """
+        When an entity_list and max_workers > 1 are provided, the entity list is split into slices
+        which are queried concurrently on pooled connections, and written out in order.
+
+        limit and sample_fraction cut down exports for development, see `iter_export`.
+
+        snapshot_dates (a list of dates, or a range such as `2024-01-01..2024-12-01/monthly`) exports
+        every snapshot from a single scan of the history, with rows tagged by a `snapshot_date` column.
+
+        The output format (csv, parquet, feather or a parquet dataset directory) is inferred from
+        the output_file extension unless output_format is provided. partition_cols writes a parquet
+        dataset partitioned by those columns.
+
+        verbose=True shows a progress bar of the exported rows.
+        """
+        with self._verbose_trace(verbose):
+            output = ""
+            writer = None
+            if output_file is not None and output_file != "":
+                value_types = self.get_value_types(feature_list)
+                writer = get_writer(output_file, output_format, value_types, force_append, partition_cols)
+            # record batches of the arrow backend are handed to columnar writers without a pandas round trip
+            as_arrow = self.fetch_backend == "arrow" and isinstance(writer, ArrowWriter) and not force_fetch_all
+            chunks = self.iter_export(
+                feature_list,
+                snapshot_date,
+                entity_list=entity_list,
+                batch_size=chunksize,
+                max_workers=max_workers,
+                as_arrow=as_arrow,
+                snapshot_dates=snapshot_dates,
+                limit=limit,
+                sample_fraction=sample_fraction,
+            )
+
+            if not force_fetch_all:
+                for chunk_df in chunks:
+                    if output == "":
+                        output = (to_pandas(chunk_df) if as_arrow else chunk_df).to_markdown(index=False)
+
+                    if writer is not None:
+                        with self.tracer.stage("write"):
+                            writer.write(chunk_df)
+                    else:
+                        break
+            else:
+                df = concat_frames(chunks)
+                output = df.to_markdown(index=False)
+                if writer is not None:
+                    with self.tracer.stage("write"):
+                        writer.write(df)
+            if writer is not None:
+                with self.tracer.stage("write"):
+                    writer.close()
+            return output
+
+    def iter_export(
+        self,
+        feature_list: List[str],
+        snapshot_date: Optional[datetime] = None,
+        entity_list=None,
+        batch_size=10000,
+        max_workers: Optional[int] = None,
+        as_arrow=False,
+        snapshot_dates: Optional[Union[str, List[datetime]]] = None,
+        limit: Optional[int] = None,
+        sample_fraction: Optional[float] = None,
+    ):
+        """
+        Generator over the exported feature group, yielding DataFrames (or pyarrow RecordBatches
+        if as_arrow=True) of at most batch_size rows read from a server-side cursor, so arbitrarily
+        large snapshots can be consumed with bounded memory.
+
+        limit caps the number of rows, pushed into the query as a LIMIT clause (the snapshot_dates and
+        entity slices of max_workers are cut client side). sample_fraction exports a deterministic sample
+        of the entities, filtered inside every feature view before ranking and joining.
+
+        If snapshot_dates are provided, every snapshot is built from a single history scan instead,
+        see `_iter_snapshots`.
+
+        Exports as of a given snapshot_date (or snapshot_dates) are served from the result cache if
+        one is configured, see `_iter_cached`.
+        """
+        if snapshot_dates is not None and snapshot_date is not None:
+            raise ValueError("Provide either snapshot_date or snapshot_dates, not both")
+        # exports as of now are never repeated, so only exports as of given dates are cached
+        use_cache = self.result_cache is not None and (snapshot_date is not None or snapshot_dates is not None)
         if snapshot_date is None:
             snapshot_date = datetime.now()
 
-        feature_group = self.get_feature_group(feature_list)
-        query = feature_group.build_query(self.engine, snapshot_date=snapshot_date, entity_list=entity_list)
-        output = ""
-
-        header = True if not force_append else False
-        if not force_fetch_all:
-            # do something like - should add tqdm
-            conn = self.engine.connect().execution_options(stream_results=True)  # type: ignore
-            for chunk_df in pd.read_sql_query(query.statement, conn, chunksize=chunksize):
-                if header:
-                    output = chunk_df.to_markdown(index=False)
-
-                if output_file is not None and output_file != "":
-                    chunk_df.to_csv(output_file, mode="a", header=header)
-                else:
-                    break
-                header = False
+        if entity_list is not None:
+            entity_list = list(entity_list)
+        strategy = self.get_entity_filter(entity_list)
+
+        if snapshot_dates is not None:
+            feature_group = self.get_feature_group(feature_list, sample_fraction)
+            chunks = self._iter_snapshots(feature_group, snapshot_dates, entity_list, batch_size, strategy)
+        elif strategy == "in" and entity_list is not None and max_workers is not None and max_workers > 1:
+            num_splits = (len(entity_list) // 999) + 1
+            entity_list_splits = np.array_split(entity_list, num_splits)
+
+            def fetch_entity_slice(elist):
+                feature_group = self.get_feature_group(feature_list, sample_fraction)
+                with self.tracer.stage("query_build"):
+                    query = feature_group.build_query(self.engine, snapshot_date=snapshot_date, entity_list=elist)
+                with self.tracer.stage("fetch"):
+                    value_types = self.get_feature_group_value_types(feature_group)
+                    df = read_sql(query.statement, self.engine, self.fetch_backend, value_types)
+                    return apply_dtypes(df, self.get_dtypes(feature_group))
+
+            chunks = ordered_map(fetch_entity_slice, entity_list_splits, max_workers)
         else:
-            df = pd.read_sql_query(query.statement, self.engine)
-            output = df.to_markdown(index=False)
-            if output_file is not None and output_file != "":
-                output_mode = "a" if force_append else "w"
+            feature_group = self.get_feature_group(feature_list, sample_fraction)
+            chunks = self._iter_feature_group(
+                feature_group, snapshot_date, entity_list, batch_size, strategy, as_arrow=as_arrow, limit=limit
+            )
+        chunks = limit_chunks(chunks, limit)
+
+        if use_cache:
+            feature_group = self.get_feature_group(feature_list, sample_fraction)
+            query = feature_group.build_query(self.engine, snapshot_date=snapshot_date)
+            key_parts = {
+                "query": str(query.statement.compile(self.engine)),
+                "snapshot_date": None if snapshot_dates is not None else snapshot_date,
+                "snapshot_dates": snapshot_dates,
+                "entities": hash_entities(entity_list),
+                "limit": limit,
+                "sample_fraction": sample_fraction,
+            }
+            chunks = self._iter_cached(chunks, feature_group, "export", feature_list, key_parts, batch_size, as_arrow)
+
+        for chunk_df in chunks:
+            self.tracer.record_chunk(chunk_df)
+            yield to_record_batch(chunk_df) if as_arrow and isinstance(chunk_df, pd.DataFrame) else chunk_df
+
+    def _iter_cached(
+        self,
+        chunks,
+        feature_group,
+        kind,
+        feature_list,
+        key_parts,
+        batch_size=None,
+        as_arrow=False,
+        merged=False,
+    ):
+        """
+        Serves the result keyed by key_parts from the result cache if it has an entry whose freshness
+        probes still match, otherwise passes chunks through, caching them once they are fully consumed
+        if the probes are unchanged by then.
+        The index of join chunks (that of entity_df) is cached with them.
+
+        Cached DataFrames get the dtypes of a fresh result: the dtype plan is applied (to the feature
+        columns of a join, its entity columns come from entity_df), and if the chunks were merged in
+        pandas (merged=True), missing feature values are NaN rather than parquet's None.
+        """
+        key_parts = {
+            **key_parts,
+            "kind": kind,
+            "full_join": self.full_join,
+            "query_strategy": feature_group.get_query_strategy(self.engine).name,
+            "compact_dtypes": self.compact_dtypes,
+            "fetch_backend": self.fetch_backend,
+        }
+        key = self.result_cache.key(self.engine, **key_parts)
+        probes = self.result_cache.probe(self.engine, feature_group)
+        value_types = self.get_feature_group_value_types(feature_group)
+        batches = self.result_cache.get(key, probes, batch_size)
+        if batches is not None:
+            entity_columns = [fv.entity_column for fv in feature_group.feature_views]
+            dtypes = self.get_dtypes(feature_group)
+            if kind == "join":
+                dtypes = {col: dtype for col, dtype in dtypes.items() if col not in entity_columns}
+            nan_columns = [col for col in value_types if col not in entity_columns] if merged else []
+            for batch in self.tracer.iter_chunks(batches):
+                if as_arrow:
+                    yield batch
+                else:
+                    yield missing_as_nan(apply_dtypes(to_pandas(batch), dtypes), nan_columns)
+            return
+
+        preserve_index = kind == "join"
+        writer = self.result_cache.writer(
+            key, probes, preserve_index, value_types, kind=kind, feature_list=feature_list
+        )
+        try:
+            for chunk_df in chunks:
+                writer.write(chunk_df)
+                yield chunk_df
+        except BaseException:
+            # includes the GeneratorExit of a partially consumed result, which isn't cached
+            writer.discard()
+            raise
+        if self.result_cache.probe(self.engine, feature_group) != probes:
+            # the groups were written to while the result was read, it isn't known which rows it holds
+            writer.discard()
+            return
+        writer.commit()
+
+    def get_entity_filter(self, entity_list=None) -> str:
+        """
+        How a query is restricted to entity_list, one of "in", "values" or "temp_table"
+        """
+        if entity_list is None:
+            return "in"
+        return choose_entity_filter(self.engine, len(entity_list), self.entity_filter)
+
+    def _iter_feature_group(
+        self,
+        feature_group,
+        snapshot_date=None,
+        entity_list=None,
+        batch_size=10000,
+        strategy: Optional[str] = None,
+        as_arrow=False,
+        limit: Optional[int] = None,
+    ):
+        """
+        Streams the feature group as of snapshot_date in chunks of batch_size rows (or a single DataFrame
+        if batch_size is None), semi-joining against a VALUES list or a temporary table of the entities
+        rather than binding them as an IN list, depending on the entity filter strategy.
+
+        With the arrow fetch backend, as_arrow=True yields the fetched record batches as they are.
+        """
+        if strategy is None:
+            strategy = self.get_entity_filter(entity_list)
+        dtypes = self.get_dtypes(feature_group)
+        value_types = self.get_feature_group_value_types(feature_group)
+        as_arrow = as_arrow and self.fetch_backend == "arrow"
+        with self.engine.connect() as conn, ExitStack() as stack:  # type: ignore
+            if strategy == "temp_table":
+                entity_list = stack.enter_context(entity_filter_table(conn, entity_list))
+            elif strategy == "values":
+                entity_list = entity_values(entity_list)
+            with self.tracer.stage("query_build"):
+                query = feature_group.build_query(
+                    self.engine, snapshot_date=snapshot_date, entity_list=entity_list, limit=limit
+                )
+            if as_arrow and batch_size is None:
+                with self.tracer.stage("fetch"):
+                    batch = fetch_record_batch(query.statement, conn, value_types)
+                yield batch
+                return
+            if as_arrow:
+                yield from self.tracer.iter_chunks(iter_record_batches(query.statement, conn, value_types, batch_size))
+                return
+            if batch_size is None:
+                with self.tracer.stage("fetch"):
+                    df = apply_dtypes(read_sql(query.statement, conn, self.fetch_backend, value_types), dtypes)
+                yield df
+                return
+            conn = conn.execution_options(stream_results=True)
+            chunks = read_sql(query.statement, conn, self.fetch_backend, value_types, chunksize=batch_size)
+            for chunk_df in self.tracer.iter_chunks(chunks):
+                yield apply_dtypes(chunk_df, dtypes)
+
+    def _iter_snapshots(
+        self, feature_group, snapshot_dates, entity_list=None, batch_size=10000, strategy: Optional[str] = None
+    ):
+        """
+        Streams every snapshot of the feature group as of snapshot_dates. Rather than one ranked query
+        per snapshot, the history of each feature view up to the last snapshot (and back to the ttl of
+        the first) is scanned once and resolved in memory by `snapshot_sweep`, so the history must fit
+        in memory - restrict it with entity_list if it does not.
+        """
+        if isinstance(snapshot_dates, str):
+            snapshot_dates = parse_snapshot_dates(snapshot_dates)
+        snapshot_dates = sorted(set(_to_python_scalar(x) for x in snapshot_dates))
+        if len(snapshot_dates) == 0:
+            raise ValueError("snapshot_dates must contain at least one date")
+        if strategy is None:
+            strategy = self.get_entity_filter(entity_list)
+
+        history_dfs = []
+        value_types = self.get_feature_group_value_types(feature_group)
+        with self.engine.connect() as conn, ExitStack() as stack:  # type: ignore
+            if strategy == "temp_table":
+                entity_list = stack.enter_context(entity_filter_table(conn, entity_list))
+            elif strategy == "values":
+                entity_list = entity_values(entity_list)
+            for fv in feature_group.feature_views:
+                with self.tracer.stage("query_build"):
+                    query = fv.build_history_subquery(
+                        conn,
+                        entity_list=entity_list,
+                        start_date=infer_ttl_field(snapshot_dates[0], fv.ttl),
+                        end_date=snapshot_dates[-1],
+                        is_subquery=False,
+                    )
+                with self.tracer.stage("fetch"):
+                    history_dfs.append(read_sql(query.statement, conn, self.fetch_backend, value_types))
 
-                df.to_csv(output_file, mode=output_mode, header=header)
-        return output
+        with self.tracer.stage("merge"):
+            snapshot_df = apply_dtypes(
+                snapshot_sweep(feature_group, history_dfs, snapshot_dates), self.get_dtypes(feature_group)
+            )
+        if batch_size is None:
+            yield snapshot_df
+            return
+        for start in range(0, max(snapshot_df.shape[0], 1), batch_size):
+            yield snapshot_df.iloc[start : start + batch_size]
 
     def join(
         self,
@@ -100,90 +611,441 @@ class FeatureStore(object):
         force_fetch_all=False,
         force_append=False,
         verbose=False,
+        strategy: Literal["query", "temp_table", "asof"] = "query",
+        max_workers: Optional[int] = None,
+        output_format: Optional[OutputFormat] = None,
+        partition_cols: Optional[List[str]] = None,
     ):
         """
         If snapshot date is provided, will just filter based on snapshot date + entity list,
         otherwise will attempt to group by entity_df + event_timestamp, and chunk it down.
+
+        strategy="temp_table" instead uploads the entity/timestamp pairs to a temporary table
+        and resolves the point-in-time join in a single query per feature group.
+
+        strategy="asof" fetches the feature history for each chunk of entities in one query per
+        feature view and resolves point-in-time correctness in memory with `pd.merge_asof`.
+
+        max_workers > 1 runs independent entity slices (and timestamp groups) concurrently on
+        pooled connections of the engine, results are still reassembled in order.
+
+        Chunks are written to output_file if provided (format inferred from the extension unless
+        output_format is given, partition_cols writes a partitioned parquet dataset), and returned
+        if force_fetch_all is set or there is no output_file.
+
+        verbose=True shows a progress bar of the joined rows.
         """
-        # feature_group = self.get_feature_group(feature_list, snapshot_date)
-        # return feature_group
         if entity_df.shape[0] <= 1000:
             force_fetch_all = True
-        output: List[pd.DataFrame] = []
-        if snapshot_date is not None or event_timestamp_column is None:
-            # refactor this later
-            entity_list = list(entity_df[entity_column])
+        with self._verbose_trace(verbose):
+            output: List[pd.DataFrame] = []
+            chunks = self.iter_join(
+                entity_df,
+                entity_column,
+                event_timestamp_column,
+                feature_list,
+                snapshot_date=snapshot_date,
+                batch_size=chunksize,
+                strategy=strategy,
+                max_workers=max_workers,
+            )
+            writer = None
+            if output_file is not None and output_file != "":
+                value_types = self.get_value_types(feature_list)
+                writer = get_writer(output_file, output_format, value_types, force_append, partition_cols)
 
-            num_splits = (len(entity_list) // 999) + 1
-            entity_list_splits = np.array_split(entity_list, num_splits)
+            for temp_df in chunks:
+                if force_fetch_all or writer is None:
+                    output.append(temp_df)
+                if writer is not None:
+                    with self.tracer.stage("write"):
+                        writer.write(temp_df)
+            if writer is not None:
+                with self.tracer.stage("write"):
+                    writer.close()
 
-            for elist in entity_list_splits:
-                sub_entity_df = entity_df[entity_df[entity_column].isin(elist)]
-                feature_group = self.get_feature_group(feature_list)
-                query = feature_group.build_query(self.engine, snapshot_date=snapshot_date, entity_list=elist)
+            if len(output) == 0:
+                return output
+            output_df = concat_frames(output)
+            if strategy != "query" and snapshot_date is None and event_timestamp_column is not None:
+                # these strategies keep the entity_df row order
+                output_df = output_df.sort_index()
+            return output_df
 
-                temp_df = pd.read_sql_query(query.statement, self.engine)
-                right_key = feature_group.feature_views[0].entity_column
-                right_suffix = "_y"
-                while any([x.endswith(right_suffix) for x in list(temp_df.columns) + list(sub_entity_df)]):
-                    right_suffix = "_" + right_suffix
-                temp_df = sub_entity_df.merge(
-                    temp_df, how="left", left_on=entity_column, right_on=right_key, suffixes=(None, right_suffix)
-                )
-                keep_cols = [x for x in temp_df.columns if not x.endswith(right_suffix)]
-                temp_df = temp_df[keep_cols]
+    def iter_join(
+        self,
+        entity_df,
+        entity_column="",
+        event_timestamp_column="",
+        feature_list: List[str] = [],
+        snapshot_date: Optional[datetime] = None,
+        batch_size=10000,
+        strategy: Literal["query", "temp_table", "asof"] = "query",
+        max_workers: Optional[int] = None,
+        as_arrow=False,
+    ):
+        """
+        Generator version of `join`, yielding the joined DataFrames (or pyarrow RecordBatches if
+        as_arrow=True) chunk by chunk rather than holding the full result in memory.
 
-                if force_fetch_all or len(output) == 0:
-                    output.append(temp_df.copy())
-                elif output_file is None:
-                    raise ValueError("TODO fill this in, either you force fetch, or provide somewhere to spool")
-                else:
-                    header = not os.path.exists(output_file)
-                    temp_df.to_csv(output_file, mode="a", header=header)
+        Joins of point-in-time labels (or as of a given snapshot_date) are served from the result cache
+        if one is configured, see `_iter_cached`.
+        """
+        if strategy not in ["query", "temp_table", "asof"]:
+            raise ValueError(f"strategy must be one of (query, temp_table, asof) - got: {strategy}.")
 
-            if len(output) > 0:
-                output = pd.concat(output)
-            return output
+        # every strategy but the temp table merges the features in pandas
+        merged = True
+        if strategy == "temp_table" and snapshot_date is None and event_timestamp_column is not None:
+            merged = False
+            chunks = self._iter_join_temp_table(
+                entity_df, entity_column, event_timestamp_column, feature_list, batch_size
+            )
+        elif strategy == "asof" and snapshot_date is None and event_timestamp_column is not None:
+            chunks = self._iter_join_asof(entity_df, entity_column, event_timestamp_column, feature_list, max_workers)
+        else:
+            chunks = self._iter_join_query(
+                entity_df, entity_column, event_timestamp_column, feature_list, snapshot_date, max_workers
+            )
+
+        if self.result_cache is not None and (snapshot_date is not None or event_timestamp_column is not None):
+            feature_group = self.get_feature_group(feature_list)
+            key_parts = {
+                "feature_views": [fv.cache_key for fv in feature_group.feature_views],
+                "entity_df": hash_frame(entity_df),
+                "entity_column": entity_column,
+                "event_timestamp_column": event_timestamp_column,
+                "snapshot_date": snapshot_date,
+                "strategy": strategy,
+            }
+            chunks = self._iter_cached(
+                chunks, feature_group, "join", feature_list, key_parts, batch_size, as_arrow, merged=merged
+            )
+
+        for chunk_df in chunks:
+            self.tracer.record_chunk(chunk_df)
+            yield to_record_batch(chunk_df) if as_arrow and isinstance(chunk_df, pd.DataFrame) else chunk_df
+
+    def _iter_join_query(
+        self, entity_df, entity_column, event_timestamp_column, feature_list, snapshot_date=None, max_workers=None
+    ):
+        use_to_df = self.use_safe and snapshot_date is None and event_timestamp_column is not None
+
+        def fetch_slice(task):
+            sub_entity_df, temp_snapshot_date, elist = task
+            return self._join_entity_slice(
+                sub_entity_df, entity_column, feature_list, temp_snapshot_date, elist, use_to_df=use_to_df
+            )
+
+        slices = self._join_query_slices(entity_df, entity_column, event_timestamp_column, snapshot_date)
+        yield from ordered_map(fetch_slice, slices, max_workers)
+
+    def _join_query_slices(self, entity_df, entity_column, event_timestamp_column, snapshot_date=None):
+        """
+        Splits entity_df into (entity rows, snapshot date, entity list) slices, each resolved by one query.
+        Without a snapshot_date, rows are grouped by their event timestamp and each group is queried as of it.
+        """
+        if snapshot_date is not None or event_timestamp_column is None:
+            # refactor this later
+            entity_list = list(entity_df[entity_column])
+
+            # a VALUES list or temporary table holds any number of entities in a single query
+            num_splits = (len(entity_list) // 999) + 1 if self.get_entity_filter(entity_list) == "in" else 1
+            for elist in np.array_split(entity_list, num_splits):
+                yield entity_df[entity_df[entity_column].isin(elist)], snapshot_date, elist
+            return
 
         # otherwise entity_df is a dataframe, and we have to group by and chunk by event_timestamp
         for _, group_df in entity_df.groupby([event_timestamp_column]):
             # refactor this later
             entity_list = list(group_df[entity_column])
-            num_splits = (len(entity_list) // 1000) + 1
+            num_splits = 1
+            if self.use_safe or self.get_entity_filter(entity_list) == "in":
+                num_splits = (len(entity_list) // 1000) + 1
             entity_list_splits = np.array_split(entity_list, num_splits)
-            temp_snapshot_date = group_df[event_timestamp_column].tolist()[0]
-
+            temp_snapshot_date = _to_python_scalar(group_df[event_timestamp_column].tolist()[0])
             for elist in entity_list_splits:
-                sub_entity_df = group_df[group_df[entity_column].isin(elist)]
-                feature_group = self.get_feature_group(feature_list)
-
-                if self.use_safe:
-                    temp_df = feature_group.to_df(self.engine, snapshot_date=temp_snapshot_date, entity_list=elist)
-                else:
-                    query = feature_group.build_query(self.engine, snapshot_date=temp_snapshot_date, entity_list=elist)
-                    temp_df = pd.read_sql_query(query.statement, self.engine)
+                yield group_df[group_df[entity_column].isin(elist)], temp_snapshot_date, elist
 
-                right_key = feature_group.feature_views[0].entity_column
-                right_suffix = "_y"
-                while any([x.endswith(right_suffix) for x in list(temp_df.columns) + list(sub_entity_df)]):
-                    right_suffix = "_" + right_suffix
-                temp_df = sub_entity_df.merge(
-                    temp_df, how="left", left_on=entity_column, right_on=right_key, suffixes=(None, right_suffix)
+    def _join_entity_slice(
+        self, sub_entity_df, entity_column, feature_list, snapshot_date, entity_list, use_to_df=False
+    ):
+        feature_group = self.get_feature_group(feature_list)
+        if use_to_df:
+            with self.tracer.stage("fetch"):
+                temp_df = feature_group.to_df(
+                    self.engine, snapshot_date=snapshot_date, entity_list=entity_list, fetch_backend=self.fetch_backend
                 )
-                keep_cols = [x for x in temp_df.columns if not x.endswith(right_suffix)]
-                temp_df = temp_df[keep_cols]
+                temp_df = apply_dtypes(temp_df, self.get_dtypes(feature_group))
+        else:
+            temp_df = concat_frames(
+                self._iter_feature_group(feature_group, snapshot_date, entity_list.tolist(), batch_size=None)
+            )
+        with self.tracer.stage("merge"):
+            feature_entity_column = feature_group.feature_views[0].entity_column
+            return merge_entity_df(sub_entity_df, temp_df, entity_column, feature_entity_column)
 
-                if force_fetch_all:
-                    output.append(temp_df.copy())
-                elif output_file is None:
-                    raise ValueError("TODO fill this in, either you force fetch, or provide somewhere to spool")
-                else:
-                    header = not os.path.exists(output_file)
-                    temp_df.to_csv(output_file, mode="a", header=header)
+    def _iter_join_temp_table(self, entity_df, entity_column, event_timestamp_column, feature_list, batch_size=10000):
+        """
+        Point-in-time join resolved by the database: entity_df is written to a temporary table
+        (the "spine") and every feature view is joined against it in one query, rather than
+        issuing one query per distinct timestamp. Chunks are indexed by the row position in entity_df
+        (its own index is not kept), which `join` sorts by to restore the row order.
+        """
+        feature_group = self.get_feature_group(feature_list)
+        entity_df = entity_df.reset_index(drop=True)
+
+        spine_df = pd.DataFrame(
+            {
+                SPINE_ROW_COLUMN: np.arange(entity_df.shape[0]),
+                SPINE_ENTITY_COLUMN: entity_df[entity_column],
+                SPINE_EVENT_TIMESTAMP_COLUMN: entity_df[event_timestamp_column],
+            }
+        )
+        ttl_columns = {}
+        for idx, fv in enumerate(feature_group.feature_views):
+            ttl_bounds = infer_ttl_series(spine_df[SPINE_EVENT_TIMESTAMP_COLUMN], fv.ttl)
+            if ttl_bounds is not None:
+                ttl_columns[fv.name] = f"ttl_{idx}"
+                spine_df[ttl_columns[fv.name]] = ttl_bounds
+
+        with self.engine.connect() as conn:  # type: ignore
+            spine_name = f"spellstore_spine_{uuid.uuid4().hex[:8]}"
+            spine = create_temp_table(conn, spine_name, spine_df, chunksize=batch_size)
+            try:
+                with self.tracer.stage("query_build"):
+                    query = feature_group.build_point_in_time_query(conn, spine, ttl_columns)
+                stream_conn = conn.execution_options(stream_results=True)
+                value_types = self.get_feature_group_value_types(feature_group)
+                chunks = read_sql(query.statement, stream_conn, self.fetch_backend, value_types, chunksize=batch_size)
+                dtypes = self.get_dtypes(feature_group)
+                for chunk_df in self.tracer.iter_chunks(chunks):
+                    with self.tracer.stage("merge"):
+                        chunk_df = apply_dtypes(chunk_df, dtypes)
+                        row_index = chunk_df[SPINE_ROW_COLUMN].to_numpy()
+                        label_df = entity_df.iloc[row_index]
+                        chunk_df = chunk_df.drop(columns=[SPINE_ROW_COLUMN]).set_index(label_df.index)
+                        keep_cols = [x for x in chunk_df.columns if x not in label_df.columns]
+                        chunk_df = pd.concat([label_df, chunk_df[keep_cols]], axis=1, copy=False)
+                    yield chunk_df
+            finally:
+                spine.drop(conn)
+
+    def _iter_join_asof(self, entity_df, entity_column, event_timestamp_column, feature_list, max_workers=None):
+        """
+        Point-in-time join resolved in memory: for every chunk of entities the history of each
+        feature view (bounded by the chunk's label timestamps and ttl) is fetched in one query,
+        then matched to the labels with a sorted as-of merge keyed by entity.
+        """
+        feature_group = self.get_feature_group(feature_list)
+        entity_df = entity_df.reset_index(drop=True)
+        entity_df.index.name = SPINE_ROW_COLUMN
+
+        entity_list = entity_df[entity_column].unique()
+        num_splits = (len(entity_list) // 999) + 1
+        entity_list_splits = np.array_split(entity_list, num_splits)
+        dtypes = self.get_dtypes(feature_group)
+        value_types = self.get_feature_group_value_types(feature_group)
+
+        def fetch_entity_slice(elist):
+            sub_entity_df = entity_df[entity_df[entity_column].isin(elist)]
+            start_date = _to_python_scalar(sub_entity_df[event_timestamp_column].min())
+            end_date = _to_python_scalar(sub_entity_df[event_timestamp_column].max())
+
+            temp_df = sub_entity_df
+            for fv in feature_group.feature_views:
+                with self.tracer.stage("query_build"):
+                    query = fv.build_history_subquery(
+                        self.engine,
+                        entity_list=elist,
+                        start_date=infer_ttl_field(start_date, fv.ttl),
+                        end_date=end_date,
+                        is_subquery=False,
+                    )
+                with self.tracer.stage("fetch"):
+                    history_df = read_sql(query.statement, self.engine, self.fetch_backend, value_types)
+                    history_df = apply_dtypes(history_df, dtypes)
+                with self.tracer.stage("merge"):
+                    features_df = asof_merge(sub_entity_df, history_df, fv, entity_column, event_timestamp_column)
+                    keep_cols = [x for x in features_df.columns if x not in temp_df.columns]
+                    temp_df = temp_df.join(features_df[keep_cols])
+            temp_df = temp_df.sort_index()
+            temp_df.index.name = None
+            return temp_df
+
+        non_empty_splits = [elist for elist in entity_list_splits if len(elist) > 0]
+        yield from ordered_map(fetch_entity_slice, non_empty_splits, max_workers)
+
+
+def merge_entity_df(entity_df, feature_df, entity_column, feature_entity_column):
+    """
+    Left joins the fetched features onto entity_df, feature columns which clash with
+    entity_df columns are dropped.
+    """
+    right_suffix = "_y"
+    while any([x.endswith(right_suffix) for x in list(feature_df.columns) + list(entity_df)]):
+        right_suffix = "_" + right_suffix
+    temp_df = entity_df.merge(
+        feature_df, how="left", left_on=entity_column, right_on=feature_entity_column, suffixes=(None, right_suffix)
+    )
+    keep_cols = [x for x in temp_df.columns if not x.endswith(right_suffix)]
+    return temp_df[keep_cols]
+
+
+def _to_python_scalar(value):
+    # numpy scalars (e.g. np.int64) and pandas Timestamps cannot be bound by every DBAPI driver
+    if isinstance(value, pd.Timestamp):
+        return value.to_pydatetime()
+    return value.item() if isinstance(value, np.generic) else value
+
+
+ASOF_KEY_COLUMN = "spellstore_asof_key"
+ASOF_BY_COLUMN = "spellstore_asof_by"
+ASOF_MATCH_COLUMN = "spellstore_asof_match"
+
+
+def asof_merge(label_df, history_df, feature_view, entity_column, event_timestamp_column, with_match=False):
+    """
+    For every row of label_df, picks the latest row of history_df (a feature view's history) with
+    `event_timestamp <= label timestamp`, ties broken by create timestamp, and drops matches older
+    than the view's ttl. Returns the feature columns indexed like label_df (which must have a unique index).
 
-        if len(output) > 0:
-            output = pd.concat(output)
-        return output
+    with_match=True also returns the `ASOF_MATCH_COLUMN` column, which is null for rows without a match.
+    """
+    fv = feature_view
+    index_name = "index" if label_df.index.name is None else label_df.index.name
+    feature_cols = [x for x in fv.projected_columns if x != fv.entity_column]
+    left = pd.DataFrame(
+        {ASOF_BY_COLUMN: label_df[entity_column].to_numpy(), ASOF_KEY_COLUMN: label_df[event_timestamp_column]},
+        index=label_df.index,
+    )
+    right_cols = feature_cols + [fv.create_timestamp_column] if fv.create_timestamp_column is not None else feature_cols
+    right = history_df[list(dict.fromkeys(right_cols))].copy()
+    right[ASOF_BY_COLUMN] = history_df[fv.entity_column].to_numpy()
+
+    output_cols = feature_cols + [ASOF_MATCH_COLUMN] if with_match else feature_cols
+    if fv.event_timestamp_column is None:
+        right[ASOF_MATCH_COLUMN] = True
+        merged = left.reset_index().merge(right, how="left", on=ASOF_BY_COLUMN).set_index(index_name)
+        return merged[output_cols].reindex(label_df.index)
+
+    right[ASOF_KEY_COLUMN] = history_df[fv.event_timestamp_column].to_numpy()
+    left[ASOF_KEY_COLUMN], right[ASOF_KEY_COLUMN] = _coerce_asof_keys(left[ASOF_KEY_COLUMN], right[ASOF_KEY_COLUMN])
+    if left[ASOF_BY_COLUMN].dtype != right[ASOF_BY_COLUMN].dtype:
+        right[ASOF_BY_COLUMN] = right[ASOF_BY_COLUMN].astype(left[ASOF_BY_COLUMN].dtype)
+    right[ASOF_MATCH_COLUMN] = right[ASOF_KEY_COLUMN]
+
+    sort_cols = [ASOF_KEY_COLUMN]
+    if fv.create_timestamp_column is not None:
+        sort_cols.append(fv.create_timestamp_column)
+    right = right.sort_values(sort_cols, kind="mergesort").drop_duplicates(
+        [ASOF_BY_COLUMN, ASOF_KEY_COLUMN], keep="last"
+    )
+
+    merged = pd.merge_asof(
+        left.reset_index().sort_values(ASOF_KEY_COLUMN, kind="mergesort"),
+        right,
+        on=ASOF_KEY_COLUMN,
+        by=ASOF_BY_COLUMN,
+        direction="backward",
+        allow_exact_matches=True,
+    ).set_index(index_name)
+
+    ttl_bounds = infer_ttl_series(merged[ASOF_KEY_COLUMN], fv.ttl)
+    if ttl_bounds is not None:
+        merged.loc[merged[ASOF_MATCH_COLUMN] < ttl_bounds, output_cols] = None
+    return merged[output_cols].reindex(label_df.index)
+
+
+SNAPSHOT_DATE_COLUMN = "snapshot_date"
+
+
+def snapshot_sweep(feature_group, history_dfs, snapshot_dates):
+    """
+    Every snapshot of the feature group from the history of its feature views (fetched once, up to
+    the last snapshot date), resolved with an as-of merge against a spine of entities x snapshot dates.
+    Matches what `FeatureGroup.build_query` returns per snapshot, with rows ordered by snapshot date
+    then entity and tagged with their date in the `SNAPSHOT_DATE_COLUMN` column.
+    """
+    base_fv = feature_group.feature_views[0]
+    entity_column = base_fv.entity_column
+    spine_views = feature_group.feature_views if feature_group.full_join else [base_fv]
+    entities = pd.unique(pd.concat([history_dfs[idx][fv.entity_column] for idx, fv in enumerate(spine_views)]))
+    try:
+        entities = np.sort(entities)
+    except TypeError:
+        pass  # mixed types keep the order they were read in
+
+    spine_df = pd.DataFrame(
+        {
+            SNAPSHOT_DATE_COLUMN: np.repeat(np.array(snapshot_dates, dtype=object), len(entities)),
+            entity_column: np.tile(entities, len(snapshot_dates)),
+        }
+    )
+    if len(snapshot_dates) > 0 and isinstance(snapshot_dates[0], datetime):
+        spine_df[SNAPSHOT_DATE_COLUMN] = pd.to_datetime(spine_df[SNAPSHOT_DATE_COLUMN])
+
+    output = [spine_df]
+    output_cols = set(spine_df.columns)
+    is_matched = pd.Series(False, index=spine_df.index)
+    for fv, history_df in zip(feature_group.feature_views, history_dfs):
+        features_df = asof_merge(spine_df, history_df, fv, entity_column, SNAPSHOT_DATE_COLUMN, with_match=True)
+        if fv is base_fv or feature_group.full_join:
+            is_matched |= features_df[ASOF_MATCH_COLUMN].notna()
+        keep_cols = [x for x in features_df.columns if x not in output_cols and x != ASOF_MATCH_COLUMN]
+        output_cols.update(keep_cols)
+        output.append(features_df[keep_cols])
+    snapshot_df = pd.concat(output, axis=1)
+    return snapshot_df[is_matched.to_numpy()].reset_index(drop=True)
+
+
+def _coerce_asof_keys(left_key, right_key):
+    # merge_asof requires both keys to share a dtype, e.g. SQLite returns datetimes as strings
+    if is_datetime64_any_dtype(left_key.dtype) or is_datetime64_any_dtype(right_key.dtype):
+        return pd.to_datetime(left_key), pd.to_datetime(right_key)
+    if left_key.dtype != right_key.dtype:
+        return left_key.astype("float64"), right_key.astype("float64")
+    return left_key, right_key
+
+
+class QueryCache(object):
+    """
+    Thread safe LRU cache of built queries keyed by their shape (dialect, strategy, feature
+    views and whether an entity list is used), values are supplied as bind parameters.
+    """
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self._cache: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._cache:
+                return None
+            self._cache.move_to_end(key)
+            return self._cache[key]
+
+    def put(self, key, value):
+        with self._lock:
+            self._cache[key] = value
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    def __len__(self):
+        return len(self._cache)
+
+
+query_cache = QueryCache()
+
+SPINE_ROW_COLUMN = "spellstore_row_id"
+SPINE_ENTITY_COLUMN = "spellstore_entity"
+SPINE_EVENT_TIMESTAMP_COLUMN = "spellstore_event_timestamp"
 
 
 class FeatureView(BaseModel):
@@ -193,148 +1055,291 @@ class FeatureView(BaseModel):
     event_timestamp_column: Optional[str] = None
     create_timestamp_column: Optional[str] = None
     ttl: Optional[Union[int, float, timedelta]] = None
-    rank_column: Optional[str] = None
+    sample_fraction: Optional[float] = None
+    sample_hash_function: Optional[str] = None
 
-    def build_subquery_safe(self, engine, snapshot_date=None, entity_list=None, is_subquery=True):
+    @property
+    def ttl_param_name(self):
+        return "ttl_date_" + re.sub(r"\W", "_", self.name)
+
+    @property
+    def projected_columns(self) -> List[str]:
         """
-        A "safe" version by SQL verb support which avoids over + partition by
+        The requested columns and the entity column, the only columns the view's queries select
         """
-        db = scoped_session(sessionmaker(autocommit=False, autoflush=False, bind=engine))
-        columns = self.columns.copy()
-        self.rank_column = None
-        if self.entity_column not in columns:
-            columns.append(self.entity_column)
+        return list(dict.fromkeys(self.columns + [self.entity_column]))
+
+    def get_rank_column_name(self) -> str:
+        columns = [self.entity_column, self.event_timestamp_column, self.create_timestamp_column] + self.columns
+        rank_col = "rnk"
+        while rank_col in columns:
+            rank_col = "r" + rank_col
+        return rank_col
+
+    @property
+    def cache_key(self):
+        return (
+            self.name,
+            tuple(self.columns),
+            self.entity_column,
+            self.event_timestamp_column,
+            self.create_timestamp_column,
+            self.ttl,
+            self.sample_fraction,
+            self.sample_hash_function,
+        )
 
+    def filter_event_timestamp(self, query_builder, snapshot_date=None, start_date=None):
+        """
+        Restricts rows to `event_timestamp <= snapshot_date`, and the ttl bound or start_date if provided.
+        All values are bind parameters (see `FeatureGroup.query_params`).
+        """
+        query_builder = query_builder.filter(
+            column(self.event_timestamp_column) <= bindparam("snapshot_date", snapshot_date)
+        )
+        ttl_date = infer_ttl_field(snapshot_date, self.ttl)
+        if ttl_date is not None:
+            query_builder = query_builder.filter(
+                column(self.event_timestamp_column) >= bindparam(self.ttl_param_name, ttl_date)
+            )
+        if start_date is not None:
+            query_builder = query_builder.filter(
+                column(self.event_timestamp_column) >= bindparam("start_date", start_date)
+            )
+        return query_builder
+
+    def filter_entity(self, query_builder, entity_list=None):
+        """
+        Restricts rows to the entity list, and to the sampled entities if the view is sampled
+        """
+        if self.sample_fraction is not None:
+            query_builder = query_builder.filter(
+                entity_sample_condition(column(self.entity_column), self.sample_fraction, self.sample_hash_function)
+            )
+        if entity_list is None:
+            return query_builder
+        if isinstance(entity_list, EntityPredicate):
+            return query_builder.filter(entity_list.condition(column(self.entity_column)))
+        if isinstance(entity_list, FromClause):
+            # a VALUES list or (temporary) table of entities, see spellbook.entity_filter
+            entity_select = select(list(entity_list.c)[0])
+            return query_builder.filter(column(self.entity_column).in_(entity_select))
+        if type(entity_list) is not list:
+            entity_list = entity_list.tolist()  # avoid nd-arrays
+        return query_builder.filter(
+            column(self.entity_column).in_(bindparam("entity_list", entity_list, expanding=True))
+        )
+
+    def build_subquery_safe(self, engine, snapshot_date=None, entity_list=None, is_subquery=True, start_date=None):
+        """
+        A "safe" version by SQL verb support which avoids over + partition by: the latest event (and
+        create) timestamp per entity is found with max() + group by, and joined back to the view.
+        """
+        db = scoped_session(sessionmaker(autocommit=False, autoflush=False, bind=engine))
+        projected_columns = self.projected_columns
         if self.event_timestamp_column is None:
-            self.columns = columns
-            self.rank_column = None
-            query_builder = db.query(table(self.name, *[column(col) for col in self.columns]))
-        else:
-            if self.event_timestamp_column not in columns:
-                columns.append(self.event_timestamp_column)
-            if self.create_timestamp_column not in columns and self.create_timestamp_column is not None:
-                columns.append(self.create_timestamp_column)
-
-            rank_col = "rnk"
-            while rank_col in columns:
-                rank_col = "r" + rank_col
-            self.columns = columns
-
-            if self.create_timestamp_column is None:
-                subq = db.query(
-                    table(self.name, column(self.entity_column)),
-                    func.max(column(self.event_timestamp_column)).label(rank_col),
-                ).filter(column(self.event_timestamp_column) <= snapshot_date)
-                ttl_date = infer_ttl_field(snapshot_date, self.ttl)
-                if ttl_date is not None:
-                    subq = subq.filter(column(self.event_timestamp_column) >= ttl_date)
+            query_builder = db.query(table(self.name, *[column(col) for col in projected_columns]))
+            query_builder = self.filter_entity(query_builder, entity_list)
+            return query_builder if not is_subquery else query_builder.subquery()
 
-                subq = subq.group_by(column(self.entity_column))
-                if entity_list is not None:
-                    if type(entity_list) is not list:
-                        entity_list = entity_list.tolist()  # avoid nd-arrays
-                    subq = subq.filter(column(self.entity_column).in_(entity_list))
-                subq = subq.subquery()
+        rank_col = self.get_rank_column_name()
+        view = table(self.name, column(self.entity_column), column(self.event_timestamp_column))
+        latest = db.query(view.c[self.entity_column], func.max(view.c[self.event_timestamp_column]).label(rank_col))
+        latest = self.filter_event_timestamp(latest, snapshot_date, start_date)
+        latest = self.filter_entity(latest, entity_list)
+        latest = latest.group_by(view.c[self.entity_column]).subquery()
 
-                query_builder = db.query(table(self.name, *[column(col) for col in self.columns])).join(
-                    subq,
-                    and_(
-                        getattr(table(self.name, column(self.entity_column)).c, self.entity_column)
-                        == getattr(subq.c, self.entity_column),
-                        getattr(table(self.name, column(self.event_timestamp_column)).c, self.event_timestamp_column)
-                        == getattr(subq.c, rank_col),
-                    ),
+        if self.create_timestamp_column is not None:
+            # latest create timestamp amongst the rows at the latest event timestamp
+            view_create = table(
+                self.name,
+                column(self.entity_column),
+                column(self.event_timestamp_column),
+                column(self.create_timestamp_column),
+            ).alias()
+            latest = (
+                db.query(
+                    latest.c[self.entity_column],
+                    latest.c[rank_col],
+                    func.max(view_create.c[self.create_timestamp_column]).label(rank_col + "0"),
                 )
-            else:
-
-                subq = db.query(
-                    table(self.name, column(self.entity_column)),
-                    func.max(column(self.event_timestamp_column)).label(rank_col),
-                    func.max(column(self.create_timestamp_column)).label(rank_col + "0"),
-                ).filter(column(self.event_timestamp_column) <= snapshot_date)
-                ttl_date = infer_ttl_field(snapshot_date, self.ttl)
-                if ttl_date is not None:
-                    subq = subq.filter(column(self.event_timestamp_column) >= ttl_date)
-                subq = subq.group_by(column(self.entity_column))
-                if entity_list is not None:
-                    if type(entity_list) is not list:
-                        entity_list = entity_list.tolist()  # avoid nd-arrays
-                    subq = subq.filter(column(self.entity_column).in_(entity_list))
-                subq = subq.subquery()
-
-                query_builder = db.query(table(self.name, *[column(col) for col in self.columns])).join(
-                    subq,
+                .join(
+                    view_create,
                     and_(
-                        getattr(table(self.name, column(self.entity_column)).c, self.entity_column)
-                        == getattr(subq.c, self.entity_column),
-                        getattr(table(self.name, column(self.event_timestamp_column)).c, self.event_timestamp_column)
-                        == getattr(subq.c, rank_col),
-                        getattr(table(self.name, column(self.create_timestamp_column)).c, self.create_timestamp_column)
-                        == getattr(subq.c, rank_col + "0"),
+                        view_create.c[self.entity_column] == latest.c[self.entity_column],
+                        view_create.c[self.event_timestamp_column] == latest.c[rank_col],
                     ),
                 )
+                .group_by(latest.c[self.entity_column], latest.c[rank_col])
+                .subquery()
+            )
+
+        view_columns = list(dict.fromkeys(projected_columns + [self.event_timestamp_column]))
+        if self.create_timestamp_column is not None:
+            view_columns = list(dict.fromkeys(view_columns + [self.create_timestamp_column]))
+        view = table(self.name, *[column(col) for col in view_columns])
+        join_conditions = [
+            view.c[self.entity_column] == latest.c[self.entity_column],
+            view.c[self.event_timestamp_column] == latest.c[rank_col],
+        ]
+        if self.create_timestamp_column is not None:
+            join_conditions.append(view.c[self.create_timestamp_column] == latest.c[rank_col + "0"])
+        query_builder = db.query(*[view.c[col] for col in projected_columns]).join(latest, and_(*join_conditions))
         if not is_subquery:
             return query_builder
         return query_builder.subquery()
 
-    def build_subquery(self, engine, snapshot_date=None, entity_list=None, is_subquery=True):
+    def build_history_subquery(self, engine, entity_list=None, start_date=None, end_date=None, is_subquery=True):
+        """
+        All rows of this view for the entity list with `start_date <= event_timestamp <= end_date`,
+        point-in-time correctness is resolved by the caller.
+        """
         db = scoped_session(sessionmaker(autocommit=False, autoflush=False, bind=engine))
         columns = self.columns.copy()
         if self.entity_column not in columns:
             columns.append(self.entity_column)
+        if self.event_timestamp_column is not None and self.event_timestamp_column not in columns:
+            columns.append(self.event_timestamp_column)
+        if self.create_timestamp_column is not None and self.create_timestamp_column not in columns:
+            columns.append(self.create_timestamp_column)
+
+        query_builder = db.query(table(self.name, *[column(col) for col in columns]))
+        if self.event_timestamp_column is not None:
+            if start_date is not None:
+                query_builder = query_builder.filter(column(self.event_timestamp_column) >= start_date)
+            if end_date is not None:
+                query_builder = query_builder.filter(column(self.event_timestamp_column) <= end_date)
+        query_builder = self.filter_entity(query_builder, entity_list)
+
+        if not is_subquery:
+            return query_builder
+        return query_builder.subquery()
+
+    def build_point_in_time_subquery(self, engine, spine, ttl_column=None, use_safe=False):
+        """
+        Latest row of this view for every row of the uploaded spine table, i.e. the row with
+        `event_timestamp <= spine timestamp` (and within ttl) ordered by event then create timestamp.
+        Returns a subquery keyed by the spine row id.
+        """
+        db = scoped_session(sessionmaker(autocommit=False, autoflush=False, bind=engine))
+        columns = self.columns.copy()
+        if self.entity_column not in columns:
+            columns.append(self.entity_column)
+        if self.event_timestamp_column is not None and self.event_timestamp_column not in columns:
+            columns.append(self.event_timestamp_column)
+        if self.create_timestamp_column is not None and self.create_timestamp_column not in columns:
+            columns.append(self.create_timestamp_column)
+        view = table(self.name, *[column(col) for col in columns])
+        select_cols = [getattr(view.c, col) for col in self.projected_columns if col != self.entity_column]
+        spine_row = getattr(spine.c, SPINE_ROW_COLUMN)
+
+        join_conditions = [getattr(view.c, self.entity_column) == getattr(spine.c, SPINE_ENTITY_COLUMN)]
+        if self.event_timestamp_column is not None:
+            join_conditions.append(
+                getattr(view.c, self.event_timestamp_column) <= getattr(spine.c, SPINE_EVENT_TIMESTAMP_COLUMN)
+            )
+            if ttl_column is not None:
+                join_conditions.append(getattr(view.c, self.event_timestamp_column) >= getattr(spine.c, ttl_column))
 
-        # if self.event_timestamp_column is None and entity_list is None:
-        #     self.columns = columns
-        #     self.rank_column = None
-        #     query_builder = db.query(table(self.name, *[column(col) for col in self.columns]))
         if self.event_timestamp_column is None:
-            self.columns = columns
-            self.rank_column = None
-            query_builder = db.query(table(self.name, *[column(col) for col in self.columns]))
-        else:
-            if self.event_timestamp_column not in columns:
-                columns.append(self.event_timestamp_column)
-            if self.create_timestamp_column not in columns and self.create_timestamp_column is not None:
-                columns.append(self.create_timestamp_column)
-
-            rank_col = "rnk"
-            while rank_col in columns:
-                rank_col = "r" + rank_col
-            self.columns = columns
-            self.rank_column = rank_col
-
-            if self.create_timestamp_column is None:
-                query_builder = db.query(
-                    table(self.name, *[column(col) for col in self.columns]),
-                    func.rank()
-                    .over(order_by=column(self.event_timestamp_column).desc(), partition_by=self.entity_column)
-                    .label(rank_col),
-                ).filter(column(self.event_timestamp_column) <= snapshot_date)
-                ttl_date = infer_ttl_field(snapshot_date, self.ttl)
-                if ttl_date is not None:
-                    query_builder = query_builder.filter(column(self.event_timestamp_column) >= ttl_date)
+            return db.query(spine_row, *select_cols).join(view, and_(*join_conditions)).subquery()
 
-            else:
-                query_builder = db.query(
-                    table(self.name, *[column(col) for col in self.columns]),
-                    func.rank()
-                    .over(
-                        order_by=and_(
-                            column(self.event_timestamp_column).desc(), column(self.create_timestamp_column).desc()
-                        ),
-                        partition_by=self.entity_column,
-                    )
-                    .label(rank_col),
-                ).filter(column(self.event_timestamp_column) <= snapshot_date)
-                ttl_date = infer_ttl_field(snapshot_date, self.ttl)
-                if ttl_date is not None:
-                    query_builder = query_builder.filter(column(self.event_timestamp_column) >= ttl_date)
+        rank_col = "rnk"
+        while rank_col in columns:
+            rank_col = "r" + rank_col
 
-        if entity_list is not None:
-            if type(entity_list) is not list:
-                entity_list = entity_list.tolist()  # avoid nd-arrays
-            query_builder = query_builder.filter(column(self.entity_column).in_(entity_list))
+        if not use_safe:
+            order_by = [getattr(view.c, self.event_timestamp_column).desc()]
+            if self.create_timestamp_column is not None:
+                order_by.append(getattr(view.c, self.create_timestamp_column).desc())
+            # row_number rather than rank, so ties cannot duplicate label rows
+            ranked = (
+                db.query(
+                    spine_row,
+                    *select_cols,
+                    func.row_number().over(partition_by=spine_row, order_by=order_by).label(rank_col),
+                )
+                .join(view, and_(*join_conditions))
+                .subquery()
+            )
+            return (
+                db.query(*[col for col in ranked.c if col.name != rank_col])
+                .filter(getattr(ranked.c, rank_col) == 1)
+                .subquery()
+            )
+
+        # "safe" version, max() + self join instead of over + partition by
+        latest = (
+            db.query(spine_row, func.max(getattr(view.c, self.event_timestamp_column)).label(rank_col))
+            .join(view, and_(*join_conditions))
+            .group_by(spine_row)
+            .subquery()
+        )
+        view_latest = table(self.name, *[column(col) for col in columns])
+        latest_conditions = [
+            getattr(view_latest.c, self.entity_column) == getattr(spine.c, SPINE_ENTITY_COLUMN),
+            getattr(view_latest.c, self.event_timestamp_column) == getattr(latest.c, rank_col),
+        ]
+        if self.create_timestamp_column is not None:
+            view_create = table(self.name, *[column(col) for col in columns])
+            latest_create = (
+                db.query(
+                    getattr(latest.c, SPINE_ROW_COLUMN),
+                    getattr(latest.c, rank_col),
+                    func.max(getattr(view_create.c, self.create_timestamp_column)).label(rank_col + "0"),
+                )
+                .join(spine, spine_row == getattr(latest.c, SPINE_ROW_COLUMN))
+                .join(
+                    view_create,
+                    and_(
+                        getattr(view_create.c, self.entity_column) == getattr(spine.c, SPINE_ENTITY_COLUMN),
+                        getattr(view_create.c, self.event_timestamp_column) == getattr(latest.c, rank_col),
+                    ),
+                )
+                .group_by(getattr(latest.c, SPINE_ROW_COLUMN), getattr(latest.c, rank_col))
+                .subquery()
+            )
+            latest = latest_create
+            latest_conditions = [
+                getattr(view_latest.c, self.entity_column) == getattr(spine.c, SPINE_ENTITY_COLUMN),
+                getattr(view_latest.c, self.event_timestamp_column) == getattr(latest.c, rank_col),
+                getattr(view_latest.c, self.create_timestamp_column) == getattr(latest.c, rank_col + "0"),
+            ]
+        return (
+            db.query(
+                getattr(latest.c, SPINE_ROW_COLUMN),
+                *[getattr(view_latest.c, col) for col in self.projected_columns if col != self.entity_column],
+            )
+            .join(spine, spine_row == getattr(latest.c, SPINE_ROW_COLUMN))
+            .join(view_latest, and_(*latest_conditions))
+            .subquery()
+        )
+
+    def build_subquery(self, engine, snapshot_date=None, entity_list=None, is_subquery=True, start_date=None):
+        """
+        Latest row per entity as of snapshot_date, projected to the requested columns and the entity.
+        Rows are numbered per entity by event (and create) timestamp and filtered to the first row
+        inside the subquery, so joins between views only see one row per entity.
+        """
+        db = scoped_session(sessionmaker(autocommit=False, autoflush=False, bind=engine))
+        projected_columns = self.projected_columns
+        if self.event_timestamp_column is None:
+            query_builder = db.query(table(self.name, *[column(col) for col in projected_columns]))
+            query_builder = self.filter_entity(query_builder, entity_list)
+            return query_builder if not is_subquery else query_builder.subquery()
+
+        rank_col = self.get_rank_column_name()
+        order_by = [column(self.event_timestamp_column).desc()]
+        if self.create_timestamp_column is not None:
+            order_by.append(column(self.create_timestamp_column).desc())
+        ranked = db.query(
+            table(self.name, *[column(col) for col in projected_columns]),
+            func.row_number().over(order_by=order_by, partition_by=column(self.entity_column)).label(rank_col),
+        )
+        ranked = self.filter_event_timestamp(ranked, snapshot_date, start_date)
+        ranked = self.filter_entity(ranked, entity_list).subquery()
 
+        query_builder = db.query(*[ranked.c[col] for col in projected_columns]).filter(ranked.c[rank_col] == 1)
         if not is_subquery:
             return query_builder
         return query_builder.subquery()
@@ -344,8 +1349,64 @@ class FeatureGroup(BaseModel):
     feature_views: List[FeatureView]
     full_join: bool = True
     use_safe: bool = False
+    query_strategy: str = "auto"
+
+    def get_query_strategy(self, engine) -> QueryStrategy:
+        return choose_query_strategy(engine, self.query_strategy, self.use_safe)
+
+    def cache_key(self, engine, entity_list=None, start_date=None, snapshot_date=None):
+        """
+        Key of the query in the query cache, None if it can't be cached (entities inlined as VALUES,
+        or an entity partition or page). The bind parameters are typed by their values, so the value
+        types are part of the key.
+        """
+        if isinstance(entity_list, (Values, EntityPredicate)):
+            return None
+        entity_key = entity_list.name if isinstance(entity_list, FromClause) else entity_list is None
+        return (
+            engine.dialect.name,
+            self.full_join,
+            self.get_query_strategy(engine).name,
+            tuple(fv.cache_key for fv in self.feature_views),
+            entity_key,
+            type(start_date),
+            type(snapshot_date),
+        )
+
+    def query_params(self, snapshot_date=None, entity_list=None, start_date=None):
+        """
+        Values of the bind parameters used by `build_query`
+        """
+        params = {"snapshot_date": snapshot_date}
+        if start_date is not None:
+            params["start_date"] = start_date
+        if entity_list is not None and not isinstance(entity_list, (FromClause, EntityPredicate)):
+            params["entity_list"] = entity_list if type(entity_list) is list else entity_list.tolist()
+        for fv in self.feature_views:
+            if fv.event_timestamp_column is not None:
+                ttl_date = infer_ttl_field(snapshot_date, fv.ttl)
+                if ttl_date is not None:
+                    params[fv.ttl_param_name] = ttl_date
+        return params
+
+    def build_query(self, engine, snapshot_date=None, entity_list=None, start_date=None, limit=None):
+        """
+        Builds the query for the latest row of every feature view as of snapshot_date, optionally only
+        considering rows with `event_timestamp >= start_date`. snapshot_date, start_date, the ttl bounds
+        and the entity list are bind parameters, so queries of the same shape are only built once and
+        then re-used from the query cache with new parameter values.
+
+        limit caps the number of rows with a LIMIT clause on the outer query.
+        """
+        if limit is not None:
+            return self.build_query(engine, snapshot_date, entity_list, start_date).limit(limit)
+        key = self.cache_key(engine, entity_list, start_date, snapshot_date)
+        cached_query = None if key is None else query_cache.get(key)
+        if cached_query is not None:
+            session = Session(bind=engine, autocommit=False, autoflush=False)
+            params = self.query_params(snapshot_date, entity_list, start_date)
+            return cached_query.with_session(session).params(**params)
 
-    def build_query(self, engine, snapshot_date=None, entity_list=None):
         db = scoped_session(sessionmaker(autocommit=False, autoflush=False, bind=engine))
         table_dict = {}
         select_cols = []
@@ -355,13 +1416,13 @@ class FeatureGroup(BaseModel):
         base_entity_column = ""
 
         # build subqueries
+        strategy = self.get_query_strategy(engine)
         for fv in self.feature_views:
-            if self.use_safe:
-                table_dict[fv.name] = fv.build_subquery_safe(db, snapshot_date, entity_list)
-            else:
-                table_dict[fv.name] = fv.build_subquery(db, snapshot_date, entity_list)
+            table_dict[fv.name] = strategy.latest_row(fv, db, snapshot_date, entity_list, start_date=start_date)
             table_join_info[fv.name] = fv.entity_column
-            select_cols.extend([getattr(table_dict[fv.name].c, col) for col in fv.columns if col != fv.entity_column])
+            select_cols.extend(
+                [getattr(table_dict[fv.name].c, col) for col in fv.projected_columns if col != fv.entity_column]
+            )
             select_col_entity.append(getattr(table_dict[fv.name].c, fv.entity_column))
             if is_base_table:
                 base_entity_column = fv.entity_column
@@ -376,7 +1437,7 @@ class FeatureGroup(BaseModel):
             ] + select_cols
         base_query = db.query(*select_cols)
 
-        # add join and filter/rank conditions
+        # add join conditions, every subquery already holds only the latest row per entity
         is_base_table = True
         select_col_entity = []
         for fv in self.feature_views:
@@ -398,20 +1459,34 @@ class FeatureGroup(BaseModel):
             else:
                 # we're looking at the first table!
                 pass
-            if fv.rank_column is not None:
-                base_query = base_query.filter(
-                    or_(
-                        getattr(table_dict[fv.name].c, fv.rank_column) == 1,
-                        getattr(table_dict[fv.name].c, fv.rank_column).is_(None),
-                    )
-                )
 
             # ensures properly joined for subsequent queries
             select_col_entity.append(getattr(table_dict[fv.name].c, fv.entity_column))
 
+        if key is not None:
+            query_cache.put(key, base_query)
         return base_query
 
-    def to_df(self, engine, snapshot_date=None, entity_list=None):
+    def build_point_in_time_query(self, engine, spine, ttl_columns=None):
+        """
+        Left joins the latest row of every feature view onto the spine table, ordered by spine row id
+        """
+        db = scoped_session(sessionmaker(autocommit=False, autoflush=False, bind=engine))
+        ttl_columns = {} if ttl_columns is None else ttl_columns
+        spine_row = getattr(spine.c, SPINE_ROW_COLUMN)
+        strategy = self.get_query_strategy(engine)
+        subqueries = [strategy.point_in_time(fv, db, spine, ttl_columns.get(fv.name)) for fv in self.feature_views]
+
+        select_cols = [spine_row]
+        for subq in subqueries:
+            select_cols.extend([col for col in subq.c if col.name != SPINE_ROW_COLUMN])
+
+        base_query = db.query(*select_cols).select_from(spine)
+        for subq in subqueries:
+            base_query = base_query.outerjoin(subq, getattr(subq.c, SPINE_ROW_COLUMN) == spine_row)
+        return base_query.order_by(spine_row)
+
+    def to_df(self, engine, snapshot_date=None, entity_list=None, fetch_backend: FetchBackend = "pandas"):
         """
         this version builds a dataframe in pandas rather than return query
         it does not chunk - assume all queries can be done in memory
@@ -423,17 +1498,12 @@ class FeatureGroup(BaseModel):
         base_entity_column = ""
 
         # build subqueries
+        strategy = self.get_query_strategy(engine)
         for fv in self.feature_views:
-            if self.use_safe:
-                table_dict[fv.name] = pd.read_sql_query(
-                    fv.build_subquery_safe(db, snapshot_date, entity_list, is_subquery=False).statement, engine
-                )
-            else:
-                table_dict[fv.name] = pd.read_sql_query(
-                    fv.build_subquery(db, snapshot_date, entity_list, is_subquery=False).statement, engine
-                )
+            query = strategy.latest_row(fv, db, snapshot_date, entity_list, is_subquery=False)
+            table_dict[fv.name] = read_sql(query.statement, engine, fetch_backend)
 
-            table_entity[fv.name] = fv.enetity_column
+            table_entity[fv.name] = fv.entity_column
 
             if is_base_table:
                 base_entity_column = fv.entity_column
@@ -444,7 +1514,7 @@ class FeatureGroup(BaseModel):
         base_table = None
         for fv in self.feature_views:
             if base_table is None:
-                base_table = table_dict[fv.name].copy()
+                base_table = table_dict[fv.name]
             else:
                 right_suffix = "_y"
                 while any(
@@ -462,7 +1532,4 @@ class FeatureGroup(BaseModel):
                 keep_cols = [x for x in base_table.columns if not x.endswith(right_suffix)]
                 base_table = base_table[keep_cols]
 
-            if fv.rank_column is not None:
-                base_table = base_table[(base_table[fv.rank_column] == 1) | (base_table[fv.rank_column].isna())]
-
         return base_table
@@ -0,0 +1,126 @@
+"""
+Index advisor for feature group tables.
+
+Every query built for a group filters and partitions on its entity, event timestamp and create
+timestamp columns, which is served best by a composite index on
+`(entity, event_timestamp DESC, create_timestamp DESC)`.
+"""
+
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+
+from sqlalchemy import Index, MetaData, Table, inspect
+from tabulate import tabulate
+
+# prefix of the statement showing the query plan, per dialect
+EXPLAIN_PREFIX = {
+    "sqlite": "EXPLAIN QUERY PLAN ",
+    "postgresql": "EXPLAIN ",
+    "mysql": "EXPLAIN ",
+    "mariadb": "EXPLAIN ",
+    "duckdb": "EXPLAIN ",
+    "snowflake": "EXPLAIN ",
+}
+
+
+def get_index_columns(group) -> List[str]:
+    """
+    Columns of the recommended index of a group, in order
+    """
+    columns = [group.entity, group.event_timestamp_column, group.create_timestamp_column]
+    return [col for col in columns if col is not None]
+
+
+def get_index_name(group) -> str:
+    return f"ix_spellstore_{group.name}"
+
+
+def find_index(engine, group) -> Optional[str]:
+    """
+    Name of an existing index (or the primary key) whose leading columns are the recommended columns,
+    None if there is none
+    """
+    inspector = inspect(engine)
+    index_columns = get_index_columns(group)
+    indexes = [(ix["name"], ix["column_names"]) for ix in inspector.get_indexes(group.name)]
+    pk = inspector.get_pk_constraint(group.name)
+    if pk is not None and len(pk.get("constrained_columns", [])) > 0:
+        indexes.append((pk.get("name") or "primary key", pk["constrained_columns"]))
+    for name, column_names in indexes:
+        if list(column_names[: len(index_columns)]) == index_columns:
+            return name
+    return None
+
+
+def check_indexes(repo_config, engine, group_names: Optional[List[str]] = None) -> List[dict]:
+    """
+    Reports, per group, whether its table exists and which index supports the spellstore access pattern
+    """
+    inspector = inspect(engine)
+    groups = repo_config.groups if group_names is None else [repo_config.get_group(nm) for nm in group_names]
+    report = []
+    for group in groups:
+        table_exists = inspector.has_table(group.name)
+        report.append(
+            {
+                "group": group.name,
+                "columns": get_index_columns(group),
+                "table_exists": table_exists,
+                "index": find_index(engine, group) if table_exists else None,
+            }
+        )
+    return report
+
+
+def create_index(engine, group) -> str:
+    """
+    Creates the `(entity, event_timestamp DESC, create_timestamp DESC)` index of a group
+    """
+    tbl = Table(group.name, MetaData(), autoload_with=engine)
+    index_columns = [tbl.c[group.entity]]
+    index_columns += [tbl.c[col].desc() for col in get_index_columns(group)[1:]]
+    index = Index(get_index_name(group), *index_columns)
+    index.create(engine)
+    return index.name  # type: ignore
+
+
+def explain_statement(feature_store, group_name: str, snapshot_date: Optional[datetime] = None) -> Tuple[str, Any]:
+    """
+    EXPLAIN statement of the query `export` runs for all features of a group, with its bound parameters
+    in the paramstyle of the dialect (binds such as datetimes have no literal rendering on every dialect)
+    """
+    dialect = feature_store.engine.dialect
+    if dialect.name not in EXPLAIN_PREFIX:
+        raise ValueError(f"EXPLAIN is not supported for dialect {dialect.name}.")
+    group = feature_store.repo_config.get_group(group_name)
+    feature_group = feature_store.get_feature_group([f"{group.name}.{f.name}" for f in group.features])
+    query = feature_group.build_query(feature_store.engine, datetime.now() if snapshot_date is None else snapshot_date)
+    compiled = query.statement.compile(dialect=dialect)
+    params: Any = compiled.params
+    if dialect.positional:
+        params = tuple(params[name] for name in compiled.positiontup)
+    return EXPLAIN_PREFIX[dialect.name] + str(compiled), params
+
+
+def explain(feature_store, group_name: str, snapshot_date: Optional[datetime] = None) -> str:
+    """
+    Query plan of the query `export` runs for all features of a group, as reported by the database
+    """
+    statement, params = explain_statement(feature_store, group_name, snapshot_date)
+    with feature_store.engine.connect() as conn:
+        rows = conn.exec_driver_sql(statement, params).fetchall()
+    return "\n".join(" | ".join(str(v) for v in row) for row in rows)
+
+
+def print_index_report(report: List[dict]) -> str:
+    headers = ["group", "recommended index", "status"]
+    table = []
+    for item in report:
+        if not item["table_exists"]:
+            status = "table not found"
+        elif item["index"] is None:
+            status = "missing"
+        else:
+            status = f"ok ({item['index']})"
+        table.append([item["group"], ", ".join(item["columns"]), status])
+    return tabulate(table, headers, tablefmt="pipe")
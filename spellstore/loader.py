@@ -0,0 +1,199 @@
+"""
+Streaming bulk loader for feature group tables.
+
+The input is read in chunks, so files larger than memory can be loaded, and every chunk is written
+with the fastest insert path of the dialect: `COPY` for PostgreSQL (psycopg2), `executemany` for
+SQLite and multi-row `INSERT ... VALUES` for other databases. Declared entity and feature value types
+are used as the column types of newly created tables, and event and create timestamps given as strings
+are parsed and stored as datetimes (numeric timestamps are kept as they are).
+"""
+
+import csv
+import io
+import os
+from datetime import datetime
+from typing import Dict, List, Literal, Optional
+
+import pandas as pd
+from pandas.api.types import is_datetime64_any_dtype
+from sqlalchemy import DateTime, and_, column, exists, inspect, select, table
+
+from spellbook.util import create_temp_table, sqlalchemy_type_from_value_type
+
+IfExists = Literal["replace", "append", "fail"]
+
+STAGING_TABLE = "spellstore_staging"
+
+# stays below the bind parameter limit of common drivers (e.g. 2100 for SQL Server)
+MULTI_INSERT_MAX_PARAMS = 2000
+
+PANDAS_DTYPES = {str: str, int: "Int64", float: "float64"}
+
+
+def get_value_types(repo_config, group_name: str) -> Dict[str, type]:
+    """
+    Declared value types of the entity and feature columns of a group
+    """
+    group = repo_config.get_group(group_name)
+    value_types = {f.name: f.value_type for f in group.features}
+    for e in repo_config.entities:
+        if e.name == group.entity and e.value_type is not None:
+            value_types[group.entity] = e.value_type
+    return value_types
+
+
+def get_timestamp_columns(repo_config, group_name: str) -> List[str]:
+    group = repo_config.get_group(group_name)
+    return [col for col in [group.event_timestamp_column, group.create_timestamp_column] if col is not None]
+
+
+def parse_timestamps(chunk_df: pd.DataFrame, timestamp_columns: List[str]) -> pd.DataFrame:
+    """
+    Converts the timestamp columns of chunk_df read as strings to datetimes in place, so the snapshot
+    and ttl comparisons of queries compare datetimes rather than text. Returns chunk_df.
+    """
+    for col in timestamp_columns:
+        if col in chunk_df.columns and chunk_df[col].dtype == object:
+            try:
+                chunk_df[col] = pd.to_datetime(chunk_df[col])
+            except (TypeError, ValueError):
+                pass
+    return chunk_df
+
+
+def get_dedupe_columns(repo_config, group_name: str) -> List[str]:
+    group = repo_config.get_group(group_name)
+    columns = [group.entity, group.event_timestamp_column, group.create_timestamp_column]
+    return [col for col in columns if col is not None]
+
+
+def psql_copy(pd_table, conn, keys, data_iter):
+    """
+    `DataFrame.to_sql` insert method streaming the rows through `COPY ... FROM STDIN`
+    """
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(data_iter)
+    buffer.seek(0)
+
+    dbapi_conn = conn.connection
+    with dbapi_conn.cursor() as cursor:
+        columns = ", ".join(f'"{k}"' for k in keys)
+        table_name = f'"{pd_table.schema}"."{pd_table.name}"' if pd_table.schema else f'"{pd_table.name}"'
+        cursor.copy_expert(f"COPY {table_name} ({columns}) FROM STDIN WITH CSV", buffer)
+
+
+def get_insert_method(engine, num_columns: int):
+    """
+    The `DataFrame.to_sql` method and chunksize used for a dialect
+    """
+    if engine.dialect.name == "postgresql" and engine.dialect.driver == "psycopg2":
+        return psql_copy, None
+    if engine.dialect.name == "sqlite":
+        # executemany of a single prepared statement is the fastest path for SQLite
+        return None, None
+    return "multi", max(1, MULTI_INSERT_MAX_PARAMS // max(num_columns, 1))
+
+
+def read_chunks(
+    input_file: str,
+    chunksize: int,
+    value_types: Optional[Dict[str, type]] = None,
+    timestamp_columns: Optional[List[str]] = None,
+):
+    """
+    Reads a csv or parquet file in DataFrames of at most chunksize rows, with the timestamp_columns
+    parsed as datetimes
+    """
+    value_types = {} if value_types is None else value_types
+    timestamp_columns = [] if timestamp_columns is None else timestamp_columns
+    _, ext = os.path.splitext(input_file)
+    if ext.lower() in [".parquet", ".pq"]:
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError(
+                "pyarrow is required to load parquet files, install it with `pip install spellstore[arrow]`"
+            )
+        for batch in pq.ParquetFile(input_file).iter_batches(batch_size=chunksize):
+            yield parse_timestamps(batch.to_pandas(), timestamp_columns)
+        return
+
+    header = pd.read_csv(input_file, nrows=0).columns
+    dtype = {col: PANDAS_DTYPES[vt] for col, vt in value_types.items() if col in header and vt in PANDAS_DTYPES}
+    parse_dates = [col for col, vt in value_types.items() if col in header and vt is datetime]
+    for chunk_df in pd.read_csv(input_file, chunksize=chunksize, dtype=dtype, parse_dates=parse_dates):
+        yield parse_timestamps(chunk_df, timestamp_columns)
+
+
+def insert_deduplicated(conn, table_name: str, chunk_df: pd.DataFrame, dedupe_columns: List[str]):
+    """
+    Inserts the rows of chunk_df whose dedupe_columns do not match an existing row of the table,
+    going through a temporary staging table so the comparison runs in the database.
+    """
+    staging = create_temp_table(conn, STAGING_TABLE, chunk_df)
+    try:
+        target = table(table_name, *[column(col) for col in chunk_df.columns])
+        existing = target.alias("existing")
+        is_loaded = exists(
+            select(existing.c[dedupe_columns[0]]).where(
+                and_(*[existing.c[col].is_not_distinct_from(staging.c[col]) for col in dedupe_columns])
+            )
+        )
+        new_rows = select(*[staging.c[col] for col in chunk_df.columns]).where(~is_loaded)
+        result = conn.execute(target.insert().from_select(list(chunk_df.columns), new_rows))
+    finally:
+        staging.drop(conn)
+    return result.rowcount
+
+
+def load(
+    repo_config,
+    engine,
+    input_file: str,
+    group_name: str,
+    if_exists: IfExists = "replace",
+    chunksize: int = 100000,
+    dedupe=False,
+):
+    """
+    Loads input_file (csv or parquet) into the table of group_name chunk by chunk, returns the number
+    of rows read. With dedupe, rows whose (entity, event timestamp, create timestamp) are already in
+    the table, or earlier in the file, are skipped, which makes re-running an append idempotent.
+    """
+    if if_exists not in ["replace", "append", "fail"]:
+        raise ValueError(f"if_exists must be one of (replace, append, fail) - got: {if_exists}.")
+    value_types = get_value_types(repo_config, group_name)
+    dedupe_columns = get_dedupe_columns(repo_config, group_name)
+    timestamp_columns = get_timestamp_columns(repo_config, group_name)
+
+    table_exists = if_exists != "replace" and inspect(engine).has_table(group_name)
+    if table_exists and if_exists == "fail":
+        raise ValueError(f"Table {group_name} already exists.")
+
+    num_rows = 0
+    for chunk_df in read_chunks(input_file, chunksize, value_types, timestamp_columns):
+        num_rows += chunk_df.shape[0]
+        if dedupe:
+            # the first row is kept, as across chunks, so the result doesn't depend on chunksize
+            chunk_df = chunk_df.drop_duplicates(dedupe_columns, keep="first")
+        with engine.begin() as conn:
+            if dedupe and table_exists:
+                insert_deduplicated(conn, group_name, chunk_df, dedupe_columns)
+            else:
+                dtype = {col: sqlalchemy_type_from_value_type(vt) for col, vt in value_types.items()}
+                dtype = {col: sql_type for col, sql_type in dtype.items() if col in chunk_df and sql_type is not None}
+                for col in timestamp_columns:
+                    if col in chunk_df and is_datetime64_any_dtype(chunk_df[col]):
+                        dtype[col] = DateTime()
+                method, insert_chunksize = get_insert_method(engine, chunk_df.shape[1])
+                chunk_df.to_sql(
+                    group_name,
+                    conn,
+                    if_exists="append" if table_exists else if_exists,
+                    index=False,
+                    dtype=dtype,
+                    method=method,
+                    chunksize=insert_chunksize,
+                )
+        table_exists = True
+    return num_rows
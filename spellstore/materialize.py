@@ -0,0 +1,157 @@
+"""
+Incremental materialization of the latest row per entity of a feature group.
+
+The snapshot (a local file or a database table) holds the latest row per entity as of the
+last run. Its high-water mark is the largest event timestamp it contains: later runs only
+rank rows with `event_timestamp >= watermark` and merge them into the previous snapshot,
+rather than re-ranking the full history of the group. A snapshot as of a date before the
+watermark can't be derived from the previous snapshot, which already holds later rows, so it is
+fully refreshed instead.
+"""
+
+import os
+from datetime import datetime
+from typing import Optional
+
+import pandas as pd
+from sqlalchemy import inspect
+
+from spellbook.feature_store import FeatureGroup, FeatureView
+from spellbook.writer import get_writer, infer_format
+
+
+def get_watermark(snapshot_df: Optional[pd.DataFrame], event_timestamp_column: Optional[str]):
+    if snapshot_df is None or event_timestamp_column is None or snapshot_df.shape[0] == 0:
+        return None
+    watermark = snapshot_df[event_timestamp_column].max()
+    if isinstance(watermark, pd.Timestamp):
+        return watermark.to_pydatetime()
+    return watermark.item() if hasattr(watermark, "item") else watermark
+
+
+def is_after(watermark, snapshot_date) -> bool:
+    """
+    Whether the watermark of a snapshot is later than snapshot_date, comparing datetimes stored as
+    strings (e.g. by SQLite) as datetimes
+    """
+    if watermark is None or snapshot_date is None:
+        return False
+    try:
+        return pd.Timestamp(watermark) > pd.Timestamp(snapshot_date)
+    except (TypeError, ValueError):
+        return watermark > snapshot_date
+
+
+def read_snapshot(engine, output_file: Optional[str] = None, output_table: Optional[str] = None, output_format=None):
+    """
+    Reads a previously materialized snapshot, returns None if there is none yet
+    """
+    if output_table is not None:
+        if not inspect(engine).has_table(output_table):
+            return None
+        return pd.read_sql_table(output_table, engine)
+
+    if output_file is None or not os.path.exists(output_file):
+        return None
+    output_format = infer_format(output_file) if output_format is None or output_format == "" else output_format
+    if output_format == "csv":
+        return pd.read_csv(output_file, index_col=0)
+    elif output_format == "parquet":
+        return pd.read_parquet(output_file)
+    elif output_format == "feather":
+        return pd.read_feather(output_file)
+    raise ValueError(f"Materialized snapshots must be csv, parquet or feather files - got: {output_format}.")
+
+
+def merge_snapshot(previous_df: Optional[pd.DataFrame], delta_df: pd.DataFrame, feature_view: FeatureView):
+    """
+    Latest row per entity across the previous snapshot and the newly ranked rows
+    """
+    if previous_df is None or previous_df.shape[0] == 0:
+        return delta_df.reset_index(drop=True)
+    if delta_df.shape[0] == 0:
+        return previous_df.reset_index(drop=True)
+
+    previous_df = previous_df[delta_df.columns]
+    sort_cols = [feature_view.event_timestamp_column]
+    if feature_view.create_timestamp_column is not None:
+        sort_cols.append(feature_view.create_timestamp_column)
+    for col in sort_cols:
+        if previous_df[col].dtype != delta_df[col].dtype:
+            # e.g. a parquet snapshot holds datetimes while SQLite returns strings
+            previous_df = previous_df.assign(**{col: pd.to_datetime(previous_df[col])})
+            delta_df = delta_df.assign(**{col: pd.to_datetime(delta_df[col])})
+
+    snapshot_df = pd.concat([previous_df, delta_df], ignore_index=True)
+    snapshot_df = snapshot_df.sort_values(sort_cols, kind="mergesort")
+    snapshot_df = snapshot_df.drop_duplicates(feature_view.entity_column, keep="last")
+    return snapshot_df.sort_values(feature_view.entity_column, kind="mergesort").reset_index(drop=True)
+
+
+def materialize(
+    feature_store,
+    group_name: str,
+    output_file: Optional[str] = None,
+    output_table: Optional[str] = None,
+    snapshot_date: Optional[datetime] = None,
+    output_format=None,
+    full_refresh=False,
+):
+    """
+    Materializes the latest row per entity of a group as of snapshot_date, into output_file or
+    output_table. Only rows at or after the watermark of an existing snapshot are scanned, unless
+    full_refresh is set or snapshot_date is before the watermark. Returns the snapshot DataFrame.
+    """
+    if (output_file is None) == (output_table is None):
+        raise ValueError("Exactly one of output_file or output_table must be provided")
+    if output_file is not None:
+        output_format = infer_format(output_file) if output_format is None or output_format == "" else output_format
+        if output_format not in ["csv", "parquet", "feather"]:
+            raise ValueError(f"Materialized snapshots must be csv, parquet or feather files - got: {output_format}.")
+    if snapshot_date is None:
+        snapshot_date = datetime.now()
+
+    group = feature_store.repo_config.get_group(group_name)
+    event_col = group.event_timestamp_column
+    create_col = group.create_timestamp_column
+    columns = [f.name for f in group.features]
+    columns += [col for col in [event_col, create_col] if col is not None and col not in columns]
+    feature_view = FeatureView(
+        name=group_name,
+        columns=columns,
+        entity_column=group.entity,
+        event_timestamp_column=event_col,
+        create_timestamp_column=create_col,
+    )
+    feature_group = FeatureGroup(
+        feature_views=[feature_view],
+        full_join=False,
+        use_safe=feature_store.use_safe,
+        query_strategy=feature_store.query_strategy,
+    )
+
+    previous_df = None
+    if not full_refresh and event_col is not None:
+        previous_df = read_snapshot(feature_store.engine, output_file, output_table, output_format)
+    watermark = get_watermark(previous_df, event_col)
+    if is_after(watermark, snapshot_date):
+        # the previous snapshot holds rows later than snapshot_date, rank the full history instead
+        previous_df, watermark = None, None
+
+    query = feature_group.build_query(feature_store.engine, snapshot_date=snapshot_date, start_date=watermark)
+    delta_df = pd.read_sql_query(query.statement, feature_store.engine)
+    delta_df = delta_df[[feature_view.entity_column] + columns]
+    snapshot_df = merge_snapshot(previous_df, delta_df, feature_view) if event_col is not None else delta_df
+
+    if output_table is not None:
+        snapshot_df.to_sql(output_table, feature_store.engine, if_exists="replace", index=False)
+    elif output_file is not None:
+        # write next to the previous snapshot and swap, so a failed run keeps the old snapshot
+        temp_file = f"{output_file}.tmp"
+        value_types = feature_store.get_value_types([f"{group_name}.{col}" for col in columns])
+        with get_writer(temp_file, output_format, value_types) as writer:
+            writer.write(snapshot_df)
+        os.replace(temp_file, output_file)
+    else:
+        raise ValueError("Exactly one of output_file or output_table must be provided")
+    return snapshot_df
@@ -0,0 +1,200 @@
+"""
+Per-stage timings and counters for export and join.
+
+Stages are timed exclusively: time spent in a nested stage (e.g. the `compile` and `execute` of a
+query issued while pandas fetches a chunk) is not counted towards the enclosing `fetch` stage, so
+the stage times add up to the traced wall time. `compile` and `execute` are measured with SQLAlchemy
+engine events, the other stages are reported by `FeatureStore`:
+
+- query_build: building the SQLAlchemy query
+- compile: compiling the query to SQL (and other client side work before the cursor executes)
+- execute: executing the statement on the cursor
+- fetch: reading result rows into DataFrames
+- merge: joining the fetched features onto the entity DataFrame
+- write: writing chunks to the output file
+"""
+
+import json
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+
+from sqlalchemy import event
+
+STAGES = ["query_build", "compile", "execute", "fetch", "merge", "write"]
+
+
+class NullTracer(object):
+    """
+    Tracer interface which records nothing, used when tracing is disabled
+    """
+
+    enabled = False
+
+    @contextmanager
+    def stage(self, name: str):
+        yield
+
+    def iter_chunks(self, chunks, name="fetch"):
+        return chunks
+
+    def record_chunk(self, df):
+        pass
+
+
+NULL_TRACER = NullTracer()
+
+
+class Tracer(NullTracer):
+    """
+    Collects stage timings, and counts the rows, bytes and chunks produced and the queries issued.
+    callback (if provided) is called with a dict for every finished stage, chunk and query, and
+    progress=True shows a tqdm progress bar of the rows produced.
+    """
+
+    enabled = True
+
+    def __init__(self, callback: Optional[Callable[[dict], None]] = None, progress=False, description=None):
+        self.callback = callback
+        self.stages: Dict[str, dict] = {name: {"time": 0.0, "count": 0} for name in STAGES}
+        self.rows = 0
+        self.bytes = 0
+        self.chunks = 0
+        self.queries = 0
+        self.start_time = time.perf_counter()
+        self.end_time: Optional[float] = None
+        self.engine = None
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._progress = None
+        if progress:
+            from tqdm import tqdm
+
+            self._progress = tqdm(unit=" rows", unit_scale=True, desc=description)
+
+    def _stack(self) -> list:
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    def start(self, name: str):
+        self._stack().append([name, time.perf_counter(), 0.0])
+
+    def stop(self, name: str):
+        stack = self._stack()
+        if len(stack) == 0 or stack[-1][0] != name:
+            return
+        _, start, child_time = stack.pop()
+        elapsed = time.perf_counter() - start
+        if len(stack) > 0:
+            stack[-1][2] += elapsed
+        duration = elapsed - child_time
+        with self._lock:
+            stats = self.stages.setdefault(name, {"time": 0.0, "count": 0})
+            stats["time"] += duration
+            stats["count"] += 1
+        if self.callback is not None:
+            self.callback({"event": "stage", "stage": name, "duration": duration})
+
+    @contextmanager
+    def stage(self, name: str):
+        self.start(name)
+        try:
+            yield
+        finally:
+            self.stop(name)
+
+    def iter_chunks(self, chunks, name="fetch"):
+        """
+        Times every step of the chunks iterator as the stage name
+        """
+        iterator = iter(chunks)
+        while True:
+            self.start(name)
+            try:
+                chunk = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                self.stop(name)
+            yield chunk
+
+    def record_chunk(self, df):
+        num_rows = df.shape[0] if hasattr(df, "shape") else df.num_rows
+        num_bytes = int(df.memory_usage().sum()) if hasattr(df, "memory_usage") else df.nbytes
+        with self._lock:
+            self.rows += num_rows
+            self.bytes += num_bytes
+            self.chunks += 1
+        if self._progress is not None:
+            self._progress.update(num_rows)
+        if self.callback is not None:
+            self.callback({"event": "chunk", "rows": num_rows, "bytes": num_bytes})
+
+    def _before_execute(self, conn, clauseelement, multiparams, params, execution_options):
+        self.start("compile")
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.stop("compile")
+        with self._lock:
+            self.queries += 1
+        if self.callback is not None:
+            self.callback({"event": "query", "statement": statement})
+        self.start("execute")
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.stop("execute")
+
+    def _handle_error(self, context):
+        self.stop("execute")
+        self.stop("compile")
+
+    def attach(self, engine):
+        self.engine = engine
+        event.listen(engine, "before_execute", self._before_execute)
+        event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+        event.listen(engine, "handle_error", self._handle_error)
+
+    def detach(self):
+        if self.engine is not None:
+            event.remove(self.engine, "before_execute", self._before_execute)
+            event.remove(self.engine, "before_cursor_execute", self._before_cursor_execute)
+            event.remove(self.engine, "after_cursor_execute", self._after_cursor_execute)
+            event.remove(self.engine, "handle_error", self._handle_error)
+            self.engine = None
+        self.end_time = time.perf_counter()
+        if self._progress is not None:
+            self._progress.close()
+
+    def to_dict(self) -> dict:
+        end_time = time.perf_counter() if self.end_time is None else self.end_time
+        return {
+            "wall_time": end_time - self.start_time,
+            "stages": {name: dict(stats) for name, stats in self.stages.items()},
+            "rows": self.rows,
+            "bytes": self.bytes,
+            "chunks": self.chunks,
+            "queries": self.queries,
+        }
+
+    def dump(self, path: str):
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+
+@contextmanager
+def trace(feature_store, callback: Optional[Callable[[dict], None]] = None, progress=False):
+    """
+    Traces every export and join of feature_store within the block, yields the Tracer
+    """
+    tracer = Tracer(callback, progress)
+    previous = feature_store.tracer
+    feature_store.tracer = tracer
+    tracer.attach(feature_store.engine)
+    try:
+        yield tracer
+    finally:
+        tracer.detach()
+        feature_store.tracer = previous
@@ -0,0 +1,196 @@
+"""
+Low latency lookup of the latest feature values per entity for model serving.
+
+Lookups are served from an in-process LRU cache with a ttl per feature view; cache misses
+from concurrent callers are coalesced into a single batched `IN (...)` query per feature view.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from spellbook.feature_store import FeatureGroup
+
+_MISSING = object()
+
+
+class TTLCache(object):
+    """
+    Thread safe LRU cache where every entry expires after its own ttl (in seconds)
+    """
+
+    def __init__(self, maxsize=100000):
+        self.maxsize = maxsize
+        self._cache: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=_MISSING):
+        with self._lock:
+            item = self._cache.get(key, _MISSING)
+            if item is _MISSING:
+                return default
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._cache[key]
+                return default
+            self._cache.move_to_end(key)
+            return value
+
+    def put(self, key, value, ttl: float):
+        with self._lock:
+            self._cache[key] = (time.monotonic() + ttl, value)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    def __len__(self):
+        return len(self._cache)
+
+
+class _Batch(object):
+    def __init__(self):
+        self.keys: set = set()
+        self.done = threading.Event()
+        self.results: dict = {}
+        self.error: Optional[Exception] = None
+
+
+class RequestCoalescer(object):
+    """
+    Coalesces concurrent `get` calls into a single call of fetch_fn. The first caller of a batch
+    waits batch_window seconds for other callers to add their keys, then fetches every key at
+    once and hands each caller its own results.
+    """
+
+    def __init__(self, fetch_fn, batch_window=0.005):
+        self.fetch_fn = fetch_fn
+        self.batch_window = batch_window
+        self._pending: Optional[_Batch] = None
+        self._lock = threading.Lock()
+
+    def get(self, keys) -> dict:
+        with self._lock:
+            batch = self._pending
+            is_leader = batch is None
+            if batch is None:
+                batch = self._pending = _Batch()
+            batch.keys.update(keys)
+
+        if is_leader:
+            if self.batch_window > 0:
+                time.sleep(self.batch_window)
+            with self._lock:
+                self._pending = None
+            try:
+                batch.results = self.fetch_fn(list(batch.keys))
+            except Exception as e:
+                batch.error = e
+            finally:
+                batch.done.set()
+        else:
+            batch.done.wait()
+
+        if batch.error is not None:
+            raise batch.error
+        return {k: batch.results.get(k) for k in keys}
+
+
+class OnlineStore(object):
+    """
+    Serves the latest value of features per entity.
+
+    cache_ttl is the number of seconds a fetched row is served from the cache, which can be
+    overridden per feature view (group name) with cache_ttl_overrides. Entities without any row
+    are cached too, so repeated lookups of unknown entities do not hit the database.
+    """
+
+    def __init__(
+        self,
+        feature_store,
+        cache_ttl: float = 60,
+        cache_ttl_overrides: Optional[Dict[str, float]] = None,
+        maxsize=100000,
+        batch_window=0.005,
+    ):
+        self.feature_store = feature_store
+        self.cache_ttl = cache_ttl
+        self.cache_ttl_overrides = {} if cache_ttl_overrides is None else cache_ttl_overrides
+        self.cache = TTLCache(maxsize)
+        self.batch_window = batch_window
+        self._coalescers: Dict[tuple, RequestCoalescer] = {}
+        self._lock = threading.Lock()
+
+    def _get_coalescer(self, feature_view) -> RequestCoalescer:
+        key = (feature_view.name, tuple(feature_view.columns))
+        with self._lock:
+            if key not in self._coalescers:
+
+                def fetch(entity_ids):
+                    return self._fetch_view(feature_view, entity_ids)
+
+                self._coalescers[key] = RequestCoalescer(fetch, self.batch_window)
+            return self._coalescers[key]
+
+    def _fetch_view(self, feature_view, entity_ids):
+        """
+        Latest row per entity for a single feature view, as a dict of entity -> row dict.
+        Rows are added to the cache, including None for entities without rows.
+        """
+        feature_group = FeatureGroup(
+            feature_views=[feature_view],
+            full_join=False,
+            use_safe=self.feature_store.use_safe,
+            query_strategy=self.feature_store.query_strategy,
+        )
+        ttl = self.cache_ttl_overrides.get(feature_view.name, self.cache_ttl)
+        results = {}
+        num_splits = (len(entity_ids) // 999) + 1
+        for elist in np.array_split(np.array(entity_ids, dtype=object), num_splits):
+            if len(elist) == 0:
+                continue
+            query = feature_group.build_query(self.feature_store.engine, datetime.now(), elist.tolist())
+            df = pd.read_sql_query(query.statement, self.feature_store.engine)
+            df = df.loc[:, ~df.columns.duplicated()].drop_duplicates(feature_view.entity_column)
+            for row in df.to_dict("records"):
+                results[row[feature_view.entity_column]] = {col: row.get(col) for col in feature_view.columns}
+
+        for entity_id in entity_ids:
+            row = results.get(entity_id)
+            self.cache.put((feature_view.name, tuple(feature_view.columns), entity_id), row, ttl)
+        return results
+
+    def get_online_features(self, feature_list: List[str], entity_ids: list) -> pd.DataFrame:
+        """
+        Returns a DataFrame with one row per entity id (in the order given) holding the latest
+        value of every requested feature, missing values are None.
+        """
+        feature_group = self.feature_store.get_feature_group(feature_list)
+        entity_column = feature_group.feature_views[0].entity_column
+        output = pd.DataFrame({entity_column: list(entity_ids)})
+
+        for fv in feature_group.feature_views:
+            rows = {}
+            missing = []
+            for entity_id in entity_ids:
+                row = self.cache.get((fv.name, tuple(fv.columns), entity_id))
+                if row is _MISSING:
+                    missing.append(entity_id)
+                else:
+                    rows[entity_id] = row
+            if len(missing) > 0:
+                rows.update(self._get_coalescer(fv).get(missing))
+
+            for col in fv.columns:
+                if col == entity_column:
+                    continue
+                output[col] = [None if rows.get(e) is None else rows[e].get(col) for e in entity_ids]
+        return output
@@ -0,0 +1,233 @@
+"""
+Resumable export of a feature group, paged by keyset pagination over the ordered entity keys.
+
+Every page holds the next page_size entity keys after the last exported one (`lower < entity <= upper`,
+pushed into every feature view as an `EntityPage`), and is fetched, written and then recorded in a
+checkpoint file. An interrupted export resumes after the last completed page: output written by an
+incomplete page is discarded first (a csv file is truncated to its checkpointed size, dataset files
+of later pages are removed), and pages are queried as of the snapshot date recorded in the checkpoint.
+Pages failing with a transient database error (a lost connection) are retried. The checkpoint is removed once the export
+completes.
+
+Only csv files and parquet dataset directories can be appended to page by page.
+"""
+
+import json
+import os
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import column, func, select, table
+from sqlalchemy.exc import DBAPIError
+
+from spellbook.entity_filter import EntityPage
+from spellbook.writer import CsvWriter, DatasetWriter, infer_format
+
+CHECKPOINT_VERSION = 1
+CHECKPOINT_SUFFIX = ".checkpoint.json"
+PAGE_FILE_PREFIX = "part-page"
+RESUMABLE_FORMATS = ["csv", "dataset"]
+
+
+def default_checkpoint_file(output_file: str) -> str:
+    return output_file.rstrip("/\\") + CHECKPOINT_SUFFIX
+
+
+def read_checkpoint(checkpoint_file: str) -> Optional[dict]:
+    if not os.path.exists(checkpoint_file):
+        return None
+    with open(checkpoint_file) as f:
+        return json.load(f)
+
+
+def write_checkpoint(checkpoint_file: str, checkpoint: dict):
+    # written atomically, so an interrupted write leaves the previous checkpoint in place
+    temp_path = f"{checkpoint_file}.{os.getpid()}.tmp"
+    with open(temp_path, "w") as f:
+        json.dump(checkpoint, f, indent=2)
+    os.replace(temp_path, checkpoint_file)
+
+
+def is_transient_error(error: Exception, engine=None) -> bool:
+    """
+    Errors worth retrying a page for: lost connections, as flagged by SQLAlchemy or recognized by the
+    dialect of engine. Other errors (missing tables, syntax, locks or permissions) fail right away.
+    """
+    if not isinstance(error, DBAPIError):
+        return False
+    if error.connection_invalidated:
+        return True
+    return engine is not None and bool(engine.dialect.is_disconnect(error.orig, None, None))
+
+
+def with_retries(fn, max_retries=3, retry_wait=1.0, engine=None):
+    """
+    Calls fn, retrying up to max_retries times on transient errors (of engine) with exponential backoff
+    """
+    attempt = 0
+    while True:
+        try:
+            return fn()
+        except Exception as error:
+            if attempt >= max_retries or not is_transient_error(error, engine):
+                raise
+            time.sleep(retry_wait * 2**attempt)
+            attempt += 1
+
+
+def next_page_upper(engine, feature_group, lower=None, page_size=100000):
+    """
+    Largest of the next page_size entity keys after lower (None once there are no more entities), over
+    the feature views the export's entities come from
+    """
+    feature_views = feature_group.feature_views if feature_group.full_join else feature_group.feature_views[:1]
+    uppers: List = []
+    with engine.connect() as conn:
+        for fv in feature_views:
+            entity = column(fv.entity_column)
+            keys = select(entity).select_from(table(fv.name, entity)).where(entity.isnot(None))
+            if lower is not None:
+                keys = keys.where(entity > lower)
+            keys = keys.distinct().order_by(entity).limit(page_size).subquery()
+            upper = conn.execute(select(func.max(keys.c[fv.entity_column]))).scalar()
+            if upper is not None:
+                uppers.append(upper)
+    # with several views, the smallest upper bound holds at most page_size keys of each view
+    return min(uppers) if len(uppers) > 0 else None
+
+
+def _page_number(file_name: str) -> Optional[int]:
+    if not file_name.startswith(PAGE_FILE_PREFIX):
+        return None
+    digits = file_name[len(PAGE_FILE_PREFIX) :].split("-", 1)[0]
+    return int(digits) if digits.isdigit() else None
+
+
+def discard_incomplete_output(output_file: str, output_format: str, checkpoint: Optional[dict]):
+    """
+    Removes output written after the checkpoint (all of the export's output if there is none)
+    """
+    if output_format == "csv":
+        if os.path.exists(output_file):
+            with open(output_file, "r+b") as f:
+                f.truncate(0 if checkpoint is None else checkpoint["output_bytes"])
+        return
+    num_pages = 0 if checkpoint is None else checkpoint["pages"]
+    for root, _, file_names in os.walk(output_file):
+        for file_name in file_names:
+            page_number = _page_number(file_name)
+            if page_number is not None and page_number >= num_pages:
+                os.remove(os.path.join(root, file_name))
+
+
+def _to_json_value(value):
+    if hasattr(value, "item"):
+        value = value.item()
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def _to_snapshot_date(value):
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            return value
+    return value
+
+
+def resumable_export(
+    feature_store,
+    feature_list: List[str],
+    output_file: str,
+    snapshot_date: Optional[datetime] = None,
+    page_size=100000,
+    checkpoint_file: Optional[str] = None,
+    output_format: Optional[str] = None,
+    max_retries=3,
+    retry_wait=1.0,
+    partition_cols: Optional[List[str]] = None,
+) -> Dict:
+    """
+    Exports the feature group to output_file in pages of page_size entities, resuming from
+    checkpoint_file (defaults to `<output_file>.checkpoint.json`) if it exists. Returns a summary of
+    the export, with the number of pages and rows. partition_cols partitions a dataset output.
+    """
+    if output_format is None or output_format == "":
+        output_format = infer_format(output_file, partition_cols)
+    if output_format not in RESUMABLE_FORMATS:
+        raise ValueError(f"Resumable exports write one of {RESUMABLE_FORMATS} - got: {output_format}.")
+    if partition_cols and output_format != "dataset":
+        raise ValueError(f"partition_cols are only supported by dataset outputs - got: {output_format}.")
+    if page_size < 1:
+        raise ValueError(f"page_size must be positive - got: {page_size}.")
+    checkpoint_file = default_checkpoint_file(output_file) if checkpoint_file is None else checkpoint_file
+
+    checkpoint = read_checkpoint(checkpoint_file)
+    if checkpoint is not None:
+        if checkpoint.get("version") != CHECKPOINT_VERSION or checkpoint["feature_list"] != feature_list:
+            raise ValueError(f"{checkpoint_file} is the checkpoint of another export, remove it to start over.")
+        checkpoint_snapshot_date = _to_snapshot_date(checkpoint["snapshot_date"])
+        if snapshot_date is not None and snapshot_date != checkpoint_snapshot_date:
+            raise ValueError(
+                f"{checkpoint_file} was exported as of {checkpoint['snapshot_date']}, not {snapshot_date}."
+            )
+        snapshot_date = checkpoint_snapshot_date
+    discard_incomplete_output(output_file, output_format, checkpoint)
+    if checkpoint is None:
+        snapshot_date = datetime.now() if snapshot_date is None else snapshot_date
+        checkpoint = {
+            "version": CHECKPOINT_VERSION,
+            "feature_list": feature_list,
+            "output_file": output_file,
+            "format": output_format,
+            "snapshot_date": _to_json_value(snapshot_date),
+            "page_size": page_size,
+            "pages": 0,
+            "num_rows": 0,
+            "last_key": None,
+            "output_bytes": 0,
+        }
+
+    feature_group = feature_store.get_feature_group(feature_list)
+    value_types = feature_store.get_value_types(feature_list)
+    tracer = feature_store.tracer
+
+    def fetch_page(page):
+        chunks = feature_store._iter_feature_group(feature_group, snapshot_date, page, batch_size=None, strategy="in")
+        return next(iter(chunks))
+
+    while True:
+        lower = checkpoint["last_key"]
+        with tracer.stage("query_build"):
+            upper = with_retries(
+                lambda: next_page_upper(feature_store.engine, feature_group, lower, page_size),
+                max_retries,
+                retry_wait,
+                feature_store.engine,
+            )
+        if upper is None:
+            break
+        page = EntityPage(lower, upper)
+        page_df = with_retries(lambda: fetch_page(page), max_retries, retry_wait, feature_store.engine)
+        tracer.record_chunk(page_df)
+
+        with tracer.stage("write"):
+            if output_format == "csv":
+                writer = CsvWriter(output_file, value_types, append=checkpoint["pages"] > 0)
+            else:
+                writer = DatasetWriter(output_file, value_types, append=True, partition_cols=partition_cols)
+                writer.prefix = f"page{checkpoint['pages']:06d}"
+            if output_format == "csv" or page_df.shape[0] > 0:
+                writer.write(page_df)
+            writer.close()
+
+        checkpoint["pages"] += 1
+        checkpoint["num_rows"] += page_df.shape[0]
+        checkpoint["last_key"] = _to_json_value(upper)
+        checkpoint["output_bytes"] = os.path.getsize(output_file) if output_format == "csv" else 0
+        write_checkpoint(checkpoint_file, checkpoint)
+
+    if os.path.exists(checkpoint_file):
+        os.remove(checkpoint_file)
+    return {key: checkpoint[key] for key in ["output_file", "format", "snapshot_date", "pages", "num_rows"]}
@@ -0,0 +1,283 @@
+"""
+Dialect aware query strategies for the two constructs every export and join is built from: the
+latest row per entity of a feature view as of a snapshot date, and the point-in-time join of a
+feature view against an uploaded spine of labels.
+
+- window: `row_number() over (partition by ...)` filtered to the first row, any SQL:2003 database
+- group_by: `max()` + group by joined back to the view, for databases without window functions
+- distinct_on: `SELECT DISTINCT ON (entity) ... ORDER BY entity, event_timestamp DESC` (PostgreSQL, DuckDB)
+- qualify: the window form filtered with `QUALIFY` rather than an outer query (DuckDB, Snowflake, ...)
+- asof: `qualify` for latest rows, and a native `ASOF JOIN` for point-in-time joins (DuckDB)
+
+"auto" picks the cheapest strategy the engine's dialect supports, from `DIALECT_STRATEGIES`.
+"""
+
+from typing import Dict, List, Literal, Optional
+
+from sqlalchemy import and_, column, func, table
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import scoped_session, sessionmaker
+from sqlalchemy.sql import roles
+from sqlalchemy.sql.expression import ClauseElement, Join
+from sqlalchemy.sql.traversals import InternalTraversal
+
+QueryStrategyName = Literal["auto", "window", "group_by", "distinct_on", "qualify", "asof"]
+
+
+class Qualify(roles.StatementOptionRole, ClauseElement):
+    """
+    `QUALIFY <condition>` clause, attached to a query as a suffix so it renders after the WHERE clause
+    """
+
+    __visit_name__ = "qualify"
+    _traverse_internals = [("condition", InternalTraversal.dp_clauseelement)]
+    inherit_cache = True
+
+    def __init__(self, condition):
+        self.condition = condition
+
+
+@compiles(Qualify)
+def _compile_qualify(element, compiler, **kw):
+    return "QUALIFY " + compiler.process(element.condition, **kw)
+
+
+class AsofJoin(Join):
+    """
+    `left ASOF JOIN right ON <equality conditions> AND <one inequality>`, every left row is matched
+    to the closest right row satisfying the inequality
+    """
+
+    __visit_name__ = "asof_join"
+    inherit_cache = True
+
+
+@compiles(AsofJoin)
+def _compile_asof_join(join, compiler, **kw):
+    kw.pop("asfrom", None)
+    return (
+        compiler.process(join.left, asfrom=True, **kw)
+        + " ASOF JOIN "
+        + compiler.process(join.right, asfrom=True, **kw)
+        + " ON "
+        + compiler.process(join.onclause, **kw)
+    )
+
+
+def _latest_order_by(fv, view):
+    # latest event timestamp first, ties broken by the latest create timestamp
+    order_by = [view.c[fv.event_timestamp_column].desc()]
+    if fv.create_timestamp_column is not None:
+        order_by.append(view.c[fv.create_timestamp_column].desc())
+    return order_by
+
+
+def _view_table(fv):
+    columns = list(fv.projected_columns)
+    for col in [fv.event_timestamp_column, fv.create_timestamp_column]:
+        if col is not None and col not in columns:
+            columns.append(col)
+    return table(fv.name, *[column(col) for col in columns])
+
+
+def _point_in_time_conditions(fv, view, spine, ttl_column=None):
+    from spellbook.feature_store import SPINE_ENTITY_COLUMN, SPINE_EVENT_TIMESTAMP_COLUMN
+
+    conditions = [view.c[fv.entity_column] == spine.c[SPINE_ENTITY_COLUMN]]
+    if fv.event_timestamp_column is not None:
+        conditions.append(view.c[fv.event_timestamp_column] <= spine.c[SPINE_EVENT_TIMESTAMP_COLUMN])
+        if ttl_column is not None:
+            conditions.append(view.c[fv.event_timestamp_column] >= spine.c[ttl_column])
+    return conditions
+
+
+class QueryStrategy(object):
+    """
+    Builds the latest row and point-in-time subqueries of a `FeatureView`. dialects lists the dialects
+    the SQL it emits runs on (None for any), which is only used to pick the strategies under test.
+    """
+
+    name = ""
+    dialects: Optional[List[str]] = None
+
+    def latest_row(self, fv, engine, snapshot_date=None, entity_list=None, is_subquery=True, start_date=None):
+        raise NotImplementedError
+
+    def point_in_time(self, fv, engine, spine, ttl_column=None):
+        raise NotImplementedError
+
+    def supports(self, engine) -> bool:
+        return self.dialects is None or engine.dialect.name in self.dialects
+
+
+class WindowStrategy(QueryStrategy):
+    name = "window"
+
+    def latest_row(self, fv, engine, snapshot_date=None, entity_list=None, is_subquery=True, start_date=None):
+        return fv.build_subquery(engine, snapshot_date, entity_list, is_subquery=is_subquery, start_date=start_date)
+
+    def point_in_time(self, fv, engine, spine, ttl_column=None):
+        return fv.build_point_in_time_subquery(engine, spine, ttl_column, use_safe=False)
+
+
+class GroupByStrategy(QueryStrategy):
+    name = "group_by"
+
+    def latest_row(self, fv, engine, snapshot_date=None, entity_list=None, is_subquery=True, start_date=None):
+        return fv.build_subquery_safe(
+            engine, snapshot_date, entity_list, is_subquery=is_subquery, start_date=start_date
+        )
+
+    def point_in_time(self, fv, engine, spine, ttl_column=None):
+        return fv.build_point_in_time_subquery(engine, spine, ttl_column, use_safe=True)
+
+
+class DistinctOnStrategy(QueryStrategy):
+    """
+    PostgreSQL returns the first row per entity of the sorted rows without numbering every row, which
+    is a single ordered scan of an index on (entity, event_timestamp DESC) - see `spellstore index`.
+    """
+
+    name = "distinct_on"
+    dialects = ["postgresql", "duckdb"]
+
+    def latest_row(self, fv, engine, snapshot_date=None, entity_list=None, is_subquery=True, start_date=None):
+        if fv.event_timestamp_column is None:
+            return fv.build_subquery(engine, snapshot_date, entity_list, is_subquery, start_date)
+        db = scoped_session(sessionmaker(autocommit=False, autoflush=False, bind=engine))
+        view = _view_table(fv)
+        latest = db.query(*[view.c[col] for col in view.c.keys()])
+        latest = fv.filter_event_timestamp(latest, snapshot_date, start_date)
+        latest = fv.filter_entity(latest, entity_list)
+        latest = (
+            latest.distinct(view.c[fv.entity_column])
+            .order_by(view.c[fv.entity_column], *_latest_order_by(fv, view))
+            .subquery()
+        )
+        query_builder = db.query(*[latest.c[col] for col in fv.projected_columns])
+        return query_builder if not is_subquery else query_builder.subquery()
+
+    def point_in_time(self, fv, engine, spine, ttl_column=None):
+        from spellbook.feature_store import SPINE_ROW_COLUMN
+
+        if fv.event_timestamp_column is None:
+            return fv.build_point_in_time_subquery(engine, spine, ttl_column)
+        db = scoped_session(sessionmaker(autocommit=False, autoflush=False, bind=engine))
+        view = _view_table(fv)
+        spine_row = spine.c[SPINE_ROW_COLUMN]
+        select_cols = [view.c[col] for col in fv.projected_columns if col != fv.entity_column]
+        return (
+            db.query(spine_row, *select_cols)
+            .join(view, and_(*_point_in_time_conditions(fv, view, spine, ttl_column)))
+            .distinct(spine_row)
+            .order_by(spine_row, *_latest_order_by(fv, view))
+            .subquery()
+        )
+
+
+class QualifyStrategy(QueryStrategy):
+    """
+    The window form without the outer query, rows are filtered with `QUALIFY row_number() ... = 1`
+    """
+
+    name = "qualify"
+    dialects = ["duckdb", "snowflake", "bigquery", "databricks"]
+
+    def latest_row(self, fv, engine, snapshot_date=None, entity_list=None, is_subquery=True, start_date=None):
+        if fv.event_timestamp_column is None:
+            return fv.build_subquery(engine, snapshot_date, entity_list, is_subquery, start_date)
+        db = scoped_session(sessionmaker(autocommit=False, autoflush=False, bind=engine))
+        view = _view_table(fv)
+        query_builder = db.query(*[view.c[col] for col in fv.projected_columns])
+        query_builder = fv.filter_event_timestamp(query_builder, snapshot_date, start_date)
+        query_builder = fv.filter_entity(query_builder, entity_list)
+        row_number = func.row_number().over(partition_by=view.c[fv.entity_column], order_by=_latest_order_by(fv, view))
+        query_builder = query_builder.suffix_with(Qualify(row_number == 1))
+        return query_builder if not is_subquery else query_builder.subquery()
+
+    def point_in_time(self, fv, engine, spine, ttl_column=None):
+        from spellbook.feature_store import SPINE_ROW_COLUMN
+
+        if fv.event_timestamp_column is None:
+            return fv.build_point_in_time_subquery(engine, spine, ttl_column)
+        db = scoped_session(sessionmaker(autocommit=False, autoflush=False, bind=engine))
+        view = _view_table(fv)
+        spine_row = spine.c[SPINE_ROW_COLUMN]
+        select_cols = [view.c[col] for col in fv.projected_columns if col != fv.entity_column]
+        row_number = func.row_number().over(partition_by=spine_row, order_by=_latest_order_by(fv, view))
+        return (
+            db.query(spine_row, *select_cols)
+            .join(view, and_(*_point_in_time_conditions(fv, view, spine, ttl_column)))
+            .suffix_with(Qualify(row_number == 1))
+            .subquery()
+        )
+
+
+class AsofStrategy(QualifyStrategy):
+    """
+    Point-in-time joins with a native `ASOF JOIN`, which matches every spine row to the latest view row
+    at or before its timestamp without ranking the candidates. ASOF JOIN can't break ties by create
+    timestamp, so views with a create timestamp use QUALIFY instead.
+    """
+
+    name = "asof"
+    dialects = ["duckdb"]
+
+    def point_in_time(self, fv, engine, spine, ttl_column=None):
+        from spellbook.feature_store import SPINE_ENTITY_COLUMN, SPINE_EVENT_TIMESTAMP_COLUMN, SPINE_ROW_COLUMN
+
+        if fv.event_timestamp_column is None or fv.create_timestamp_column is not None:
+            return super().point_in_time(fv, engine, spine, ttl_column)
+        db = scoped_session(sessionmaker(autocommit=False, autoflush=False, bind=engine))
+        view = _view_table(fv)
+        select_cols = [view.c[col] for col in fv.projected_columns if col != fv.entity_column]
+        asof_join = AsofJoin(
+            spine,
+            view,
+            and_(
+                view.c[fv.entity_column] == spine.c[SPINE_ENTITY_COLUMN],
+                spine.c[SPINE_EVENT_TIMESTAMP_COLUMN] >= view.c[fv.event_timestamp_column],
+            ),
+        )
+        query_builder = db.query(spine.c[SPINE_ROW_COLUMN], *select_cols).select_from(asof_join)
+        if ttl_column is not None:
+            # ASOF JOIN takes a single inequality, so the ttl bound is applied to the match
+            query_builder = query_builder.filter(view.c[fv.event_timestamp_column] >= spine.c[ttl_column])
+        return query_builder.subquery()
+
+
+STRATEGIES: Dict[str, QueryStrategy] = {}
+
+# cheapest strategy per dialect, dialects not listed use "window"
+DIALECT_STRATEGIES = {
+    "postgresql": "distinct_on",
+    "duckdb": "asof",
+    "snowflake": "qualify",
+    "bigquery": "qualify",
+    "databricks": "qualify",
+}
+
+
+def register_strategy(strategy: QueryStrategy, dialects: Optional[List[str]] = None):
+    """
+    Adds a strategy to the registry, and makes it the automatic choice for dialects if provided
+    """
+    STRATEGIES[strategy.name] = strategy
+    for dialect in [] if dialects is None else dialects:
+        DIALECT_STRATEGIES[dialect] = strategy.name
+    return strategy
+
+
+for _strategy in [WindowStrategy(), GroupByStrategy(), DistinctOnStrategy(), QualifyStrategy(), AsofStrategy()]:
+    register_strategy(_strategy)
+
+
+def choose_query_strategy(engine, strategy: str = "auto", use_safe=False) -> QueryStrategy:
+    """
+    Resolves the "auto" strategy by dialect, use_safe=True resolves it to "group_by" instead
+    """
+    if strategy != "auto" and strategy not in STRATEGIES:
+        raise ValueError(f"query_strategy must be one of {['auto'] + list(STRATEGIES)} - got: {strategy}.")
+    if strategy == "auto":
+        strategy = "group_by" if use_safe else DIALECT_STRATEGIES.get(engine.dialect.name, "window")
+    return STRATEGIES[strategy]
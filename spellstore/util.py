@@ -1,5 +1,10 @@
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import date, datetime, timedelta
-from typing import Optional, Union
+from typing import Deque, Dict, List, Optional, Union
+
+from pandas.api.types import is_bool_dtype, is_datetime64_any_dtype, is_float_dtype, is_integer_dtype
+from sqlalchemy import BigInteger, Boolean, Column, DateTime, Float, MetaData, Table, Text
 
 
 def infer_ttl_field(
@@ -32,3 +37,222 @@ def infer_ttl_field(
         raise ValueError(f"Unable to process snapshot_date {snapshot_date} using ttl {ttl}")
     else:
         raise ValueError(f"snapshot_date {type(snapshot_date)} and ttl {type(ttl)} are not compatible types!")
+
+
+def infer_ttl_series(event_timestamps, ttl: Optional[Union[int, float, timedelta]] = None):
+    """
+    Vectorised `infer_ttl_field` over a pandas series of event timestamps, used to
+    compute per-row lower bounds when the label timestamps are uploaded to the database.
+    """
+    if ttl is None:
+        return None
+    if isinstance(ttl, (int, float)) and ttl <= 0:
+        return None
+    try:
+        return event_timestamps - ttl
+    except TypeError:
+        return event_timestamps.map(lambda x: infer_ttl_field(x, ttl))
+
+
+SNAPSHOT_FREQUENCIES = {"daily": "days", "weekly": "weeks", "monthly": "months", "yearly": "years"}
+
+
+def parse_snapshot_dates(spec: str) -> List[datetime]:
+    """
+    Parses a comma separated list of dates, or a range `<start>..<end>/<frequency>` with frequency one
+    of daily, weekly, monthly or yearly (e.g. `2024-01-01..2024-12-01/monthly`). Ranges include both
+    ends when the end falls on the frequency, and are anchored to the start date.
+    """
+    import pandas as pd
+
+    spec = spec.strip()
+    if ".." not in spec:
+        return [pd.Timestamp(x.strip()).to_pydatetime() for x in spec.split(",") if x.strip() != ""]
+
+    date_range, _, frequency = spec.partition("/")
+    start, _, end = date_range.partition("..")
+    frequency = frequency.strip().lower() if frequency.strip() != "" else "daily"
+    if frequency not in SNAPSHOT_FREQUENCIES:
+        raise ValueError(f"frequency must be one of {list(SNAPSHOT_FREQUENCIES)} - got: {frequency}.")
+    start_date, end_date = pd.Timestamp(start.strip()), pd.Timestamp(end.strip())
+    if start_date > end_date:
+        raise ValueError(f"Snapshot range start {start_date} is after its end {end_date}")
+    snapshot_dates = []
+    # offsets are added to the start rather than chained, so month ends don't drift (Jan 31, Feb 29, Mar 31)
+    snapshot_date = start_date
+    while snapshot_date <= end_date:
+        snapshot_dates.append(snapshot_date.to_pydatetime())
+        snapshot_date = start_date + pd.DateOffset(**{SNAPSHOT_FREQUENCIES[frequency]: len(snapshot_dates)})
+    return snapshot_dates
+
+
+def sqlalchemy_type_from_dtype(dtype):
+    """
+    Maps a pandas dtype to a SQLAlchemy type so uploaded values are stored the same way
+    `DataFrame.to_sql` would store them (notably datetimes in SQLite).
+    """
+    if is_datetime64_any_dtype(dtype):
+        return DateTime()
+    if is_bool_dtype(dtype):
+        return Boolean()
+    if is_integer_dtype(dtype):
+        return BigInteger()
+    if is_float_dtype(dtype):
+        return Float()
+    return Text()
+
+
+def sqlalchemy_type_from_value_type(value_type):
+    """
+    Maps the python types used for `Feature.value_type` and `Entity.value_type` to SQLAlchemy types,
+    returns None for undeclared types.
+    """
+    type_mapper = {str: Text(), int: BigInteger(), float: Float(), datetime: DateTime()}
+    return type_mapper.get(value_type)
+
+
+def pandas_dtype_from_value_type(value_type, is_entity=False):
+    """
+    Compact pandas dtype of a column declared with value_type, or None to keep the fetched dtype:
+    nullable ints (missing values don't turn them into floats), float32, datetimes, categoricals for
+    string features and arrow strings for string entities, which have few repeated values. Ints are
+    not downcast, as chunks of the same result would get different widths depending on their values.
+    """
+    if value_type is int:
+        return "Int64"
+    if value_type is float:
+        return "float32"
+    if value_type is datetime:
+        return "datetime64[ns]"
+    if value_type is str and not is_entity:
+        return "category"
+    if value_type is str:
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            return None
+        return "string[pyarrow]"
+    return None
+
+
+def apply_dtypes(df, dtypes: Dict[str, str]):
+    """
+    Converts the columns of df in place to the dtypes of the plan, columns which can't be converted
+    (e.g. an int column holding fractions) keep their dtype. Returns df.
+    """
+    import pandas as pd
+
+    for col, dtype in dtypes.items():
+        if col not in df.columns or df[col].dtype == dtype:
+            continue
+        try:
+            if dtype == "datetime64[ns]":
+                df[col] = pd.to_datetime(df[col])
+            else:
+                df[col] = df[col].astype(dtype)
+        except (TypeError, ValueError):
+            pass
+    return df
+
+
+def missing_as_nan(df, columns: List[str]):
+    """
+    Replaces the missing values (None) of the object columns of df among columns with NaN in place, as
+    left by pandas merges. Returns df.
+    """
+    import numpy as np
+
+    for col in columns:
+        if col in df.columns and df[col].dtype == object:
+            df[col] = df[col].where(df[col].notna(), np.nan)
+    return df
+
+
+def concat_frames(frames):
+    """
+    `pd.concat` of fetched chunks without copying more than needed. Categorical columns get the union
+    of the chunks' categories first, as concatenating different categories falls back to object columns.
+    """
+    import pandas as pd
+    from pandas.api.types import union_categoricals
+
+    frames = list(frames)
+    if len(frames) == 0:
+        return pd.DataFrame()
+    if not frames[0].columns.is_unique:
+        return pd.concat(frames, copy=False)
+    for col in frames[0].columns:
+        if not all(isinstance(df[col].dtype, pd.CategoricalDtype) for df in frames if col in df.columns):
+            continue
+        categories = union_categoricals([df[col] for df in frames if col in df.columns]).categories
+        for df in frames:
+            if col in df.columns:
+                df[col] = df[col].cat.set_categories(categories)
+    return pd.concat(frames, copy=False)
+
+
+def create_temp_table(conn, name: str, df, chunksize: int = 10000):
+    """
+    Creates a session scoped temporary table on `conn` and bulk inserts `df` into it.
+    The table only lives as long as the connection, so every query using it must be
+    executed on the same connection.
+    """
+    columns = [Column(col, sqlalchemy_type_from_dtype(df[col].dtype)) for col in df.columns]
+    temp_table = Table(name, MetaData(), *columns, prefixes=["TEMPORARY"])
+    temp_table.create(conn)
+    for start in range(0, df.shape[0], chunksize):
+        chunk_df = df.iloc[start : start + chunksize]
+        # missing values (NaN, NaT, pd.NA) are inserted as NULL
+        records = chunk_df.astype(object).where(chunk_df.notna(), None).to_dict("records")
+        if len(records) > 0:
+            conn.execute(temp_table.insert(), records)
+    return temp_table
+
+
+def ordered_map(fn, iterable, max_workers: Optional[int] = None):
+    """
+    Like `map`, but runs up to max_workers calls concurrently in a thread pool. Results are
+    yielded in input order, and at most 2 * max_workers calls are in flight at any time so
+    results are not buffered unboundedly.
+    """
+    if max_workers is None or max_workers <= 1:
+        yield from map(fn, iterable)
+        return
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending: Deque[Future] = deque()
+        for item in iterable:
+            pending.append(executor.submit(fn, item))
+            if len(pending) >= 2 * max_workers:
+                yield pending.popleft().result()
+        while len(pending) > 0:
+            yield pending.popleft().result()
+
+
+def limit_chunks(chunks, limit: Optional[int] = None):
+    """
+    Passes DataFrame (or RecordBatch) chunks through until limit rows have been yielded, the last chunk
+    is truncated. Stops consuming chunks once the limit is reached.
+    """
+    if limit is None:
+        yield from chunks
+        return
+    remaining = limit
+    for chunk in chunks:
+        num_rows = chunk.shape[0] if hasattr(chunk, "shape") else chunk.num_rows
+        if num_rows >= remaining:
+            yield chunk.iloc[:remaining] if hasattr(chunk, "iloc") else chunk.slice(0, remaining)
+            return
+        remaining -= num_rows
+        yield chunk
+
+
+def to_record_batch(df):
+    """
+    Converts a DataFrame chunk into a pyarrow RecordBatch, pyarrow is an optional dependency.
+    """
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise ImportError("pyarrow is required for arrow output, install it with `pip install spellstore[arrow]`")
+    return pa.RecordBatch.from_pandas(df, preserve_index=False)
@@ -0,0 +1,250 @@
+"""
+Output sinks for exported and joined feature chunks.
+
+Every writer accepts DataFrame chunks through `write` and must be closed (or used as a
+context manager) once all chunks are written. The columnar writers require pyarrow.
+"""
+
+import os
+from datetime import datetime
+from typing import Dict, List, Literal, Optional
+
+import pandas as pd
+
+OutputFormat = Literal["csv", "parquet", "feather", "dataset"]
+
+FORMAT_EXTENSIONS = {
+    ".csv": "csv",
+    ".parquet": "parquet",
+    ".pq": "parquet",
+    ".feather": "feather",
+    ".arrow": "feather",
+    ".ipc": "feather",
+}
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise ImportError("pyarrow is required for columnar output, install it with `pip install spellstore[arrow]`")
+    return pa
+
+
+def arrow_type_from_value_type(value_type):
+    """
+    Maps the python types used for `Feature.value_type` and `Entity.value_type` to arrow types
+    """
+    pa = _import_pyarrow()
+    type_mapper = {str: pa.string(), int: pa.int64(), float: pa.float64(), datetime: pa.timestamp("us")}
+    return type_mapper.get(value_type)
+
+
+class BaseWriter(object):
+    def __init__(self, path: str, value_types: Optional[Dict[str, type]] = None, append=False):
+        self.path = path
+        self.value_types = {} if value_types is None else value_types
+        self.append = append
+        self.num_rows = 0
+
+    def write(self, df: pd.DataFrame):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class CsvWriter(BaseWriter):
+    def __init__(self, path: str, value_types: Optional[Dict[str, type]] = None, append=False):
+        super().__init__(path, value_types, append)
+        # only write a header when starting a new file, decided once rather than per chunk
+        self.header = not (append and os.path.exists(path) and os.path.getsize(path) > 0)
+        self.mode = "a" if append else "w"
+
+    def write(self, df: pd.DataFrame):
+        df.to_csv(self.path, mode=self.mode, header=self.header)
+        self.header = False
+        self.mode = "a"
+        self.num_rows += df.shape[0]
+
+
+class ArrowWriter(BaseWriter):
+    """
+    Base class for the pyarrow based writers, chunks are converted to arrow tables whose schema
+    is fixed by the first chunk, with columns declared in the repo config cast to their declared type.
+    """
+
+    def __init__(self, path: str, value_types: Optional[Dict[str, type]] = None, append=False):
+        # fails before any query runs if pyarrow isn't installed
+        _import_pyarrow()
+        super().__init__(path, value_types, append)
+        self.schema = None
+
+    def to_table(self, df):
+        pa = _import_pyarrow()
+        if isinstance(df, pd.DataFrame):
+            table = pa.Table.from_pandas(df, preserve_index=False)
+        elif isinstance(df, pa.RecordBatch):
+            table = pa.Table.from_batches([df])
+        else:
+            table = df
+
+        if self.schema is None:
+            fields = []
+            for field in table.schema:
+                arrow_type = arrow_type_from_value_type(self.value_types.get(field.name))
+                fields.append(pa.field(field.name, field.type if arrow_type is None else arrow_type))
+            self.schema = pa.schema(fields)
+        return _cast_table(table, self.schema)
+
+
+def _cast_table(table, schema):
+    pa = _import_pyarrow()
+    columns = []
+    for field in schema:
+        col = table.column(field.name)
+        if col.type != field.type:
+            try:
+                col = col.cast(field.type)
+            except (pa.ArrowInvalid, pa.ArrowNotImplementedError, pa.ArrowTypeError):
+                if not pa.types.is_timestamp(field.type):
+                    raise
+                # e.g. SQLite returns datetimes as strings, go through pandas instead
+                col = pa.chunked_array([pa.array(pd.to_datetime(col.to_pandas()), type=field.type)])
+        columns.append(col)
+    return pa.Table.from_arrays(columns, schema=schema)
+
+
+class ParquetWriter(ArrowWriter):
+    """
+    Appends every chunk as a row group of a single parquet file
+    """
+
+    def __init__(self, path: str, value_types: Optional[Dict[str, type]] = None, append=False):
+        if append:
+            raise ValueError("Appending to an existing parquet file is not supported, use the dataset format.")
+        super().__init__(path, value_types, append)
+        self.writer = None
+
+    def write(self, df):
+        import pyarrow.parquet as pq
+
+        table = self.to_table(df)
+        if self.writer is None:
+            self.writer = pq.ParquetWriter(self.path, self.schema)
+        self.writer.write_table(table)
+        self.num_rows += table.num_rows
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+
+class FeatherWriter(ArrowWriter):
+    """
+    Writes chunks as record batches of an Arrow IPC file (Feather v2)
+    """
+
+    def __init__(self, path: str, value_types: Optional[Dict[str, type]] = None, append=False):
+        if append:
+            raise ValueError("Appending to an existing feather file is not supported, use the dataset format.")
+        super().__init__(path, value_types, append)
+        self.sink = None
+        self.writer = None
+
+    def write(self, df):
+        pa = _import_pyarrow()
+        table = self.to_table(df)
+        if self.writer is None:
+            self.sink = pa.OSFile(self.path, "wb")
+            self.writer = pa.ipc.new_file(self.sink, self.schema)
+        self.writer.write_table(table)
+        self.num_rows += table.num_rows
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.sink.close()  # type: ignore
+            self.writer = None
+
+
+class DatasetWriter(ArrowWriter):
+    """
+    Writes chunks as files of a (optionally hive partitioned) parquet dataset directory,
+    appending adds new files alongside the existing ones.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        value_types: Optional[Dict[str, type]] = None,
+        append=False,
+        partition_cols: Optional[List[str]] = None,
+    ):
+        super().__init__(path, value_types, append)
+        self.partition_cols = partition_cols
+        self.num_chunks = 0
+        self.prefix = datetime.now().strftime("%Y%m%d%H%M%S%f")
+
+    def write(self, df):
+        import pyarrow.parquet as pq
+
+        table = self.to_table(df)
+        pq.write_to_dataset(
+            table,
+            self.path,
+            partition_cols=self.partition_cols,
+            basename_template=f"part-{self.prefix}-{self.num_chunks}-{{i}}.parquet",
+            existing_data_behavior="overwrite_or_ignore",
+        )
+        self.num_chunks += 1
+        self.num_rows += table.num_rows
+
+
+def infer_format(output_file: str, partition_cols: Optional[List[str]] = None) -> str:
+    if partition_cols:
+        return "dataset"
+    _, ext = os.path.splitext(output_file)
+    if ext == "" or os.path.isdir(output_file):
+        return "dataset"
+    if ext.lower() not in FORMAT_EXTENSIONS:
+        raise ValueError(
+            f"Unable to infer output format from {output_file}, provide one of {set(FORMAT_EXTENSIONS.values())}"
+        )
+    return FORMAT_EXTENSIONS[ext.lower()]
+
+
+def get_writer(
+    output_file: str,
+    output_format: Optional[str] = None,
+    value_types: Optional[Dict[str, type]] = None,
+    append=False,
+    partition_cols: Optional[List[str]] = None,
+) -> BaseWriter:
+    """
+    Chooses the writer from output_format, or the output_file extension if not provided
+    (a path without extension is written as a parquet dataset directory). partition_cols writes a
+    hive partitioned dataset, with a `column=value` directory per partition.
+    """
+    if output_format is None or output_format == "":
+        output_format = infer_format(output_file, partition_cols)
+    if partition_cols and output_format != "dataset":
+        raise ValueError(f"partition_cols are only supported by dataset outputs - got: {output_format}.")
+
+    if output_format == "csv":
+        return CsvWriter(output_file, value_types, append)
+    elif output_format == "parquet":
+        return ParquetWriter(output_file, value_types, append)
+    elif output_format == "feather":
+        return FeatherWriter(output_file, value_types, append)
+    elif output_format == "dataset":
+        return DatasetWriter(output_file, value_types, append, partition_cols)
+    else:
+        raise ValueError(f"output_format must be one of (csv, parquet, feather, dataset) - got: {output_format}.")
@@ -0,0 +1,67 @@
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+
+from spellbook.base import Entity, Feature, Group, RepoConfig
+from spellbook.feature_store import FeatureStore
+
+
+def make_toy_frame(num_entities=25, entity_type=int, timestamps=(1, 3)) -> pd.DataFrame:
+    """
+    Two rows per entity "a", as of the two event timestamps "b", with feature "c" of "x" then "y"
+    """
+    entities = list(range(num_entities)) if entity_type is int else [f"e{i:03d}" for i in range(num_entities)]
+    return pd.DataFrame(
+        {
+            "a": entities * 2,
+            "b": [timestamps[0]] * num_entities + [timestamps[1]] * num_entities,
+            "c": ["x"] * num_entities + ["y"] * num_entities,
+        }
+    )
+
+
+@pytest.fixture
+def toy_frame():
+    return make_toy_frame
+
+
+@pytest.fixture
+def build_feature_store(tmp_path):
+    """
+    Factory of feature stores over the group "test" with entity "a" of entity_type, event timestamp "b"
+    and features declared by value type ({"c": str} by default). df is written to the table of the group
+    unless it is None, in a SQLite database file of the test (shared by every connection and worker
+    process) if no engine is given. groups adds further groups, with the DataFrames of their tables.
+    """
+
+    def build(
+        df: Optional[pd.DataFrame] = None,
+        features: Optional[Dict[str, type]] = None,
+        entity_type=int,
+        create_timestamp_column: Optional[str] = None,
+        groups: Optional[List[Tuple[Group, pd.DataFrame]]] = None,
+        engine=None,
+        **store_options,
+    ) -> FeatureStore:
+        engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}") if engine is None else engine
+        features = {"c": str} if features is None else features
+        group = Group(
+            name="test",
+            entity="a",
+            features=[Feature(name=name, value_type=value_type) for name, value_type in features.items()],
+            event_timestamp_column="b",
+            create_timestamp_column=create_timestamp_column,
+        )
+        tables = [(group, df)] + ([] if groups is None else groups)
+        for table_group, table_df in tables:
+            if table_df is not None:
+                table_df.to_sql(table_group.name, con=engine, if_exists="replace", index=False)
+        rc = RepoConfig(
+            entities=[Entity(name="a", value_type=entity_type)],
+            groups=[table_group for table_group, _ in tables],
+        )
+        return FeatureStore(repo_config=rc, engine=engine, **store_options)
+
+    return build
@@ -0,0 +1,72 @@
+from datetime import datetime
+
+import pandas as pd
+import pytest
+from sqlalchemy import text
+
+from spellbook.feature_store import FeatureStore
+
+pa = pytest.importorskip("pyarrow")
+
+from spellbook.arrow import arrow_schema, iter_record_batches, read_sql, rows_to_record_batch  # noqa: E402
+
+
+@pytest.fixture
+def feature_store(build_feature_store, toy_frame):
+    df = toy_frame().assign(e=list(range(50)), f=[0.5, None] * 25)
+    return build_feature_store(df, {"c": str, "e": int, "f": float})
+
+
+def test_rows_to_record_batch():
+    schema = arrow_schema(["a", "b", "c"], {"a": int, "b": datetime})
+    assert schema.types == [pa.int64(), pa.timestamp("us"), pa.null()]
+    # datetimes returned as strings are cast to the declared type, undeclared columns are inferred
+    batch = rows_to_record_batch([(1, "2024-01-01 00:00:00", "x"), (None, None, "y")], schema)
+    assert batch.schema.types == [pa.int64(), pa.timestamp("us"), pa.string()]
+    assert batch.column(0).to_pylist() == [1, None]
+    assert batch.column(1).to_pylist() == [datetime(2024, 1, 1), None]
+
+    empty = rows_to_record_batch([], arrow_schema(["a"], {"a": int}))
+    assert empty.num_rows == 0 and empty.schema.names == ["a"]
+
+
+def test_iter_record_batches(feature_store):
+    engine = feature_store.engine
+    with engine.connect() as conn:
+        batches = list(iter_record_batches(text("select a, c from test"), conn, {"a": int, "c": str}, 20))
+        assert [batch.num_rows for batch in batches] == [20, 20, 10]
+        assert batches[0].schema.types == [pa.int64(), pa.string()]
+        # an empty result still yields its columns
+        batches = list(iter_record_batches(text("select a from test where a < 0"), conn, {"a": int}, 20))
+        assert [batch.num_rows for batch in batches] == [0]
+
+    expected = pd.read_sql_query("select * from test", engine)
+    pd.testing.assert_frame_equal(read_sql(text("select * from test"), engine, "arrow"), expected)
+    with pytest.raises(ValueError):
+        read_sql(text("select * from test"), engine, "unknown")
+
+
+def test_arrow_fetch_backend(tmp_path, feature_store):
+    feature_list = ["test.c", "test.e", "test.f"]
+    fs = feature_store
+    arrow_fs = FeatureStore(repo_config=fs.repo_config, engine=fs.engine, fetch_backend="arrow")
+
+    chunks = list(arrow_fs.iter_export(feature_list, 10, batch_size=10))
+    assert [chunk.shape[0] for chunk in chunks] == [10, 10, 5]
+    expected = pd.concat(list(fs.iter_export(feature_list, 10)), ignore_index=True)
+    pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), expected)
+
+    batches = list(arrow_fs.iter_export(feature_list, 10, batch_size=10, as_arrow=True))
+    assert all(isinstance(batch, pa.RecordBatch) for batch in batches)
+    assert batches[0].schema.field("e").type == pa.int64()
+
+    output_file = str(tmp_path / "output.parquet")
+    arrow_fs.export(feature_list, 10, output_file=output_file)
+    pd.testing.assert_frame_equal(pd.read_parquet(output_file), expected)
+
+    entity_df = pd.DataFrame({"a": [1, 2, 3, 4], "b": [0, 1, 2, 5]})
+    for strategy in ["query", "temp_table", "asof"]:
+        output = arrow_fs.join(entity_df, "a", "b", feature_list, strategy=strategy)
+        expected = fs.join(entity_df, "a", "b", feature_list, strategy=strategy)
+        assert output["c"].fillna("").tolist() == expected["c"].fillna("").tolist() == ["", "x", "x", "y"]
+        assert output["e"].fillna(-1).tolist() == expected["e"].fillna(-1).tolist()
@@ -0,0 +1,83 @@
+import asyncio
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("aiosqlite")
+
+from sqlalchemy.ext.asyncio import create_async_engine  # noqa: E402
+
+from spellbook.async_store import AsyncFeatureStore, ordered_gather  # noqa: E402
+
+
+def get_async_engine(feature_store):
+    return create_async_engine(f"sqlite+aiosqlite:///{feature_store.engine.url.database}")
+
+
+def test_async_export(tmp_path, build_feature_store, toy_frame):
+    sync_fs = build_feature_store(toy_frame())
+    async_engine = get_async_engine(sync_fs)
+    fs = AsyncFeatureStore(sync_fs.repo_config, async_engine)
+
+    async def run():
+        chunks = [chunk async for chunk in fs.iter_export(["test.c"], 2, batch_size=10)]
+        output_df = await fs.export(["test.c"], 10, entity_list=list(range(3000)))
+        num_rows = await fs.export(["test.c"], 10, output_file=str(tmp_path / "output.csv"))
+        await async_engine.dispose()
+        return chunks, output_df, num_rows
+
+    chunks, output_df, num_rows = asyncio.run(run())
+    assert [chunk.shape[0] for chunk in chunks] == [10, 10, 5]
+    assert set(pd.concat(chunks)["c"]) == {"x"}
+    # 3000 entities use a temporary table, uploaded on the async connection
+    expected = pd.concat(list(sync_fs.iter_export(["test.c"], 10)))
+    pd.testing.assert_frame_equal(output_df.sort_values("a").reset_index(drop=True), expected)
+    assert num_rows == 25 and pd.read_csv(tmp_path / "output.csv").shape[0] == 25
+
+
+@pytest.mark.parametrize("strategy", ["query", "asof"])
+def test_async_join(build_feature_store, toy_frame, strategy):
+    sync_fs = build_feature_store(toy_frame(num_entities=2500))
+    async_engine = get_async_engine(sync_fs)
+    fs = AsyncFeatureStore(sync_fs.repo_config, async_engine, max_concurrency=4)
+    entity_df = pd.DataFrame({"a": [1, 2, 3, 4] * 1000, "b": [0, 1, 2, 5] * 1000, "d": np.arange(4000)})
+
+    async def run():
+        output = await fs.join(entity_df, "a", "b", ["test.c"], strategy=strategy)
+        await async_engine.dispose()
+        return output
+
+    output = asyncio.run(run())
+    expected = sync_fs.join(entity_df, "a", "b", ["test.c"], strategy=strategy)
+    output = output.sort_values("d").reset_index(drop=True)
+    expected = expected.sort_values("d").reset_index(drop=True)
+    assert output["c"].fillna("").tolist() == expected["c"].fillna("").tolist()
+    assert output["c"].fillna("").tolist()[:4] == ["", "x", "x", "y"]
+
+
+def test_ordered_gather_bounded_concurrency():
+    in_flight = []
+    max_in_flight = []
+
+    async def fn(item):
+        in_flight.append(item)
+        max_in_flight.append(len(in_flight))
+        await asyncio.sleep(0.01 * (5 - item))
+        in_flight.remove(item)
+        return item * 2
+
+    async def run():
+        return [x async for x in ordered_gather(fn, range(5), max_concurrency=2)]
+
+    assert asyncio.run(run()) == [0, 2, 4, 6, 8]
+    assert max(max_in_flight) == 2
+
+
+def test_async_store_requires_async_engine(build_feature_store):
+    sync_fs = build_feature_store()
+    rc, engine = sync_fs.repo_config, sync_fs.engine
+    with pytest.raises(ValueError, match="AsyncEngine"):
+        AsyncFeatureStore(rc, engine)
+    with pytest.raises(ValueError, match="AsyncEngine"):
+        AsyncFeatureStore(rc.copy(update={"engine": engine}))
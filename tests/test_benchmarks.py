@@ -0,0 +1,34 @@
+from benchmarks.run import compare, run_benchmarks
+
+
+def test_run_benchmarks(tmp_path):
+    results = run_benchmarks(
+        f"sqlite:///{tmp_path / 'benchmark.db'}",
+        [20],
+        history_depth=3,
+        num_groups=2,
+        feature_width=2,
+        num_labels=50,
+        repeat=1,
+    )
+    rows = {r["case"]: r["rows"] for r in results["results"]}
+    assert rows == {
+        "export": 20,
+        "join_query": 50,
+        "join_temp_table": 50,
+        "join_asof": 50,
+        "build_query": 20,
+        "build_subquery_safe": 20,
+        "to_df": 20,
+    }
+    assert all(r["peak_memory_mb"] > 0 for r in results["results"])
+    assert compare(results, results) == []
+
+
+def test_compare_regression():
+    baseline = {"results": [{"case": "export", "num_entities": 10, "wall_time": 1.0, "peak_memory_mb": 10.0}]}
+    results = {"results": [{"case": "export", "num_entities": 10, "wall_time": 1.5, "peak_memory_mb": 10.0}]}
+    regressions = compare(results, baseline, tolerance=0.25)
+    assert len(regressions) == 1
+    assert "wall_time" in regressions[0]
+    assert compare(results, baseline, tolerance=0.6) == []
@@ -0,0 +1,135 @@
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from spellbook.cache import RESULT_CACHE_DIR_ENVVAR, ResultCache  # noqa: E402
+from spellbook.cli import app  # noqa: E402
+
+
+@pytest.fixture
+def toy_df(toy_frame):
+    return toy_frame(timestamps=(pd.Timestamp("2024-01-01"), pd.Timestamp("2024-01-03")))
+
+
+def count_queries(engine):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    from sqlalchemy import event
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    return statements
+
+
+def test_result_cache_export(tmp_path, build_feature_store, toy_df):
+    cache = ResultCache(str(tmp_path / "cache"))
+    fs = build_feature_store(toy_df, result_cache=cache)
+    engine = fs.engine
+    snapshot_date = datetime(2024, 1, 2)
+
+    expected = pd.concat(list(fs.iter_export(["test.c"], snapshot_date, batch_size=10)))
+    assert len(cache.entries()) == 1 and cache.entries()[0]["num_rows"] == 25
+
+    statements = count_queries(engine)
+    output = pd.concat(list(fs.iter_export(["test.c"], snapshot_date, batch_size=10)))
+    pd.testing.assert_frame_equal(output.reset_index(drop=True), expected.reset_index(drop=True))
+    # only the freshness probe is issued
+    assert len(statements) == 1 and "count(*)" in statements[0]
+
+    # another snapshot or entity set is a separate entry, a partially consumed export isn't cached
+    list(fs.iter_export(["test.c"], snapshot_date, entity_list=[1, 2]))
+    next(fs.iter_export(["test.c"], datetime(2024, 1, 4), batch_size=10))
+    assert len(cache.entries()) == 2
+
+    # new rows change the probes, so the stale entry is refreshed
+    pd.DataFrame({"a": [1], "b": pd.to_datetime(["2024-01-02"]), "c": ["z"]}).to_sql(
+        "test", con=engine, index=False, if_exists="append"
+    )
+    output = pd.concat(list(fs.iter_export(["test.c"], snapshot_date)))
+    assert output.set_index("a").loc[1, "c"] == "z"
+
+
+@pytest.mark.filterwarnings("error::FutureWarning")
+def test_result_cache_join_and_eviction(tmp_path, build_feature_store, toy_df):
+    cache = ResultCache(str(tmp_path / "cache"))
+    fs = build_feature_store(toy_df, result_cache=cache)
+    engine = fs.engine
+    entity_df = pd.DataFrame(
+        {"a": [1, 2, 3, 4], "b": pd.to_datetime(["2023-12-31", "2024-01-02", "2024-01-04", "2024-01-04"])},
+        index=[10, 11, 12, 13],
+    )
+
+    expected = fs.join(entity_df, "a", "b", ["test.c"], strategy="asof")
+    statements = count_queries(engine)
+    output = fs.join(entity_df, "a", "b", ["test.c"], strategy="asof")
+    pd.testing.assert_frame_equal(output, expected)
+    assert len(statements) == 1
+    assert output["c"].fillna("").tolist() == ["", "x", "y", "y"]
+
+    fs.export(["test.c"], datetime(2024, 1, 2), force_fetch_all=True)
+    assert [entry["kind"] for entry in cache.entries()] == ["join", "export"]
+    # the join was used least recently, so it is evicted first
+    join_key = cache.entries()[0]["key"]
+    assert cache.evict(cache.size() - 1) == [join_key]
+    assert [entry["kind"] for entry in cache.entries()] == ["export"]
+
+
+@pytest.mark.filterwarnings("error::FutureWarning")
+@pytest.mark.parametrize("strategy", ["query", "temp_table", "asof"])
+@pytest.mark.parametrize("compact_dtypes", [False, True])
+def test_result_cache_join_matches_fresh_result(tmp_path, build_feature_store, toy_df, strategy, compact_dtypes):
+    fs = build_feature_store(toy_df, result_cache=str(tmp_path / "cache"), compact_dtypes=compact_dtypes)
+    engine = fs.engine
+    entity_df = pd.DataFrame({"a": [1, 2, 30], "b": pd.to_datetime(["2023-12-31", "2024-01-02", "2024-01-04"])})
+
+    expected = fs.join(entity_df, "a", "b", ["test.c"], strategy=strategy)
+    statements = count_queries(engine)
+    output = fs.join(entity_df, "a", "b", ["test.c"], strategy=strategy)
+    assert len(statements) == 1
+    pd.testing.assert_frame_equal(output, expected)
+
+
+def test_cache_cli(tmp_path, build_feature_store, toy_df):
+    cache_dir = str(tmp_path / "cache")
+    build_feature_store(toy_df, result_cache=cache_dir).export(["test.c"], datetime(2024, 1, 2), force_fetch_all=True)
+
+    from typer.testing import CliRunner
+
+    runner = CliRunner()
+    result = runner.invoke(app, ["cache", "ls", "--cache-dir", cache_dir])
+    assert result.exit_code == 0 and "export" in result.stdout and "1 entries" in result.stdout
+    result = runner.invoke(app, ["cache", "clear", "--cache-dir", cache_dir])
+    assert result.exit_code == 0 and "Removed 1 entries" in result.stdout
+    assert ResultCache(cache_dir).entries() == []
+
+
+def test_result_cache_from_environment(tmp_path, build_feature_store, toy_df, monkeypatch):
+    monkeypatch.setenv(RESULT_CACHE_DIR_ENVVAR, str(tmp_path / "cache"))
+    assert build_feature_store(toy_df).result_cache.cache_dir == str(tmp_path / "cache")
+    assert build_feature_store(toy_df, result_cache=False).result_cache is None
+
+
+def test_result_cache_skips_results_written_to_while_read(tmp_path, build_feature_store, toy_df):
+    cache = ResultCache(str(tmp_path / "cache"))
+    fs = build_feature_store(toy_df, result_cache=cache)
+    engine = fs.engine
+    iter_feature_group = fs._iter_feature_group
+
+    def iter_feature_group_with_write(*args, **kwargs):
+        # lands after the freshness probes of the cache, but before the result is read
+        new_df = pd.DataFrame({"a": [1], "b": pd.to_datetime(["2024-01-02"]), "c": ["z"]})
+        new_df.to_sql("test", con=engine, index=False, if_exists="append")
+        yield from iter_feature_group(*args, **kwargs)
+
+    fs._iter_feature_group = iter_feature_group_with_write
+    list(fs.iter_export(["test.c"], datetime(2024, 1, 4)))
+    assert cache.entries() == []
+
+    fs._iter_feature_group = iter_feature_group
+    list(fs.iter_export(["test.c"], datetime(2024, 1, 4)))
+    assert len(cache.entries()) == 1
@@ -0,0 +1,41 @@
+import os
+import subprocess
+import sys
+
+# cumulative `python -X importtime` budget of the cli module, in microseconds. Wall clock timings vary
+# with the machine and its load, so the default leaves ample headroom (the cli imports in ~0.25s);
+# importing the heavy modules is guarded by test_meta_commands_skip_heavy_imports instead.
+IMPORT_BUDGET_US = int(os.environ.get("SPELLSTORE_IMPORT_BUDGET_US", 1000000))
+
+HEAVY_MODULES = ["pandas", "numpy", "sqlalchemy"]
+
+
+def run_python(code, *args):
+    return subprocess.run([sys.executable, *args, "-c", code], capture_output=True, text=True, check=True)
+
+
+def test_meta_commands_skip_heavy_imports():
+    code = f"""
+import sys
+from spellbook.cli import app
+try:
+    app(["get", "meta", "all", "--metadata", "tests/basic.yml"])
+except SystemExit:
+    pass
+print([m for m in {HEAVY_MODULES} if m in sys.modules])
+"""
+    result = run_python(code)
+    assert "test1" in result.stdout
+    assert result.stdout.strip().splitlines()[-1] == "[]"
+
+
+def test_cli_import_time():
+    result = run_python("import spellbook.cli", "-X", "importtime")
+    cumulative = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative_us, module = line.split("|")
+        if cumulative_us.strip().isdigit():
+            cumulative[module.strip()] = int(cumulative_us)
+    assert cumulative["spellbook.cli"] < IMPORT_BUDGET_US
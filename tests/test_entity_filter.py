@@ -0,0 +1,95 @@
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, create_mock_engine, event
+from sqlalchemy.dialects import postgresql
+
+from spellbook.base import Feature, Group
+from spellbook.entity_filter import choose_entity_filter, entity_values
+from spellbook.feature_store import FeatureView
+
+
+def test_choose_entity_filter():
+    sqlite_engine = create_engine("sqlite:///:memory:")
+    pg_engine = create_mock_engine("postgresql://", executor=None)
+    assert choose_entity_filter(sqlite_engine, 10) == "in"
+    assert choose_entity_filter(sqlite_engine, 5000) == "temp_table"
+    assert choose_entity_filter(pg_engine, 5000) == "values"
+    assert choose_entity_filter(pg_engine, 5000, "in") == "in"
+
+
+def test_export_temp_table_single_query(build_feature_store):
+    df = pd.DataFrame({"a": list(range(3000)), "b": [1] * 3000, "c": ["a"] * 3000})
+    fs = build_feature_store(df)
+    engine = fs.engine
+
+    statements = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append(statement)
+
+    output = pd.concat(list(fs.iter_export(["test.c"], 10, entity_list=list(range(0, 3000, 2)), max_workers=4)))
+    assert sorted(output["a"].tolist()) == list(range(0, 3000, 2))
+    assert len(statements) == 1
+    assert "spellstore_entity_filter" in statements[0]
+
+
+def test_values_entity_filter():
+    fv = FeatureView(name="test", columns=["c"], entity_column="a", event_timestamp_column="b")
+    engine = create_mock_engine("postgresql://", executor=None)
+    query = fv.build_subquery(engine, entity_list=entity_values(list(range(2000))), is_subquery=False)
+    sql = str(query.statement.compile(dialect=postgresql.dialect()))
+    assert "VALUES (0), (1)" in sql
+    assert "entity_list" not in sql
+
+
+@pytest.fixture
+def build_sample_store(build_feature_store, toy_frame):
+    """
+    Feature stores over the groups "test" and "right", with features "c" and "d" of every entity
+    """
+
+    def build(entity_type=int, num_entities=2000):
+        df = toy_frame(num_entities=num_entities, entity_type=entity_type)
+        right = Group(
+            name="right", entity="a", features=[Feature(name="d", value_type=str)], event_timestamp_column="b"
+        )
+        return build_feature_store(df, entity_type=entity_type, groups=[(right, df.rename(columns={"c": "d"}))])
+
+    return build
+
+
+def test_export_limit_pushdown(build_sample_store):
+    fs = build_sample_store()
+    statements = []
+
+    @event.listens_for(fs.engine, "before_cursor_execute")
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    output = pd.concat(list(fs.iter_export(["test.c", "right.d"], 10, limit=25, batch_size=10)))
+    assert output.shape[0] == 25
+    assert any("LIMIT" in statement for statement in statements)
+
+
+@pytest.mark.parametrize("entity_type", [int, str])
+def test_export_sample_fraction(build_sample_store, entity_type):
+    fs = build_sample_store(entity_type)
+    statements = []
+
+    @event.listens_for(fs.engine, "before_cursor_execute")
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    sample = pd.concat(list(fs.iter_export(["test.c", "right.d"], 10, sample_fraction=0.1)))
+    assert 100 < sample.shape[0] < 300
+    # the same entities are sampled from every view, and on every run
+    assert sample[["c", "d"]].notna().all().all()
+    again = pd.concat(list(fs.iter_export(["test.c", "right.d"], 10, sample_fraction=0.1)))
+    assert sorted(again["a"].tolist()) == sorted(sample["a"].tolist())
+    # integer entities are bucketed in SQL, other types by a hash function registered with SQLite
+    assert any("spellstore_hash" in statement for statement in statements) == (entity_type is str)
+
+    with pytest.raises(ValueError):
+        fs.get_feature_group(["test.c"], sample_fraction=1.5)
@@ -1,7 +1,7 @@
 import pandas as pd
 from sqlalchemy import create_engine
 
-from spellbook.feature_store import FeatureGroup, FeatureView
+from spellbook.feature_store import FeatureGroup, FeatureView, query_cache
 
 
 def test_time_travel():
@@ -152,3 +152,56 @@ def test_time_travel_safe():
     assert df.shape[1] == 5
     assert set(df["a"].tolist()) == set([1, 2, 3])
     assert df.shape[0] == 3
+
+
+def test_build_query_cache():
+    engine = create_engine("sqlite:///:memory:")
+    df = pd.DataFrame({"a": [1, 1, 2, 3], "b": [4, 5, 5, 6], "c": ["a", "a", "b", "c"]})
+    df.to_sql("test", con=engine)
+
+    def build_feature_group():
+        return FeatureGroup(
+            feature_views=[FeatureView(name="test", columns=["c"], entity_column="a", event_timestamp_column="b")],
+            full_join=False,
+        )
+
+    query_cache.clear()
+    query = build_feature_group().build_query(engine, 100, [1, 2])
+    assert len(query_cache) == 1
+    assert set(pd.read_sql_query(query.statement, con=engine)["a"].tolist()) == set([1, 2])
+
+    # same shape re-uses the cached query with new parameter values
+    query = build_feature_group().build_query(engine, 5, [1, 2, 3])
+    assert len(query_cache) == 1
+    assert set(pd.read_sql_query(query.statement, con=engine)["a"].tolist()) == set([1, 2])
+
+    query = build_feature_group().build_query(engine, 100)
+    assert len(query_cache) == 2
+    assert set(pd.read_sql_query(query.statement, con=engine)["a"].tolist()) == set([1, 2, 3])
+
+
+def test_subquery_latest_row_and_projection():
+    engine = create_engine("sqlite:///:memory:")
+    df = pd.DataFrame({"a": [1, 1, 2, 3], "b": [4, 5, 5, 6], "c": ["a", "b", "c", "d"], "x": [0, 0, 0, 0]})
+    df.to_sql("test", con=engine)
+
+    feature_view = FeatureView(name="test", columns=["c"], entity_column="a", event_timestamp_column="b")
+    feature_group = FeatureGroup(feature_views=[feature_view], full_join=False)
+
+    for _ in range(2):
+        query = feature_group.build_query(engine, 100)
+    # building queries does not mutate the view
+    assert feature_view.columns == ["c"]
+
+    sql = str(feature_view.build_subquery(engine, snapshot_date=100)).lower()
+    assert "row_number()" in sql
+    assert "x" not in sql.split("from")[0]
+
+    df = pd.read_sql_query(query.statement, con=engine)
+    assert list(df.columns) == ["a", "c"]
+    assert df.sort_values("a")["c"].tolist() == ["b", "c", "d"]
+
+    feature_group.use_safe = True
+    df = pd.read_sql_query(feature_group.build_query(engine, 100).statement, con=engine)
+    assert list(df.columns) == ["a", "c"]
+    assert df.sort_values("a")["c"].tolist() == ["b", "c", "d"]
@@ -1,9 +1,11 @@
+from datetime import timedelta
+
 import numpy as np
 import pandas as pd
 from sqlalchemy import create_engine
 
 from spellbook.base import Entity, Feature, Group, RepoConfig
-from spellbook.feature_store import FeatureStore
+from spellbook.feature_store import FeatureStore, FeatureView, asof_merge
 
 
 def test_entity_join():
@@ -26,3 +28,125 @@ def test_entity_join():
     )
 
     assert output["c"].tolist() == [np.nan, "b", "b", "c"]
+
+
+def test_entity_join_temp_table():
+    engine = create_engine("sqlite:///:memory:")
+    df = pd.DataFrame({"a": [1, 1, 1, 1, 2], "b": [1, 2, 3, 4, 1], "c": ["a", "b", "c", "d", "e"]})
+    entity_df = pd.DataFrame({"a": [1, 1, 1, 1, 2, 3], "b": [0.9, 2.2, 2.8, 3, 5, 5], "d": [1, 2, 3, 4, 5, 6]})
+
+    df.to_sql("test", con=engine)
+    rc = RepoConfig(
+        entities=[Entity(name="a", value_type=int)],
+        groups=[
+            Group(name="test", entity="a", features=[Feature(name="c", value_type=str)], event_timestamp_column="b")
+        ],
+    )
+
+    for use_safe in [False, True]:
+        fs = FeatureStore(repo_config=rc, engine=engine, use_safe=use_safe)
+        output = fs.join(
+            entity_df, entity_column="a", event_timestamp_column="b", feature_list=["test.c"], strategy="temp_table"
+        )
+        assert output["d"].tolist() == [1, 2, 3, 4, 5, 6]
+        assert output["c"].fillna("").tolist() == ["", "b", "b", "c", "e", ""]
+
+
+def test_entity_join_temp_table_create_timestamp():
+    engine = create_engine("sqlite:///:memory:")
+    df = pd.DataFrame({"a": [1, 1, 1], "b": [1, 2, 2], "b1": [1, 1, 2], "c": ["a", "b", "c"]})
+    entity_df = pd.DataFrame({"a": [1, 1], "b": [1, 3]})
+
+    df.to_sql("test", con=engine)
+    rc = RepoConfig(
+        entities=[Entity(name="a", value_type=int)],
+        groups=[
+            Group(
+                name="test",
+                entity="a",
+                features=[Feature(name="c", value_type=str)],
+                event_timestamp_column="b",
+                create_timestamp_column="b1",
+            )
+        ],
+    )
+
+    for use_safe in [False, True]:
+        fs = FeatureStore(repo_config=rc, engine=engine, use_safe=use_safe)
+        output = fs.join(
+            entity_df, entity_column="a", event_timestamp_column="b", feature_list=["test.c"], strategy="temp_table"
+        )
+        assert output["c"].tolist() == ["a", "c"]
+
+
+def test_entity_join_asof():
+    engine = create_engine("sqlite:///:memory:")
+    df = pd.DataFrame({"a": [1, 1, 1, 1, 2], "b": [1, 2, 3, 4, 1], "c": ["a", "b", "c", "d", "e"]})
+    entity_df = pd.DataFrame({"a": [1, 1, 1, 1, 2, 3], "b": [0.9, 2.2, 2.8, 3, 5, 5], "d": [1, 2, 3, 4, 5, 6]})
+
+    df.to_sql("test", con=engine)
+    rc = RepoConfig(
+        entities=[Entity(name="a", value_type=int)],
+        groups=[
+            Group(name="test", entity="a", features=[Feature(name="c", value_type=str)], event_timestamp_column="b")
+        ],
+    )
+
+    fs = FeatureStore(repo_config=rc, engine=engine)
+    output = fs.join(entity_df, entity_column="a", event_timestamp_column="b", feature_list=["test.c"], strategy="asof")
+    assert output["d"].tolist() == [1, 2, 3, 4, 5, 6]
+    assert output["c"].fillna("").tolist() == ["", "b", "b", "c", "e", ""]
+
+
+def test_asof_merge_ttl_and_create_timestamp():
+    label_df = pd.DataFrame(
+        {"a": [1, 1, 2], "b": [pd.Timestamp("2021-01-03"), pd.Timestamp("2021-01-10"), pd.Timestamp("2021-01-03")]}
+    )
+    history_df = pd.DataFrame(
+        {
+            "a": [1, 1, 2],
+            "b": ["2021-01-02 00:00:00", "2021-01-02 00:00:00", "2021-01-01 00:00:00"],
+            "b1": [2, 1, 1],
+            "c": ["new", "old", "x"],
+        }
+    )
+    fv = FeatureView(
+        name="test",
+        columns=["c"],
+        entity_column="a",
+        event_timestamp_column="b",
+        create_timestamp_column="b1",
+        ttl=timedelta(days=3),
+    )
+
+    output = asof_merge(label_df, history_df, fv, "a", "b")
+    assert output["c"].fillna("").tolist() == ["new", "", "x"]
+
+
+def test_entity_join_max_workers(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    df = pd.DataFrame({"a": [1, 1, 1, 1, 2], "b": [1, 2, 3, 4, 1], "c": ["a", "b", "c", "d", "e"]})
+    entity_df = pd.DataFrame({"a": [1, 1, 1, 1, 2, 3], "b": [0.9, 2.2, 2.8, 3, 5, 5], "d": [1, 2, 3, 4, 5, 6]})
+
+    df.to_sql("test", con=engine)
+    rc = RepoConfig(
+        entities=[Entity(name="a", value_type=int)],
+        groups=[
+            Group(name="test", entity="a", features=[Feature(name="c", value_type=str)], event_timestamp_column="b")
+        ],
+    )
+
+    fs = FeatureStore(repo_config=rc, engine=engine)
+    expected = fs.join(entity_df, entity_column="a", event_timestamp_column="b", feature_list=["test.c"])
+    for strategy in ["query", "asof"]:
+        output = fs.join(
+            entity_df,
+            entity_column="a",
+            event_timestamp_column="b",
+            feature_list=["test.c"],
+            strategy=strategy,
+            max_workers=4,
+        )
+        output = output.sort_values("d")
+        assert output["d"].tolist() == expected["d"].tolist()
+        assert output["c"].fillna("").tolist() == expected["c"].fillna("").tolist()
@@ -1,8 +1,12 @@
+from datetime import datetime
+
 import pandas as pd
+import pytest
 from sqlalchemy import create_engine
 
 from spellbook.base import Entity, Feature, Group, RepoConfig
 from spellbook.feature_store import FeatureStore
+from spellbook.util import apply_dtypes, parse_snapshot_dates
 
 
 def test_entity_join():
@@ -21,3 +25,164 @@ def test_entity_join():
 
     output = fs.export(["test.c"], 10)
     assert len(output.split("\n")) >= 3
+
+
+def test_export_max_workers(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    df = pd.DataFrame({"a": list(range(2000)), "b": [1] * 2000, "c": ["a"] * 2000})
+
+    df.to_sql("test", con=engine)
+    rc = RepoConfig(
+        entities=[Entity(name="a", value_type=int)],
+        groups=[
+            Group(name="test", entity="a", features=[Feature(name="c", value_type=str)], event_timestamp_column="b")
+        ],
+    )
+
+    fs = FeatureStore(repo_config=rc, engine=engine)
+    output_file = str(tmp_path / "output.csv")
+    fs.export(["test.c"], 10, output_file=output_file, entity_list=list(range(1500)), max_workers=4)
+    output = pd.read_csv(output_file)
+    assert output["a"].tolist() == list(range(1500))
+
+
+def test_iter_export():
+    engine = create_engine("sqlite:///:memory:")
+    df = pd.DataFrame({"a": list(range(25)), "b": [1] * 25, "c": ["a"] * 25})
+
+    df.to_sql("test", con=engine)
+    rc = RepoConfig(
+        entities=[Entity(name="a", value_type=int)],
+        groups=[
+            Group(name="test", entity="a", features=[Feature(name="c", value_type=str)], event_timestamp_column="b")
+        ],
+    )
+
+    fs = FeatureStore(repo_config=rc, engine=engine)
+    chunks = list(fs.iter_export(["test.c"], 10, batch_size=10))
+    assert [chunk.shape[0] for chunk in chunks] == [10, 10, 5]
+    assert sorted(pd.concat(chunks)["a"].tolist()) == list(range(25))
+
+
+def test_iter_join():
+    engine = create_engine("sqlite:///:memory:")
+    df = pd.DataFrame({"a": [1, 1, 1, 1], "b": [1, 2, 3, 4], "c": ["a", "b", "c", "d"]})
+    entity_df = pd.DataFrame({"a": [1, 1, 1, 1], "b": [0.9, 2.2, 2.8, 3], "d": [1, 2, 3, 4]})
+
+    df.to_sql("test", con=engine)
+    rc = RepoConfig(
+        entities=[Entity(name="a", value_type=int)],
+        groups=[
+            Group(name="test", entity="a", features=[Feature(name="c", value_type=str)], event_timestamp_column="b")
+        ],
+    )
+
+    fs = FeatureStore(repo_config=rc, engine=engine)
+    chunks = list(fs.iter_join(entity_df, "a", "b", ["test.c"], batch_size=2, strategy="temp_table"))
+    assert [chunk.shape[0] for chunk in chunks] == [2, 2]
+    assert pd.concat(chunks)["c"].fillna("").tolist() == ["", "b", "b", "c"]
+
+
+def test_export_snapshot_dates(tmp_path):
+    engine = create_engine("sqlite:///:memory:")
+    df = pd.DataFrame(
+        {
+            "a": [1, 1, 1, 2, 2, 3],
+            "b": pd.to_datetime(["2024-01-05", "2024-02-05", "2024-02-05", "2024-01-20", "2024-03-01", "2024-03-10"]),
+            "cr": pd.to_datetime(["2024-01-05", "2024-02-05", "2024-02-06", "2024-01-20", "2024-03-01", "2024-03-10"]),
+            "c": ["a", "b", "c", "d", "e", "f"],
+        }
+    )
+    df1 = pd.DataFrame({"a": [1, 2], "d": pd.to_datetime(["2024-01-01", "2024-03-01"]), "e": [10, 20]})
+    df.to_sql("test", con=engine)
+    df1.to_sql("test1", con=engine)
+    rc = RepoConfig(
+        entities=[Entity(name="a", value_type=int)],
+        groups=[
+            Group(
+                name="test",
+                entity="a",
+                features=[Feature(name="c", value_type=str)],
+                event_timestamp_column="b",
+                create_timestamp_column="cr",
+            ),
+            Group(name="test1", entity="a", features=[Feature(name="e", value_type=int)], event_timestamp_column="d"),
+        ],
+    )
+
+    fs = FeatureStore(repo_config=rc, engine=engine)
+    snapshot_dates = parse_snapshot_dates("2024-01-01..2024-04-01/monthly")
+    assert len(snapshot_dates) == 4
+    output_df = pd.concat(list(fs.iter_export(["test.c", "test1.e"], snapshot_dates=snapshot_dates, batch_size=2)))
+    assert list(output_df.columns) == ["snapshot_date", "a", "c", "e"]
+
+    # every snapshot matches a separate export as of its date
+    for snapshot_date in snapshot_dates:
+        expected = pd.concat(list(fs.iter_export(["test.c", "test1.e"], snapshot_date)))
+        actual = output_df[output_df["snapshot_date"] == snapshot_date].drop(columns=["snapshot_date"])
+        expected = expected.sort_values("a").reset_index(drop=True)
+        pd.testing.assert_frame_equal(actual.reset_index(drop=True), expected, check_dtype=False)
+    assert output_df["c"].tolist() == ["a", "d", "c", "e", "c", "e", "f"]
+
+    output_file = str(tmp_path / "output.csv")
+    fs.export(["test.c"], output_file=output_file, snapshot_dates="2024-02-01,2024-03-01")
+    assert pd.read_csv(output_file)["snapshot_date"].nunique() == 2
+
+    with pytest.raises(ValueError):
+        list(fs.iter_export(["test.c"], datetime(2024, 1, 1), snapshot_dates=snapshot_dates))
+
+
+def test_compact_dtypes():
+    engine = create_engine("sqlite:///:memory:")
+    df = pd.DataFrame(
+        {
+            "a": list(range(20)) * 5,
+            "b": pd.to_datetime("2024-01-01") + pd.to_timedelta(list(range(100)), unit="h"),
+            "c": ["x", "y", "z", "w"] * 25,
+            "e": list(range(100)),
+            "f": [0.5] * 100,
+        }
+    )
+    df.to_sql("test", con=engine, index=False)
+    rc = RepoConfig(
+        entities=[Entity(name="a", value_type=int)],
+        groups=[
+            Group(
+                name="test",
+                entity="a",
+                features=[
+                    Feature(name="c", value_type=str),
+                    Feature(name="e", value_type=int),
+                    Feature(name="f", value_type=float),
+                ],
+                event_timestamp_column="b",
+            )
+        ],
+    )
+    feature_list = ["test.c", "test.e", "test.f"]
+    fs = FeatureStore(repo_config=rc, engine=engine)
+    compact_fs = FeatureStore(repo_config=rc, engine=engine, compact_dtypes=True)
+    assert compact_fs.get_dtypes(compact_fs.get_feature_group(feature_list)) == {
+        "a": "Int64",
+        "c": "category",
+        "e": "Int64",
+        "f": "float32",
+    }
+
+    expected = pd.concat(list(fs.iter_export(feature_list, datetime(2024, 2, 1))))
+    output = pd.concat(list(compact_fs.iter_export(feature_list, datetime(2024, 2, 1))))
+    assert output["c"].dtype == "category"
+    assert output["f"].dtype == "float32"
+    assert output["e"].dtype == "Int64"
+    assert output.memory_usage(deep=True).sum() < expected.memory_usage(deep=True).sum()
+    pd.testing.assert_frame_equal(output.astype(object), expected.astype(object), check_dtype=False)
+
+    # chunks with different categories are combined into a single categorical column
+    entity_df = pd.DataFrame({"a": [1, 2, 3, 4], "b": pd.to_datetime(["2024-01-05"] * 4)})
+    joined = compact_fs.join(entity_df, "a", "b", feature_list, chunksize=1, strategy="temp_table")
+    assert joined["c"].dtype == "category"
+    assert joined["c"].tolist() == fs.join(entity_df, "a", "b", feature_list, strategy="temp_table")["c"].tolist()
+
+    # the dtype of a column doesn't depend on the values of a chunk
+    chunks = [apply_dtypes(pd.DataFrame({"e": values}), {"e": "Int64"}) for values in [[1], [100000], [None]]]
+    assert [chunk["e"].dtype for chunk in chunks] == ["Int64"] * 3
@@ -1,3 +1,7 @@
+import os
+
+import pytest
+
 from spellbook.base import Entity, Feature, Group, RepoConfig
 
 
@@ -42,3 +46,31 @@ value_type: str
 """
     print(RepoConfig.parse_yaml(sample_yaml))
     assert RepoConfig.parse_yaml(sample_yaml) == RepoConfig(entities=[Entity(name="user", value_type="str")], groups=[])
+
+
+def test_group_lookup_and_validation():
+    repo = RepoConfig.parse_yaml_file("tests/basic.yml")
+    assert repo.get_group("test2").event_timestamp_column == "d"
+    assert repo.get_attr_from_group_name("test1", "entity") == "a"
+    assert repo.get_groups_from_feature_name("e") == ["test2"]
+
+    repo.validate_feature_list(["test1.c", "test2.e", "test2.d"])
+    with pytest.raises(ValueError, match="test1.e.*missing.c.*nodot"):
+        repo.validate_feature_list(["test1.e", "missing.c", "nodot"])
+
+
+def test_parse_yaml_file_cache(tmp_path):
+    config_file = tmp_path / "basic.yml"
+    cache_dir = tmp_path / "cache"
+    config_file.write_text(open("tests/basic.yml").read())
+
+    repo = RepoConfig.parse_yaml_file(str(config_file), cache_dir=str(cache_dir))
+    assert len(list(cache_dir.iterdir())) == 1
+    cached_repo = RepoConfig.parse_yaml_file(str(config_file), cache_dir=str(cache_dir))
+    assert cached_repo.groups == repo.groups
+    assert str(cached_repo.engine.url) == "sqlite:///test.db"
+
+    config_file.write_text(open("tests/basic.yml").read().replace("name: test2", "name: test3"))
+    os.utime(config_file, ns=(0, 0))
+    repo = RepoConfig.parse_yaml_file(str(config_file), cache_dir=str(cache_dir))
+    assert [g.name for g in repo.groups] == ["test1", "test3"]
@@ -0,0 +1,57 @@
+from datetime import datetime
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, create_mock_engine
+
+from spellbook.base import Entity, Feature, Group, RepoConfig
+from spellbook.feature_store import FeatureStore
+from spellbook.index import check_indexes, create_index, explain, explain_statement
+
+
+def test_index_advisor():
+    engine = create_engine("sqlite:///:memory:")
+    df = pd.DataFrame({"a": [1, 1, 2], "b": [1, 2, 1], "b1": [1, 1, 1], "c": ["a", "b", "c"]})
+    df.to_sql("test", con=engine, index=False)
+    rc = RepoConfig(
+        entities=[Entity(name="a", value_type=int)],
+        groups=[
+            Group(
+                name="test",
+                entity="a",
+                features=[Feature(name="c", value_type=str)],
+                event_timestamp_column="b",
+                create_timestamp_column="b1",
+            ),
+            Group(name="missing", entity="a", features=[Feature(name="d", value_type=str)]),
+        ],
+    )
+
+    report = check_indexes(rc, engine)
+    assert [(item["group"], item["table_exists"], item["index"]) for item in report] == [
+        ("test", True, None),
+        ("missing", False, None),
+    ]
+    assert report[0]["columns"] == ["a", "b", "b1"]
+
+    assert create_index(engine, rc.get_group("test")) == "ix_spellstore_test"
+    assert check_indexes(rc, engine, ["test"])[0]["index"] == "ix_spellstore_test"
+
+    plan = explain(FeatureStore(repo_config=rc, engine=engine), "test")
+    assert "ix_spellstore_test" in plan
+
+
+@pytest.mark.parametrize("url", ["postgresql://", "mysql://"])
+def test_explain_statement_binds_parameters(url):
+    rc = RepoConfig(
+        entities=[Entity(name="a", value_type=int)],
+        groups=[
+            Group(name="test", entity="a", features=[Feature(name="c", value_type=str)], event_timestamp_column="b")
+        ],
+    )
+    engine = create_mock_engine(url, executor=None)
+    snapshot_date = datetime(2024, 1, 1)
+    statement, params = explain_statement(FeatureStore(repo_config=rc, engine=engine), "test", snapshot_date)
+    assert statement.startswith("EXPLAIN SELECT")
+    assert "%(" in statement or "%s" in statement
+    assert snapshot_date in (params.values() if isinstance(params, dict) else params)
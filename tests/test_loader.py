@@ -0,0 +1,92 @@
+from datetime import datetime
+
+import pandas as pd
+import pytest
+from sqlalchemy import DateTime, Float, Text, create_engine, create_mock_engine, inspect
+
+from spellbook.loader import get_insert_method
+
+
+@pytest.fixture
+def feature_store(build_feature_store):
+    return build_feature_store(None, {"c": float, "d": datetime}, entity_type=str, create_timestamp_column="b1")
+
+
+def test_load_chunks(tmp_path, feature_store):
+    input_file = str(tmp_path / "input.csv")
+    df = pd.DataFrame({"a": ["001", "002", "003"], "b": [1, 2, 3], "b1": [1, 1, 1], "c": [0.5, 1.5, None]})
+    df["d"] = "2022-01-01"
+    df.to_csv(input_file, index=False)
+
+    assert feature_store.load(input_file, "test", chunksize=2) == 3
+    columns = {col["name"]: col["type"] for col in inspect(feature_store.engine).get_columns("test")}
+    assert isinstance(columns["a"], Text)
+    assert isinstance(columns["c"], Float)
+    assert isinstance(columns["d"], DateTime)
+    output = pd.read_sql_table("test", feature_store.engine)
+    assert output["a"].tolist() == ["001", "002", "003"]
+    assert output["c"].isna().tolist() == [False, False, True]
+
+
+def test_load_append_dedupe(tmp_path, feature_store):
+    input_file = str(tmp_path / "input.csv")
+    df = pd.DataFrame({"a": ["1", "1", "2"], "b": [1, 2, 1], "b1": [1, 1, 1], "c": [0.1, 0.2, 0.3]})
+    df.to_csv(input_file, index=False)
+    feature_store.load(input_file, "test")
+
+    # overlaps the loaded rows, and repeats a new row across chunks
+    df = pd.DataFrame({"a": ["1", "2", "3", "3"], "b": [2, 2, 1, 1], "b1": [1, 1, 1, 1], "c": [0.2, 0.4, 0.5, 0.5]})
+    df.to_csv(input_file, index=False)
+    feature_store.load(input_file, "test", if_exists="append", chunksize=3, dedupe=True)
+    feature_store.load(input_file, "test", if_exists="append", chunksize=3, dedupe=True)
+
+    output = pd.read_sql_query("select * from test order by a, b", feature_store.engine)
+    assert list(zip(output["a"], output["b"])) == [("1", 1), ("1", 2), ("2", 1), ("2", 2), ("3", 1)]
+
+
+@pytest.mark.parametrize("chunksize", [1, 2, 3])
+def test_load_dedupe_keeps_first_row(tmp_path, feature_store, chunksize):
+    input_file = str(tmp_path / "input.csv")
+    pd.DataFrame({"a": ["0"], "b": [0], "b1": [0], "c": [0.0]}).to_csv(input_file, index=False)
+    feature_store.load(input_file, "test")
+
+    df = pd.DataFrame({"a": ["1", "1", "1"], "b": [1, 1, 1], "b1": [1, 1, 1], "c": [0.1, 0.2, 0.3]})
+    df.to_csv(input_file, index=False)
+    feature_store.load(input_file, "test", if_exists="append", chunksize=chunksize, dedupe=True)
+    output = pd.read_sql_query("select * from test where a = '1'", feature_store.engine)
+    assert output["c"].tolist() == [0.1]
+
+
+def test_load_timestamps(tmp_path, feature_store):
+    input_file = str(tmp_path / "input.csv")
+    df = pd.DataFrame(
+        {
+            "a": ["1", "1", "2"],
+            "b": ["2022-01-01 00:00:00", "2022-01-03 00:00:00", "2022-01-02 00:00:00"],
+            "b1": ["2022-01-05 00:00:00"] * 3,
+            "c": [0.1, 0.2, 0.3],
+        }
+    )
+    df.to_csv(input_file, index=False)
+    feature_store.load(input_file, "test", chunksize=2)
+    columns = {col["name"]: col["type"] for col in inspect(feature_store.engine).get_columns("test")}
+    assert isinstance(columns["b"], DateTime) and isinstance(columns["b1"], DateTime)
+
+    # appended rows compare as datetimes when deduplicating, and in snapshot queries
+    feature_store.load(input_file, "test", if_exists="append", dedupe=True)
+    assert pd.read_sql_query("select count(*) as n from test", feature_store.engine)["n"].tolist() == [3]
+    output = pd.concat(list(feature_store.iter_export(["test.c"], datetime(2022, 1, 2, 12))))
+    assert sorted(zip(output["a"], output["c"])) == [("1", 0.1), ("2", 0.3)]
+
+
+def test_load_if_exists_fail(tmp_path, feature_store):
+    input_file = str(tmp_path / "input.csv")
+    pd.DataFrame({"a": ["1"], "b": [1], "b1": [1], "c": [0.1]}).to_csv(input_file, index=False)
+    feature_store.load(input_file, "test")
+    with pytest.raises(ValueError):
+        feature_store.load(input_file, "test", if_exists="fail")
+
+
+def test_insert_method():
+    assert get_insert_method(create_engine("sqlite://"), 4) == (None, None)
+    assert get_insert_method(create_mock_engine("mysql://", executor=None), 4) == ("multi", 500)
@@ -0,0 +1,54 @@
+import pandas as pd
+import pytest
+from sqlalchemy import event
+
+
+@pytest.mark.parametrize("output_file", ["snapshot.csv", "snapshot.parquet"])
+def test_materialize_incremental(tmp_path, build_feature_store, output_file):
+    if output_file.endswith(".parquet"):
+        pytest.importorskip("pyarrow")
+    df = pd.DataFrame({"a": [1, 1, 2], "b": [1, 2, 1], "b1": [1, 1, 1], "c": ["a", "b", "c"]})
+    fs = build_feature_store(df, create_timestamp_column="b1")
+    engine = fs.engine
+    output_file = str(tmp_path / output_file)
+
+    snapshot_df = fs.materialize("test", output_file=output_file, snapshot_date=10)
+    assert snapshot_df["c"].tolist() == ["b", "c"]
+
+    # new rows after the watermark, including a correction with a later create timestamp
+    df = pd.DataFrame({"a": [2, 3, 1], "b": [5, 6, 2], "b1": [1, 1, 2], "c": ["d", "e", "f"]})
+    df.to_sql("test", con=engine, index=False, if_exists="append")
+
+    statements = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(parameters)
+
+    snapshot_df = fs.materialize("test", output_file=output_file, snapshot_date=10)
+    assert snapshot_df["a"].tolist() == [1, 2, 3]
+    assert snapshot_df["c"].tolist() == ["f", "d", "e"]
+    # only rows at or after the watermark are scanned
+    assert any(2 in params for params in statements)
+
+    snapshot_df = fs.materialize("test", output_file=output_file, snapshot_date=10, full_refresh=True)
+    assert snapshot_df["c"].tolist() == ["f", "d", "e"]
+
+    # a snapshot before the watermark (6) is fully refreshed, rather than merged with later rows
+    snapshot_df = fs.materialize("test", output_file=output_file, snapshot_date=3)
+    assert snapshot_df["a"].tolist() == [1, 2]
+    assert snapshot_df["c"].tolist() == ["f", "c"]
+
+
+def test_materialize_table(build_feature_store):
+    df = pd.DataFrame({"a": [1, 1, 2], "b": [1, 2, 1], "b1": [1, 1, 1], "c": ["a", "b", "c"]})
+    fs = build_feature_store(df, create_timestamp_column="b1")
+    engine = fs.engine
+    fs.materialize("test", output_table="test_snapshot", snapshot_date=10)
+
+    df = pd.DataFrame({"a": [2], "b": [5], "b1": [1], "c": ["d"]})
+    df.to_sql("test", con=engine, index=False, if_exists="append")
+    fs.materialize("test", output_table="test_snapshot", snapshot_date=10)
+
+    snapshot_df = pd.read_sql_table("test_snapshot", engine)
+    assert snapshot_df["c"].tolist() == ["b", "d"]
@@ -0,0 +1,37 @@
+import pandas as pd
+import pytest
+
+from spellbook.metrics import NULL_TRACER, STAGES
+
+
+@pytest.fixture
+def feature_store(build_feature_store):
+    return build_feature_store(pd.DataFrame({"a": list(range(25)), "b": [1] * 25, "c": ["a"] * 25}))
+
+
+def test_trace_export(tmp_path, feature_store):
+    events = []
+    with feature_store.trace(callback=events.append) as tracer:
+        feature_store.export(["test.c"], 10, output_file=str(tmp_path / "output.csv"), chunksize=10)
+    assert feature_store.tracer is NULL_TRACER
+
+    profile = tracer.to_dict()
+    assert profile["rows"] == 25
+    assert profile["chunks"] == 3
+    assert profile["bytes"] > 0
+    assert profile["queries"] == 1
+    for stage in ["query_build", "compile", "execute", "fetch", "write"]:
+        assert profile["stages"][stage]["count"] > 0
+    assert set(STAGES) <= set(profile["stages"])
+    assert sum(stats["time"] for stats in profile["stages"].values()) <= profile["wall_time"]
+    assert [e["rows"] for e in events if e["event"] == "chunk"] == [10, 10, 5]
+
+
+def test_trace_join(feature_store):
+    entity_df = pd.DataFrame({"a": [1, 2, 3], "b": [1, 1, 2]})
+    with feature_store.trace() as tracer:
+        feature_store.join(entity_df, "a", "b", ["test.c"])
+    profile = tracer.to_dict()
+    assert profile["rows"] == 3
+    assert profile["queries"] == 2
+    assert profile["stages"]["merge"]["count"] == 2
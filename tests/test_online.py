@@ -0,0 +1,60 @@
+import threading
+
+import pandas as pd
+from sqlalchemy import event
+
+from spellbook.online import OnlineStore
+
+
+def count_queries(engine):
+    queries = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            queries.append(statement)
+
+    return queries
+
+
+TOY_DF = pd.DataFrame({"a": [1, 1, 2, 3], "b": [1, 2, 1, 1], "c": ["a", "b", "c", "d"]})
+
+
+def test_get_online_features_cache(build_feature_store):
+    fs = build_feature_store(TOY_DF)
+    queries = count_queries(fs.engine)
+
+    output = fs.get_online_features(["test.c"], [2, 1, 4])
+    assert output["a"].tolist() == [2, 1, 4]
+    assert output["c"].tolist() == ["c", "b", None]
+    assert len(queries) == 1
+
+    # served from the cache, including the unknown entity
+    output = fs.get_online_features(["test.c"], [1, 4])
+    assert output["c"].tolist() == ["b", None]
+    assert len(queries) == 1
+
+    fs.online_store = OnlineStore(fs, cache_ttl=0)
+    fs.get_online_features(["test.c"], [1])
+    fs.get_online_features(["test.c"], [1])
+    assert len(queries) == 3
+
+
+def test_get_online_features_coalesced(build_feature_store):
+    fs = build_feature_store(TOY_DF)
+    fs.online_store = OnlineStore(fs, batch_window=0.2)
+    queries = count_queries(fs.engine)
+
+    outputs = {}
+
+    def lookup(entity_id):
+        outputs[entity_id] = fs.get_online_features(["test.c"], [entity_id])["c"].tolist()
+
+    threads = [threading.Thread(target=lookup, args=(entity_id,)) for entity_id in [1, 2, 3]]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert outputs == {1: ["b"], 2: ["c"], 3: ["d"]}
+    assert len(queries) == 1
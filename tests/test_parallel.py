@@ -0,0 +1,37 @@
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+
+from spellbook.feature_store import FeatureStore
+from spellbook.parallel import read_manifest, read_shards
+
+
+@pytest.mark.parametrize("entity_type,partition_by", [(int, "auto"), (int, "hash"), (str, "auto")])
+def test_parallel_export(tmp_path, build_feature_store, toy_frame, entity_type, partition_by):
+    df = toy_frame(num_entities=100, entity_type=entity_type, timestamps=(1, 2))
+    fs = build_feature_store(df, entity_type=entity_type)
+    output_dir = str(tmp_path / "output")
+    manifest = fs.parallel_export(
+        ["test.c"], output_dir, snapshot_date=10, num_partitions=4, partition_by=partition_by, max_workers=2
+    )
+    assert manifest == read_manifest(output_dir)
+    assert manifest["num_partitions"] == 4 and manifest["num_rows"] == 100
+    assert all(shard["num_rows"] > 0 for shard in manifest["shards"])
+
+    output_df = read_shards(output_dir)
+    expected = pd.concat(list(fs.iter_export(["test.c"], 10)))
+    assert sorted(output_df["a"].tolist()) == sorted(expected["a"].tolist())
+    assert set(output_df["c"]) == {"y"}
+
+
+def test_parallel_export_range_bounds(tmp_path, build_feature_store, toy_frame):
+    fs = build_feature_store(toy_frame(num_entities=100, timestamps=(1, 2)))
+    manifest = fs.parallel_export(["test.c"], str(tmp_path / "output"), 10, num_partitions=3, max_workers=1)
+    shards = manifest["shards"]
+    assert [shard["kind"] for shard in shards] == ["range"] * 3
+    assert shards[0]["lower"] == 0 and shards[-1]["upper"] == 99
+    assert [shard["upper"] for shard in shards[:-1]] == [shard["lower"] for shard in shards[1:]]
+    assert sum(shard["num_rows"] for shard in shards) == 100
+
+    with pytest.raises(ValueError):
+        FeatureStore(fs.repo_config, create_engine("sqlite://")).parallel_export(["test.c"], str(tmp_path / "x"))
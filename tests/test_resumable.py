@@ -0,0 +1,90 @@
+import os
+import sqlite3
+import time
+
+import pandas as pd
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from spellbook.resumable import is_transient_error, read_checkpoint, resumable_export
+
+
+@pytest.fixture
+def feature_store(build_feature_store, toy_frame):
+    return build_feature_store(toy_frame(num_entities=50, timestamps=(1, 2)))
+
+
+def fail_on_call(fs, monkeypatch, call_number, error):
+    iter_feature_group = fs._iter_feature_group
+    calls = []
+
+    def failing_iter_feature_group(*args, **kwargs):
+        calls.append(args)
+        if len(calls) == call_number:
+            raise error
+        return iter_feature_group(*args, **kwargs)
+
+    monkeypatch.setattr(fs, "_iter_feature_group", failing_iter_feature_group)
+    return calls
+
+
+@pytest.mark.parametrize("entity_type", [int, str])
+def test_resumable_export(tmp_path, build_feature_store, toy_frame, entity_type):
+    df = toy_frame(num_entities=50, entity_type=entity_type, timestamps=(1, 2))
+    fs = build_feature_store(df, entity_type=entity_type)
+    output_file = str(tmp_path / "output.csv")
+    summary = fs.resumable_export(["test.c"], output_file, snapshot_date=10, page_size=15)
+    assert summary["pages"] == 4 and summary["num_rows"] == 50
+    assert not os.path.exists(output_file + ".checkpoint.json")
+
+    output_df = pd.read_csv(output_file, index_col=0)
+    expected = pd.concat(list(fs.iter_export(["test.c"], 10)))
+    assert output_df["a"].tolist() == sorted(expected["a"].tolist())
+    assert set(output_df["c"]) == {"y"}
+
+
+def test_resumable_export_resumes_after_failure(tmp_path, feature_store, monkeypatch):
+    output_file = str(tmp_path / "output.csv")
+    fail_on_call(feature_store, monkeypatch, 3, RuntimeError("interrupted"))
+    with pytest.raises(RuntimeError):
+        feature_store.resumable_export(["test.c"], output_file, snapshot_date=10, page_size=15)
+    checkpoint = read_checkpoint(output_file + ".checkpoint.json")
+    assert checkpoint["pages"] == 2 and checkpoint["num_rows"] == 30 and checkpoint["last_key"] == 29
+
+    # a half-written page is discarded on resume
+    with open(output_file, "a") as f:
+        f.write("30,30,y\n31,3")
+    with pytest.raises(ValueError):
+        feature_store.resumable_export(["test.c"], output_file, snapshot_date=11, page_size=15)
+    monkeypatch.undo()
+    summary = feature_store.resumable_export(["test.c"], output_file, page_size=15)
+    assert summary["pages"] == 4 and summary["num_rows"] == 50 and summary["snapshot_date"] == 10
+    assert pd.read_csv(output_file, index_col=0)["a"].tolist() == list(range(50))
+
+
+def test_resumable_export_dataset_retries(tmp_path, feature_store, monkeypatch):
+    output_dir = str(tmp_path / "output")
+    # transient errors are retried, the page is fetched again
+    error = OperationalError("select", {}, Exception("connection lost"), connection_invalidated=True)
+    calls = fail_on_call(feature_store, monkeypatch, 2, error)
+    summary = resumable_export(feature_store, ["test.c"], output_dir, snapshot_date=10, page_size=20, retry_wait=0)
+    assert summary["pages"] == 3 and len(calls) == 4
+    assert sorted(pd.read_parquet(output_dir)["a"].tolist()) == list(range(50))
+
+    with pytest.raises(ValueError):
+        feature_store.resumable_export(["test.c"], str(tmp_path / "output.parquet"))
+
+
+def test_resumable_export_fails_on_permanent_errors(tmp_path, feature_store, monkeypatch):
+    output_file = str(tmp_path / "output.csv")
+    error = OperationalError("select", {}, sqlite3.OperationalError("no such table: test"))
+    calls = fail_on_call(feature_store, monkeypatch, 1, error)
+    monkeypatch.setattr(time, "sleep", lambda seconds: pytest.fail("a permanent error was retried"))
+    with pytest.raises(OperationalError):
+        resumable_export(feature_store, ["test.c"], output_file, snapshot_date=10, page_size=20)
+    assert len(calls) == 1
+
+    # disconnects recognized by the dialect are transient
+    closed = OperationalError("select", {}, sqlite3.ProgrammingError("Cannot operate on a closed database."))
+    assert is_transient_error(closed, feature_store.engine)
+    assert not is_transient_error(error, feature_store.engine)
@@ -0,0 +1,122 @@
+import os
+from datetime import timedelta
+
+import pandas as pd
+import pytest
+from sqlalchemy import Column, DateTime, Integer, MetaData, Table, create_engine, create_mock_engine
+
+from spellbook.base import Feature, Group
+from spellbook.feature_store import (
+    SPINE_ENTITY_COLUMN,
+    SPINE_EVENT_TIMESTAMP_COLUMN,
+    SPINE_ROW_COLUMN,
+    FeatureGroup,
+    FeatureView,
+)
+from spellbook.strategy import STRATEGIES, choose_query_strategy
+
+# set to e.g. a PostgreSQL or DuckDB url to also check the strategies of that dialect
+TEST_DATABASE_URL = os.environ.get("SPELLSTORE_TEST_DATABASE_URL")
+
+
+def get_engines():
+    engines = [create_engine("sqlite:///:memory:")]
+    if TEST_DATABASE_URL is not None:
+        engines.append(create_engine(TEST_DATABASE_URL))
+    return engines
+
+
+def strategy_cases():
+    return [
+        pytest.param(engine, name, id=f"{engine.dialect.name}-{name}")
+        for engine in get_engines()
+        for name, strategy in STRATEGIES.items()
+        if strategy.supports(engine)
+    ]
+
+
+@pytest.fixture
+def feature_store(build_feature_store, engine, query_strategy):
+    ts = pd.Timestamp("2024-01-01")
+    df = pd.DataFrame(
+        {
+            "a": [1, 1, 1, 2, 2, 3],
+            "b": [ts, ts + timedelta(days=2), ts + timedelta(days=2), ts, ts + timedelta(days=5), ts],
+            "cr": [ts, ts + timedelta(days=2), ts + timedelta(days=3), ts, ts + timedelta(days=5), ts],
+            "c": ["a", "b", "c", "d", "e", "f"],
+        }
+    )
+    df1 = pd.DataFrame({"a": [1, 2], "d": [ts, ts + timedelta(days=1)], "e": [10, 20]})
+    group1 = Group(name="test1", entity="a", features=[Feature(name="e", value_type=int)], event_timestamp_column="d")
+    return build_feature_store(
+        df, create_timestamp_column="cr", groups=[(group1, df1)], engine=engine, query_strategy=query_strategy
+    )
+
+
+@pytest.mark.parametrize("engine,query_strategy", strategy_cases())
+def test_strategy_latest_row(feature_store):
+    snapshot_date = pd.Timestamp("2024-01-04").to_pydatetime()
+    df = pd.concat(list(feature_store.iter_export(["test.c", "test1.e"], snapshot_date)))
+    df = df.sort_values("a").reset_index(drop=True)
+    assert list(df.columns) == ["a", "c", "e"]
+    # ties on event timestamp are broken by create timestamp, entity 2's latest row is after the snapshot
+    assert df["a"].tolist() == [1, 2, 3]
+    assert df["c"].tolist() == ["c", "d", "f"]
+    assert df["e"].fillna(0).tolist() == [10, 20, 0]
+
+
+@pytest.mark.parametrize("engine,query_strategy", strategy_cases())
+def test_strategy_point_in_time(feature_store):
+    entity_df = pd.DataFrame(
+        {
+            "a": [1, 1, 2, 2, 3, 4],
+            "b": pd.to_datetime(["2023-12-31", "2024-01-03", "2024-01-02", "2024-01-06", "2024-01-01", "2024-01-01"]),
+        }
+    )
+    output = feature_store.join(entity_df, "a", "b", ["test.c", "test1.e"], strategy="temp_table")
+    assert output["c"].fillna("").tolist() == ["", "c", "d", "e", "f", ""]
+    assert output["e"].fillna(0).tolist() == [0, 10, 20, 20, 0, 0]
+
+
+def test_choose_query_strategy():
+    sqlite_engine = create_engine("sqlite:///:memory:")
+    pg_engine = create_mock_engine("postgresql://", executor=None)
+    assert choose_query_strategy(sqlite_engine).name == "window"
+    assert choose_query_strategy(sqlite_engine, use_safe=True).name == "group_by"
+    assert choose_query_strategy(pg_engine).name == "distinct_on"
+    assert choose_query_strategy(pg_engine, "qualify").name == "qualify"
+    with pytest.raises(ValueError):
+        choose_query_strategy(sqlite_engine, "unknown")
+
+
+def test_strategy_sql():
+    engine = create_mock_engine("postgresql://", executor=None)
+    feature_views = [
+        FeatureView(name="t", columns=["c"], entity_column="a", event_timestamp_column="b"),
+        FeatureView(name="t1", columns=["e"], entity_column="a", event_timestamp_column="d"),
+    ]
+    spine = Table(
+        "spine",
+        MetaData(),
+        Column(SPINE_ROW_COLUMN, Integer),
+        Column(SPINE_ENTITY_COLUMN, Integer),
+        Column(SPINE_EVENT_TIMESTAMP_COLUMN, DateTime),
+    )
+
+    def compile_queries(query_strategy):
+        feature_group = FeatureGroup(feature_views=feature_views, full_join=False, query_strategy=query_strategy)
+        query = feature_group.build_query(engine, 100)
+        pit_query = feature_group.build_point_in_time_query(engine, spine)
+        return str(query.statement.compile(engine)), str(pit_query.statement.compile(engine))
+
+    sql, pit_sql = compile_queries("auto")
+    assert "DISTINCT ON (t.a)" in sql and "row_number" not in sql
+    assert f"DISTINCT ON (spine.{SPINE_ROW_COLUMN})" in pit_sql
+
+    sql, pit_sql = compile_queries("qualify")
+    assert "QUALIFY row_number() OVER (PARTITION BY t.a ORDER BY t.b DESC)" in sql
+    assert "QUALIFY" in pit_sql
+
+    sql, pit_sql = compile_queries("asof")
+    assert "QUALIFY" in sql
+    assert "spine ASOF JOIN t ON" in pit_sql and "row_number" not in pit_sql
@@ -0,0 +1,86 @@
+import sys
+
+import pandas as pd
+import pytest
+
+from spellbook.writer import CsvWriter, get_writer
+
+
+@pytest.fixture
+def feature_store(build_feature_store):
+    df = pd.DataFrame({"a": list(range(25)), "b": [1] * 25, "c": ["a"] * 15 + ["b"] * 10, "e": [0.5] * 25})
+    return build_feature_store(df, {"c": str, "e": float})
+
+
+def test_csv_writer_header(tmp_path):
+    output_file = str(tmp_path / "output.csv")
+    df = pd.DataFrame({"a": [1, 2]})
+    with CsvWriter(output_file) as writer:
+        writer.write(df)
+        writer.write(df)
+    with CsvWriter(output_file, append=True) as writer:
+        writer.write(df)
+    assert pd.read_csv(output_file, index_col=0)["a"].tolist() == [1, 2, 1, 2, 1, 2]
+
+
+def test_export_parquet(tmp_path, feature_store):
+    pytest.importorskip("pyarrow")
+    output_file = str(tmp_path / "output.parquet")
+    feature_store.export(["test.c", "test.e"], 10, output_file=output_file, chunksize=10)
+
+    import pyarrow.parquet as pq
+
+    parquet_file = pq.ParquetFile(output_file)
+    assert parquet_file.metadata.num_row_groups == 3
+    assert str(parquet_file.schema_arrow.field("a").type) == "int64"
+    assert str(parquet_file.schema_arrow.field("c").type) == "string"
+    assert sorted(pd.read_parquet(output_file)["a"].tolist()) == list(range(25))
+
+
+def test_export_feather_and_dataset(tmp_path, feature_store):
+    pytest.importorskip("pyarrow")
+
+    output_file = str(tmp_path / "output.feather")
+    feature_store.export(["test.c"], 10, output_file=output_file, chunksize=10)
+    assert pd.read_feather(output_file).shape[0] == 25
+
+    output_dir = str(tmp_path / "output")
+    feature_store.export(["test.c"], 10, output_file=output_dir, chunksize=10)
+    assert pd.read_parquet(output_dir).shape[0] == 25
+
+    output_dir = str(tmp_path / "partitioned")
+    writer = get_writer(output_dir, partition_cols=["c"])
+    writer.write(pd.DataFrame({"a": [1, 2], "c": ["x", "y"]}))
+    writer.close()
+    assert sorted(pd.read_parquet(output_dir)["a"].tolist()) == [1, 2]
+
+
+def test_export_partitioned_dataset(tmp_path, feature_store):
+    pytest.importorskip("pyarrow")
+
+    output_dir = tmp_path / "partitioned"
+    feature_store.export(["test.c", "test.e"], 10, output_file=str(output_dir), chunksize=10, partition_cols=["c"])
+    assert sorted(path.name for path in output_dir.iterdir()) == ["c=a", "c=b"]
+    assert pd.read_parquet(output_dir / "c=b").shape[0] == 10
+    output_df = pd.read_parquet(output_dir)
+    assert sorted(output_df["a"].tolist()) == list(range(25))
+    assert output_df.groupby("c", observed=True).size().to_dict() == {"a": 15, "b": 10}
+
+    entity_df = pd.DataFrame({"a": [1, 20]})
+    output_dir = tmp_path / "joined"
+    feature_store.join(
+        entity_df, "a", None, ["test.c"], snapshot_date=10, output_file=str(output_dir), partition_cols=["c"]
+    )
+    assert sorted(path.name for path in output_dir.iterdir()) == ["c=a", "c=b"]
+
+    with pytest.raises(ValueError):
+        feature_store.export(
+            ["test.c"], 10, output_file=str(tmp_path / "output"), output_format="csv", partition_cols=["c"]
+        )
+
+
+def test_columnar_output_requires_pyarrow(tmp_path, monkeypatch, feature_store):
+    monkeypatch.setitem(sys.modules, "pyarrow", None)
+    with pytest.raises(ImportError, match=r"spellstore\[arrow\]"):
+        feature_store.export(["test.c"], 10, output_file=str(tmp_path / "output.parquet"))
+    assert not (tmp_path / "output.parquet").exists()